@@ -0,0 +1,174 @@
+"""
+Admission control and load shedding for the prediction service
+A per-worker limiter caps concurrent requests. Excess requests wait in a
+priority queue (predictions before page renders) for at most their
+queue-time deadline and are otherwise shed with 503 + Retry-After, so the
+requests that are admitted keep a flat latency instead of every request
+timing out together. Requests whose X-Request-Start deadline has already
+passed are shed before they take a slot.
+
+The in-flight and queue limits only matter with a threaded worker class
+(gunicorn --worker-class gthread --threads N): a sync worker serves one
+request at a time, so it never has a second request to queue or shed.
+"""
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from flask import jsonify, request
+
+# Lower value = served first
+PRIORITY_PREDICT = 0
+PRIORITY_PAGE = 1
+PRIORITY_NAMES = {PRIORITY_PREDICT: 'predict', PRIORITY_PAGE: 'page'}
+
+# Window used to report recent shedding in /health
+RECENT_SHED_WINDOW_S = 10.0
+
+
+class _Waiter:
+    __slots__ = ('event', 'granted', 'cancelled')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    """Bounded in-flight limiter with a deadline-aware priority queue"""
+
+    def __init__(self, max_in_flight=4, max_queue=64):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.shed = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.max_queue_wait_ms = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._last_shed = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_in_flight=int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 4)),
+            max_queue=int(os.environ.get('ADMISSION_MAX_QUEUE', 64)),
+        )
+
+    def _record_shed(self, name):
+        self.shed[name] += 1
+        self._last_shed = time.monotonic()
+
+    def acquire(self, priority, timeout):
+        """Wait up to `timeout` seconds for a slot; False means shed"""
+        name = PRIORITY_NAMES[priority]
+        start = time.perf_counter()
+        with self._lock:
+            # A request whose deadline already passed upstream is shed even
+            # with a free slot: its client has given up on it
+            if timeout <= 0:
+                self._record_shed(name)
+                return False
+            if self._in_flight < self.max_in_flight and not self._queued:
+                self._in_flight += 1
+                self.admitted[name] += 1
+                return True
+            if self._queued >= self.max_queue:
+                self._record_shed(name)
+                return False
+            waiter = _Waiter()
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._queued += 1
+
+        granted = waiter.event.wait(timeout)
+
+        with self._lock:
+            if not (granted or waiter.granted):
+                # Deadline passed while queued: leave a tombstone in the heap
+                waiter.cancelled = True
+                self._queued -= 1
+                self._record_shed(name)
+                return False
+            self.admitted[name] += 1
+            waited = (time.perf_counter() - start) * 1000
+            self.max_queue_wait_ms[name] = max(self.max_queue_wait_ms[name], waited)
+            return True
+
+    def release(self):
+        """Hand the slot to the most urgent live waiter, or free it"""
+        with self._lock:
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                self._queued -= 1
+                waiter.granted = True
+                waiter.event.set()
+                return
+            self._in_flight -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'max_queue_wait_ms': {k: round(v, 2) for k, v in self.max_queue_wait_ms.items()},
+            }
+
+    @property
+    def overloaded(self):
+        """True while requests are queued at capacity or were shed recently"""
+        return (self._queued >= self.max_queue
+                or time.monotonic() - self._last_shed < RECENT_SHED_WINDOW_S)
+
+
+def _elapsed_before_app():
+    """
+    Seconds the request already waited upstream, from an X-Request-Start
+    header (t=<microseconds> or plain epoch seconds/milliseconds), if any
+    """
+    header = request.headers.get('X-Request-Start')
+    if not header:
+        return 0.0
+    try:
+        value = float(header.split('=', 1)[-1])
+    except ValueError:
+        return 0.0
+    # Normalise microseconds / milliseconds / seconds since the epoch
+    if value > 1e14:
+        value /= 1e6
+    elif value > 1e11:
+        value /= 1e3
+    return max(0.0, time.time() - value)
+
+
+def admission_required(controller, priority, deadline_s, retry_after_s=1):
+    """Decorate a view so it runs only after admission within `deadline_s`"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            timeout = deadline_s - _elapsed_before_app()
+            if not controller.acquire(priority, timeout):
+                response = jsonify({
+                    'error': 'Service overloaded, please retry shortly.',
+                    'status': 'error'
+                })
+                response.status_code = 503
+                response.headers['Retry-After'] = str(retry_after_s)
+                return response
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release()
+        return wrapper
+    return decorator
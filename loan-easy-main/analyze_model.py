@@ -2,71 +2,69 @@
 Analyze and demonstrate the model's decision-making process
 """
 import pandas as pd
-import numpy as np
 import joblib
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+
+from preprocessing import LoanPreprocessor
+from diagnostics import load_report
+from segment_report import LOAN_SEGMENTS, csv_chunks, segment_report
 
 # Load model and encoders
-model = joblib.load('loan_model.pkl')
+model_path = 'loan_model.pkl'
+model = joblib.load(model_path)
 label_encoders = joblib.load('label_encoders.pkl')
 
 print("="*70)
 print("LOAN APPROVAL MODEL - DECISION LOGIC ANALYSIS")
 print("="*70)
 
-# Load the training data
-df = pd.read_csv('loan_data.csv')
+# One streamed pass over the training data computes every approval-rate
+# breakdown below, so the CSV never has to fit in memory
+data_file = 'loan_data.csv'
+report = segment_report(csv_chunks(data_file, ['Loan_Status', 'Credit_History', 'ApplicantIncome',
+                                               'CoapplicantIncome', 'Education', 'Married']),
+                        LOAN_SEGMENTS, 'Loan_Status', 'Y')
 
 print("\n1. TRAINING DATA OVERVIEW")
 print("-" * 70)
-print(f"Total Samples: {len(df)}")
+print(f"Total Samples: {report.rows}")
 print(f"\nApproval Distribution:")
-print(df['Loan_Status'].value_counts())
-print(f"\nApproval Rate: {(df['Loan_Status']=='Y').sum()/len(df)*100:.1f}%")
+for status, count in sorted(report.target_counts.items(), key=lambda item: -item[1]):
+    print(f"  {status}: {count}")
+print(f"\nApproval Rate: {report.summary()['approval_rate']*100:.1f}%")
 
 print("\n2. FEATURE STATISTICS")
 print("-" * 70)
 print("\nNumerical Features:")
 numerical_cols = ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount', 'Loan_Amount_Term']
-print(df[numerical_cols].describe())
+print(pd.read_csv(data_file, usecols=numerical_cols).describe())
 
 print("\n3. KEY PATTERNS IN DATA")
 print("-" * 70)
 
 # Credit History Impact
 print("\nCredit History Impact:")
-credit_impact = df.groupby('Credit_History')['Loan_Status'].apply(
-    lambda x: (x=='Y').sum()/len(x)*100
-)
+credit_impact = report.approval_rates('Credit_History')
 print(f"  Bad Credit (0): {credit_impact[0]:.1f}% approval rate")
 print(f"  Good Credit (1): {credit_impact[1]:.1f}% approval rate")
 
 # Income Impact
 print("\nIncome Level Impact:")
-df['Total_Income'] = df['ApplicantIncome'] + df['CoapplicantIncome']
-df['Income_Category'] = pd.cut(df['Total_Income'], 
-                               bins=[0, 3000, 5000, 8000, 15000],
-                               labels=['Low (<3K)', 'Medium (3-5K)', 'High (5-8K)', 'Very High (>8K)'])
-income_impact = df.groupby('Income_Category')['Loan_Status'].apply(
-    lambda x: (x=='Y').sum()/len(x)*100
-)
+income_impact = report.approval_rates('Income_Category')
 for cat, rate in income_impact.items():
     print(f"  {cat}: {rate:.1f}% approval rate")
 
 # Education Impact
 print("\nEducation Impact:")
-edu_impact = df.groupby('Education')['Loan_Status'].apply(
-    lambda x: (x=='Y').sum()/len(x)*100
-)
+edu_impact = report.approval_rates('Education')
 for edu, rate in edu_impact.items():
     print(f"  {edu}: {rate:.1f}% approval rate")
 
 # Marriage Impact
 print("\nMarital Status Impact:")
-marry_impact = df.groupby('Married')['Loan_Status'].apply(
-    lambda x: (x=='Y').sum()/len(x)*100
-)
+marry_impact = report.approval_rates('Married')
 for status, rate in marry_impact.items():
     print(f"  {status}: {rate:.1f}% approval rate")
 
@@ -78,6 +76,12 @@ feature_names = ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount',
                 'Loan_Amount_Term', 'Credit_History', 'Gender', 'Married', 
                 'Dependents', 'Education', 'Self_Employed', 'Property_Area']
 
+# Same preprocessing as training and serving
+if os.path.exists('preprocessor.pkl'):
+    preprocessor = joblib.load('preprocessor.pkl')
+else:
+    preprocessor = LoanPreprocessor.from_label_encoders(label_encoders, feature_names)
+
 if hasattr(model, 'feature_importances_'):
     importances = model.feature_importances_
     feature_importance = pd.DataFrame({
@@ -90,6 +94,20 @@ if hasattr(model, 'feature_importances_'):
         bars = '█' * int(row['Importance'] * 100)
         print(f"  {row['Feature']:20s} {row['Importance']:.4f} {bars}")
 
+# Impurity importances favour many-valued numeric features; the permutation
+# importances cached by diagnostics.py are measured on held-out data
+diagnostics_report = load_report(model_path)
+if diagnostics_report is not None:
+    print(f"\nPermutation Importance (held-out {diagnostics_report['scoring']} drop, "
+          f"{diagnostics_report['n_repeats']} repeats):")
+    for entry in diagnostics_report['permutation_importance']:
+        bars = '█' * int(max(entry['importance_mean'], 0) * 100)
+        print(f"  {entry['feature']:20s} {entry['importance_mean']:.4f} "
+              f"± {entry['importance_std']:.4f} {bars}")
+else:
+    print("\n  No permutation importance cached for this model "
+          f"(run: python diagnostics.py --model {model_path} --data {data_file})")
+
 print("\n5. EXAMPLE PREDICTIONS")
 print("-" * 70)
 
@@ -110,11 +128,7 @@ example1 = {
 }
 
 # Encode and predict
-encoded_example1 = example1.copy()
-for col in ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'Property_Area']:
-    encoded_example1[col] = label_encoders[col].transform([example1[col]])[0]
-
-feature_array1 = np.array([[encoded_example1[col] for col in feature_names]])
+feature_array1 = preprocessor.transform(example1)
 prediction1 = model.predict(feature_array1)[0]
 probability1 = model.predict_proba(feature_array1)[0]
 
@@ -141,11 +155,7 @@ example2 = {
     'Property_Area': 'Rural'
 }
 
-encoded_example2 = example2.copy()
-for col in ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'Property_Area']:
-    encoded_example2[col] = label_encoders[col].transform([example2[col]])[0]
-
-feature_array2 = np.array([[encoded_example2[col] for col in feature_names]])
+feature_array2 = preprocessor.transform(example2)
 prediction2 = model.predict(feature_array2)[0]
 probability2 = model.predict_proba(feature_array2)[0]
 
@@ -172,11 +182,7 @@ example3 = {
     'Property_Area': 'Semiurban'
 }
 
-encoded_example3 = example3.copy()
-for col in ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'Property_Area']:
-    encoded_example3[col] = label_encoders[col].transform([example3[col]])[0]
-
-feature_array3 = np.array([[encoded_example3[col] for col in feature_names]])
+feature_array3 = preprocessor.transform(example3)
 prediction3 = model.predict(feature_array3)[0]
 probability3 = model.predict_proba(feature_array3)[0]
 
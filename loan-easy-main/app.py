@@ -1,26 +1,66 @@
 """
 Stateless Flask app for Loan Eligibility Prediction
-No authentication, no database, no persistence
-Only real-time ML prediction
+No authentication, no database
+Only real-time ML prediction; decisions are appended to an audit log
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, request, jsonify
 import joblib
 import numpy as np
+import json
+import multiprocessing
 import os
+import time
+
+from preprocessing import LoanPreprocessor, record_from_form
+from page_cache import PageCache, CachedEntry, PAGE_CACHE_CONTROL
+from explain import PathExplainer
+from what_if import what_if
+from counterfactual import CounterfactualSearch, DEFAULT_K, DEFAULT_BUDGET_MS
+from admission import AdmissionController, admission_required, PRIORITY_PREDICT, PRIORITY_PAGE
+from model_registry import ModelRegistry
+from inference_pool import ProcessPoolBackend, DEFAULT_MIN_ROWS
+from audit_log import AuditLog, file_digest
+from drift import DriftMonitor
+from browser_model import LEGACY_BUNDLE_FILE, export_bundle, load_bundle
+from live_scoring import LiveChannels, ChannelLimitError
+from cascade import CascadeModel
+from portfolio import PortfolioSummary, batch_chunks, csv_chunks, score_portfolio, DEFAULT_CHUNK_ROWS, DEFAULT_GROUP_BY
 
 app = Flask(__name__)
 
+# Dashboard pages are rendered once at startup and served precompressed;
+# set PAGE_CACHE=0 to render on every request while editing templates
+page_cache = PageCache(app, enabled=os.environ.get('PAGE_CACHE', '1') != '0')
+
+# Per-worker admission control: predictions are admitted before page renders,
+# and requests still queued at their deadline are shed with a 503
+admission = AdmissionController.from_env()
+PREDICT_DEADLINE_S = float(os.environ.get('ADMISSION_PREDICT_DEADLINE_MS', 2000)) / 1000
+PAGE_DEADLINE_S = float(os.environ.get('ADMISSION_PAGE_DEADLINE_MS', 500)) / 1000
+RETRY_AFTER_S = int(os.environ.get('ADMISSION_RETRY_AFTER_S', 1))
+predict_admission = admission_required(admission, PRIORITY_PREDICT, PREDICT_DEADLINE_S, RETRY_AFTER_S)
+page_admission = admission_required(admission, PRIORITY_PAGE, PAGE_DEADLINE_S, RETRY_AFTER_S)
+
 # Load the trained model and encoders from Models directory
 MODEL_DIR = 'Models'
 try:
     model_path = os.path.join(MODEL_DIR, 'loan_model_real.pkl')
     encoders_path = os.path.join(MODEL_DIR, 'label_encoders_real.pkl')
     features_path = os.path.join(MODEL_DIR, 'feature_names_real.pkl')
+    preprocessor_path = os.path.join(MODEL_DIR, 'preprocessor_real.pkl')
     
     model = joblib.load(model_path)
+    model_version = file_digest(model_path)
     label_encoders = joblib.load(encoders_path)
     feature_names = joblib.load(features_path)
     
+    # Shared preprocessor fitted at training time; older model directories
+    # only have the label encoders, so rebuild an equivalent one from them
+    if os.path.exists(preprocessor_path):
+        preprocessor = joblib.load(preprocessor_path)
+    else:
+        preprocessor = LoanPreprocessor.from_label_encoders(label_encoders, feature_names)
+    
     print("✅ Model loaded successfully!")
     print(f"   Model type: {type(model).__name__}")
     print(f"   Features: {len(feature_names)}")
@@ -28,89 +68,516 @@ except Exception as e:
     print(f"⚠️  Warning: Could not load model: {e}")
     print("   Please run 'python train_new_model.py' first")
     model = None
+    model_version = None
     label_encoders = None
     feature_names = None
+    preprocessor = None
+
+# Models trained into Models/<name>/ are served under /models/<name>/, loaded
+# on first use; MODEL_MEMORY_CAP_MB unloads the least recently used ones.
+# The model above stays resident as "default".
+DEFAULT_MODEL_NAME = 'default'
+registry = ModelRegistry.from_env(MODEL_DIR)
+
+# Incoming features and probabilities are binned against the training-set
+# profile saved next to the model; drift scores are reported in /metrics
+drift_profile_path = os.path.join(MODEL_DIR, 'drift_profile_real.json')
+drift_monitor = None
+if model is not None and os.path.exists(drift_profile_path):
+    drift_monitor = DriftMonitor.from_file(drift_profile_path)
+    if drift_monitor.model_version != model_version:
+        print("⚠️  Drift profile was built for another model version; not used")
+        drift_monitor = None
+
+if model is not None:
+    registry.register_loaded(DEFAULT_MODEL_NAME, model, preprocessor, os.path.getsize(model_path),
+                             version=model_version, drift=drift_monitor)
+
+# Batches of at least INFERENCE_POOL_MIN_ROWS rows are scored by a pool of
+# INFERENCE_POOL_SIZE pre-warmed processes (disabled by default). Spawned pool
+# processes re-import the main module, so only the top-level process starts one.
+INFERENCE_POOL_SIZE = int(os.environ.get('INFERENCE_POOL_SIZE', 0))
+inference_pool = None
+batch_scorer = model
+if model is not None and INFERENCE_POOL_SIZE > 0 and multiprocessing.parent_process() is None:
+    inference_pool = ProcessPoolBackend(
+        model, processes=INFERENCE_POOL_SIZE,
+        min_rows=int(os.environ.get('INFERENCE_POOL_MIN_ROWS', DEFAULT_MIN_ROWS))
+    )
+    batch_scorer = inference_pool
+
+# CASCADE=1 answers confident rows with the distilled surrogate saved by
+# training and sends rows near the decision boundary to the full model
+cascade = None
+predict_scorer = model
+cascade_path = os.path.join(MODEL_DIR, 'cascade_real.pkl')
+if model is not None and os.environ.get('CASCADE', '0') == '1' and os.path.exists(cascade_path):
+    cascade = CascadeModel.from_env(batch_scorer, cascade_path)
+    if cascade.surrogate.model_version != model_version:
+        print("⚠️  Cascade surrogate was distilled from another model version; not used")
+        cascade = None
+    else:
+        predict_scorer = batch_scorer = cascade
+
+# Every decision is queued for a background writer that appends it to
+# rotating NDJSON files in AUDIT_LOG_DIR; AUDIT_LOG=0 turns it off
+audit_log = AuditLog.from_env() if os.environ.get('AUDIT_LOG', '1') != '0' else None
+
+page_cache.render_pages([
+    'dashboard.html',
+    'futuristic_dashboard.html',
+    'futuristic_dashboard_v2.html',
+    'index.html',
+])
 
 @app.route('/')
+@page_admission
 def home():
     """Render the dashboard"""
-    return render_template('dashboard.html')
+    return page_cache.page('dashboard.html')
 
 @app.route('/futuristic')
+@page_admission
 def futuristic():
     """Render the futuristic fintech dashboard"""
-    return render_template('futuristic_dashboard.html')
+    return page_cache.page('futuristic_dashboard.html')
 
 @app.route('/futuristic-v2')
+@page_admission
 def futuristic_v2():
     """Render the new futuristic dashboard with swipe navigation"""
-    return render_template('futuristic_dashboard_v2.html')
+    return page_cache.page('futuristic_dashboard_v2.html')
 
 @app.route('/checker')
+@page_admission
 def checker():
     """Render the loan eligibility checker form"""
-    return render_template('index.html')
+    return page_cache.page('index.html')
+
+def format_prediction(probability):
+    """Turn one predict_proba row into the API result fields"""
+    prediction = int(np.argmax(probability))
+    
+    # Calculate confidence (probability of predicted class)
+    confidence = float(probability[prediction]) * 100
+    
+    return {
+        'prediction': 'Approved' if prediction == 1 else 'Not Approved',
+        'confidence': round(confidence, 2),
+        'probability': round(float(probability[1]), 4)
+    }
+
+# Live form previews: /live/stream opens a Server-Sent Events channel and
+# /live/<session> takes only the fields that changed. Every open stream holds
+# a server thread, so channels are off unless LIVE_MAX_CHANNELS is set (run a
+# threaded worker, e.g. gunicorn --worker-class gthread --threads 8)
+live_channels = None
+if model is not None:
+    live_channels = LiveChannels.from_env(model, preprocessor, format_prediction)
+
+# Built on first explain=true request (tables are sized by the tree count)
+_explainer = None
+
+def get_explainer():
+    global _explainer
+    if _explainer is None:
+        _explainer = PathExplainer(model, preprocessor.feature_names)
+    return _explainer
+
+_counterfactuals = None
+
+def get_counterfactuals():
+    global _counterfactuals
+    if _counterfactuals is None:
+        _counterfactuals = CounterfactualSearch(model, preprocessor)
+    return _counterfactuals
+
+def observe(route, version, drift, feature_names, features, probabilities, start):
+    """Feed the decisions of one request to the drift monitor and the audit log"""
+    if drift is not None:
+        drift.update(features, probabilities)
+    if audit_log is not None:
+        audit_log.record(route, version, feature_names, features, probabilities,
+                         (time.perf_counter() - start) * 1000)
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def model_not_loaded():
+    return jsonify({
+        'error': 'Model not loaded. Please train the model first.',
+        'status': 'error'
+    }), 500
 
 @app.route('/predict', methods=['POST'])
+@predict_admission
 def predict():
-    """Handle prediction requests - stateless, no persistence"""
+    """Handle prediction requests - stateless; the decision is audit-logged"""
+    if model is None:
+        return model_not_loaded()
+    
+    start = time.perf_counter()
+    try:
+        # Encode the form into a feature row with the training-time preprocessor
+        feature_array = preprocessor.transform(record_from_form(request.form))
+        
+        # One model pass: the predicted class is the most probable one
+        probability = predict_scorer.predict_proba(feature_array)[0]
+        
+        result = format_prediction(probability)
+        if is_truthy(request.values.get('explain', '')):
+            result['explanation'] = get_explainer().explain_records(feature_array)[0]
+        if result['prediction'] == 'Not Approved' and is_truthy(request.values.get('suggest', '')):
+            search = get_counterfactuals().search(record_from_form(request.form))
+            result['suggestions'] = search['suggestions']
+        result['status'] = 'success'
+        
+        observe('/predict', model_version, drift_monitor, preprocessor.feature_names, feature_array,
+                probability, start)
+        return jsonify(result)
+        
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/live/stream')
+def live_stream():
+    """Server-Sent Events channel pushing scores for one form session"""
+    if model is None:
+        return model_not_loaded()
+    try:
+        session = live_channels.open()
+    except ChannelLimitError as e:
+        response = jsonify({
+            'error': f'Live scoring unavailable: {e}',
+            'status': 'error'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(RETRY_AFTER_S)
+        return response
+    return Response(live_channels.events(session), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/live/<session_id>', methods=['POST'])
+def live_update(session_id):
+    """
+    Apply the fields that changed to a live session
+    
+    JSON body: {"seq": <client sequence number>, "fields": {form field: value}}.
+    The new score is pushed on the session's stream.
+    """
     if model is None:
+        return model_not_loaded()
+    payload = request.get_json(silent=True) or {}
+    fields = payload.get('fields')
+    seq = payload.get('seq')
+    if not isinstance(fields, dict) or (seq is not None and not isinstance(seq, int)):
         return jsonify({
-            'error': 'Model not loaded. Please train the model first.',
+            'error': 'Expected {"seq": int, "fields": {...}}',
             'status': 'error'
-        }), 500
+        }), 400
+    try:
+        version = live_channels.update(session_id, fields, seq)
+    except KeyError:
+        # Sessions live in the worker that holds the stream
+        return jsonify({
+            'error': 'Unknown or closed live session',
+            'status': 'error'
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    return jsonify({'version': version, 'status': 'success'}), 202
+
+@app.route('/predict/batch', methods=['POST'])
+@predict_admission
+def predict_batch():
+    """
+    Score many applications in one model call
     
+    Accepts JSON with either "applications" (list of records keyed by
+    feature name) or "columns" (feature name -> list of values).
+    Set "explain": true for per-feature contributions.
+    """
+    if model is None:
+        return model_not_loaded()
+    
+    start = time.perf_counter()
     try:
-        # Get form data
-        data = request.form
-        
-        # Create feature dictionary in the correct order
-        features = {
-            'ApplicantIncome': float(data['applicant_income']),
-            'CoapplicantIncome': float(data.get('coapplicant_income', 0)),
-            'LoanAmount': float(data['loan_amount']),
-            'Loan_Amount_Term': float(data['loan_term']),
-            'Credit_History': float(data['credit_history']),
-            'Gender': data['gender'],
-            'Married': data['married'],
-            'Dependents': data['dependents'],
-            'Education': data['education'],
-            'Self_Employed': data['self_employed'],
-            'Property_Area': data['property_area']
-        }
-        
-        # Encode categorical variables
-        categorical_cols = ['Gender', 'Married', 'Dependents', 'Education', 
-                           'Self_Employed', 'Property_Area']
-        
-        for col in categorical_cols:
-            if col in label_encoders:
-                try:
-                    features[col] = label_encoders[col].transform([features[col]])[0]
-                except ValueError:
-                    # Handle unknown category - use first class as default
-                    features[col] = 0
-        
-        # Create feature array in correct order
-        feature_array = np.array([[features[name] for name in feature_names]])
-        
-        # Make prediction
-        prediction = model.predict(feature_array)[0]
-        probability = model.predict_proba(feature_array)[0]
-        
-        # Calculate confidence (probability of predicted class)
-        confidence = probability[1] if prediction == 1 else probability[0]
-        confidence = float(confidence) * 100
-        
-        # Prepare response
-        result = {
-            'prediction': 'Approved' if prediction == 1 else 'Not Approved',
-            'confidence': round(confidence, 2),
+        payload = request.get_json(force=True)
+        batch = payload['columns'] if 'columns' in payload else payload['applications']
+        
+        feature_matrix = preprocessor.transform(batch)
+        probabilities = batch_scorer.predict_proba(feature_matrix)
+        
+        results = [format_prediction(row) for row in probabilities]
+        if is_truthy(payload.get('explain', request.args.get('explain', ''))):
+            for result, explanation in zip(results, get_explainer().explain_records(feature_matrix)):
+                result['explanation'] = explanation
+        
+        observe('/predict/batch', model_version, drift_monitor, preprocessor.feature_names,
+                feature_matrix, probabilities, start)
+        return jsonify({
+            'results': results,
+            'count': len(probabilities),
             'status': 'success'
-        }
+        })
+        
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+# Portfolio summaries are scored this many rows at a time; memory per request
+# is bounded by the chunk, whatever the portfolio size
+PORTFOLIO_CHUNK_ROWS = int(os.environ.get('PORTFOLIO_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+
+@app.route('/portfolio/summary', methods=['POST'])
+@predict_admission
+def portfolio_summary():
+    """
+    Grouped approval statistics for a whole portfolio, not per-row results
+    
+    Body: a CSV file (text/csv, or a multipart upload named "portfolio") or
+    JSON with "applications" / "columns". ?group_by=Property_Area,Income_Band
+    (or "group_by" in the JSON) picks the groups. Portfolios are summaries,
+    not decisions, so they are neither audit-logged nor fed to drift.
+    """
+    if model is None:
+        return model_not_loaded()
+    
+    start = time.perf_counter()
+    try:
+        payload = None
+        if request.mimetype == 'text/csv':
+            chunks = csv_chunks(request.stream, PORTFOLIO_CHUNK_ROWS)
+        elif 'portfolio' in request.files:
+            chunks = csv_chunks(request.files['portfolio'].stream, PORTFOLIO_CHUNK_ROWS)
+        else:
+            payload = request.get_json(force=True)
+            batch = payload['columns'] if 'columns' in payload else payload['applications']
+            chunks = batch_chunks(batch, PORTFOLIO_CHUNK_ROWS)
+        
+        group_by = (payload or {}).get('group_by', request.args.get('group_by'))
+        if group_by is None:
+            group_by = DEFAULT_GROUP_BY
+        elif isinstance(group_by, str):
+            group_by = [name for name in group_by.split(',') if name]
+        summary = PortfolioSummary(preprocessor, group_by)
+        score_portfolio(chunks, preprocessor, batch_scorer, summary)
+        
+        result = summary.summary()
+        result['model_version'] = model_version
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        result['status'] = 'success'
+        return jsonify(result)
+        
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/what-if', methods=['POST'])
+@predict_admission
+def what_if_grid():
+    """
+    Approval probability surface for one applicant over 1-2 swept features
+    
+    JSON body: {"applicant": {feature: value, ...},
+                "sweep": [{"feature": "LoanAmount", "start": 50, "stop": 500, "num": 50},
+                          {"feature": "Loan_Amount_Term", "values": [180, 360]}],
+                "threshold": 0.5}
+    """
+    if model is None:
+        return model_not_loaded()
+    
+    try:
+        payload = request.get_json(force=True)
+        result = what_if(model, preprocessor, payload['applicant'], payload['sweep'],
+                         threshold=float(payload.get('threshold', 0.5)))
+        result['status'] = 'success'
+        return jsonify(result)
+        
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/counterfactual', methods=['POST'])
+@predict_admission
+def counterfactual():
+    """
+    Cheapest realistic changes that would get a rejected applicant approved
+    
+    JSON body: {"applicant": {feature: value, ...}, "k": 3, "budget_ms": 50}
+    """
+    if model is None:
+        return model_not_loaded()
+    
+    try:
+        payload = request.get_json(force=True)
+        result = get_counterfactuals().search(
+            payload['applicant'],
+            k=int(payload.get('k', DEFAULT_K)),
+            budget_ms=min(float(payload.get('budget_ms', DEFAULT_BUDGET_MS)), DEFAULT_BUDGET_MS * 4)
+        )
+        result['status'] = 'success'
+        return jsonify(result)
+        
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/models')
+def list_models():
+    """Servable models and whether they are currently loaded"""
+    return jsonify({
+        'models': registry.snapshot()['models'],
+        'status': 'success'
+    })
+
+def get_registered_model(name):
+    """(entry, None) or (None, error response) for a named model"""
+    try:
+        return registry.get(name), None
+    except KeyError:
+        return None, (jsonify({
+            'error': f"Unknown model '{name}'. Available: {registry.names()}",
+            'status': 'error'
+        }), 404)
+    except Exception as e:
+        return None, (jsonify({
+            'error': f"Could not load model '{name}': {e}",
+            'status': 'error'
+        }), 500)
+
+@app.route('/models/<name>/schema')
+def model_schema(name):
+    """Input fields and category values a named model expects"""
+    entry, error = get_registered_model(name)
+    if error:
+        return error
+    return jsonify({
+        'model': name,
+        'schema': entry.preprocessor.schema(),
+        'status': 'success'
+    })
+
+# Browser bundles are built once per model version and revalidated by ETag.
+# The training-time file carries defaults for fields a form does not ask for;
+# without it the bundle is exported from the loaded model.
+_bundles = {}
+
+def model_bundle_entry(name, entry):
+    key = (name, entry.version)
+    cached = _bundles.get(key)
+    if cached is None:
+        if name == DEFAULT_MODEL_NAME:
+            path = os.path.join(MODEL_DIR, LEGACY_BUNDLE_FILE)
+        else:
+            path = registry.specs[name].bundle_path
+        bundle = load_bundle(path) if os.path.exists(path) else None
+        if bundle is None or bundle['model_version'] != entry.version:
+            bundle = export_bundle(entry.model, entry.preprocessor, version=entry.version)
+        body = json.dumps(bundle, separators=(',', ':')).encode('utf-8')
+        cached = _bundles[key] = CachedEntry(body, 'application/json', PAGE_CACHE_CONTROL)
+    return cached
+
+@app.route('/models/<name>/bundle.json')
+def model_bundle(name):
+    """Trees and encoder vocabularies of a named model, for in-browser previews"""
+    entry, error = get_registered_model(name)
+    if error:
+        return error
+    try:
+        return page_cache.respond(model_bundle_entry(name, entry))
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': f"Model '{name}' cannot be exported for the browser: {e}",
+            'status': 'error'
+        }), 400
+
+@app.route('/models/<name>/predict', methods=['POST'])
+@predict_admission
+def model_predict(name):
+    """
+    Score with a named model, using that model's own input schema
+    
+    JSON body: one record keyed by feature name, {"applications": [...]} or
+    {"columns": {...}}. A form post is read as one record keyed by feature name.
+    """
+    start = time.perf_counter()
+    entry, error = get_registered_model(name)
+    if error:
+        return error
+    
+    route = f'/models/{name}/predict'
+    try:
+        payload = request.get_json(silent=True)
+        if payload is None:
+            payload = request.form.to_dict()
+        
+        if 'applications' in payload or 'columns' in payload:
+            batch = payload['columns'] if 'columns' in payload else payload['applications']
+            features = entry.preprocessor.transform(batch)
+            probabilities = entry.model.predict_proba(features)
+            observe(route, entry.version, entry.drift, entry.preprocessor.feature_names, features,
+                    probabilities, start)
+            return jsonify({
+                'model': name,
+                'results': [format_prediction(row) for row in probabilities],
+                'count': len(probabilities),
+                'status': 'success'
+            })
         
+        features = entry.preprocessor.transform(payload)
+        probability = entry.model.predict_proba(features)[0]
+        result = format_prediction(probability)
+        result['model'] = name
+        result['status'] = 'success'
+        observe(route, entry.version, entry.drift, entry.preprocessor.feature_names, features,
+                probability, start)
         return jsonify(result)
         
+    except KeyError as e:
+        return jsonify({
+            'error': f'Missing field: {e.args[0]}',
+            'status': 'error'
+        }), 400
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -122,7 +589,23 @@ def health():
     """Health check endpoint for monitoring"""
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None
+        'model_loaded': model is not None,
+        'overloaded': admission.overloaded
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Operational counters for this worker process"""
+    return jsonify({
+        'pid': os.getpid(),
+        'admission': admission.snapshot(),
+        'models': registry.snapshot(),
+        'inference_pool': inference_pool.snapshot() if inference_pool else None,
+        'audit_log': audit_log.snapshot() if audit_log else None,
+        'live': live_channels.snapshot() if live_channels else None,
+        'cascade': cascade.snapshot() if cascade else None,
+        'drift': {entry.name: entry.drift.snapshot()
+                  for entry in registry.loaded_entries() if entry.drift is not None}
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,451 @@
+"""
+Buffered, non-blocking audit log of every prediction decision
+Request threads only append a reference to the request's feature matrix and
+probabilities to a bounded in-memory ring buffer. A background writer thread
+drains it in batches, expands each entry into one NDJSON line per decision
+(input features, model version, probability, decision, latency) and appends
+them to size-rotated files, one series per worker process. Only the newest
+max_files audit files of the directory are kept. When the buffer is full the
+overflow policy decides what the request thread does:
+
+    block   wait (up to block_timeout_s) for the writer to make room
+    drop    discard the new record and count it
+    sample  above half full keep only every sample_every-th record; drop at full
+
+Benchmark:
+    python audit_log.py --records 200000 --duration 5 --rounds 3
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+OVERFLOW_POLICIES = ('block', 'drop', 'sample')
+DEFAULT_DIRECTORY = 'audit_logs'
+
+
+def file_digest(path, length=12):
+    """Short sha256 of a file, used as the model version in audit records"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+class AuditLog:
+    """Bounded ring buffer drained to rotating NDJSON files by a writer thread"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, capacity=8192, batch_size=256,
+                 flush_interval_s=1.0, max_file_bytes=64 * 1024 * 1024, overflow='drop',
+                 sample_every=10, block_timeout_s=1.0, fsync=False, max_files=20):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. "
+                             f"Choose from: {', '.join(OVERFLOW_POLICIES)}")
+        if capacity < 1 or sample_every < 1:
+            raise ValueError("capacity and sample_every must be at least 1")
+        self.directory = directory
+        self.capacity = capacity
+        self.batch_size = min(batch_size, capacity)
+        self.flush_interval_s = flush_interval_s
+        self.max_file_bytes = max_file_bytes
+        # 0 keeps every file
+        self.max_files = max_files
+        self.overflow = overflow
+        self.sample_every = sample_every
+        self.block_timeout_s = block_timeout_s
+        self.fsync = fsync
+        # Sampling starts at half full so the buffer keeps room for bursts
+        self._high_water = capacity // 2 if overflow == 'sample' else capacity
+        self._start_lock = threading.Lock()
+        self._pid = None
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.environ.get('AUDIT_LOG_DIR', DEFAULT_DIRECTORY),
+            capacity=int(os.environ.get('AUDIT_LOG_CAPACITY', 8192)),
+            flush_interval_s=float(os.environ.get('AUDIT_LOG_FLUSH_MS', 1000)) / 1000,
+            max_file_bytes=int(float(os.environ.get('AUDIT_LOG_MAX_FILE_MB', 64)) * 1024 * 1024),
+            overflow=os.environ.get('AUDIT_LOG_OVERFLOW', 'drop'),
+            sample_every=int(os.environ.get('AUDIT_LOG_SAMPLE_EVERY', 10)),
+            block_timeout_s=float(os.environ.get('AUDIT_LOG_BLOCK_TIMEOUT_MS', 1000)) / 1000,
+            fsync=os.environ.get('AUDIT_LOG_FSYNC', '0') == '1',
+            max_files=int(os.environ.get('AUDIT_LOG_MAX_FILES', 20)),
+        )
+
+    def _ensure_writer(self):
+        # Started on first use, and again in a forked worker (threads do not
+        # survive a fork, and each process writes its own files)
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._slots = [None] * self.capacity
+            self._head = 0
+            self._size = 0
+            self._lock = threading.Lock()
+            self._not_empty = threading.Condition(self._lock)
+            self._not_full = threading.Condition(self._lock)
+            self._stopping = False
+            self._overflow_seq = 0
+            self.submitted = 0
+            self.dropped = 0
+            self.sampled_out = 0
+            self.blocked = 0
+            self.max_block_ms = 0.0
+            self.written = 0
+            self.batches = 0
+            self.bytes_written = 0
+            self.write_errors = 0
+            self.lost = 0
+            self.last_error = None
+            self.files_removed = 0
+            self._file = None
+            self._file_bytes = 0
+            self._file_seq = 0
+            self.path = None
+            self._record_seq = 0
+            self._templates = {}
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def record(self, route, model_version, feature_names, features, probabilities, latency_ms):
+        """
+        Queue one request's decisions; returns False if the overflow policy
+        discarded them. Arrays are serialized later by the writer, so they
+        must not be modified after the call.
+        """
+        self._ensure_writer()
+        entry = (time.time(), route, model_version, feature_names, features, probabilities,
+                 latency_ms)
+        with self._lock:
+            self.submitted += 1
+            if self._size >= self._high_water and not self._admit_overflow():
+                return False
+            self._slots[(self._head + self._size) % self.capacity] = entry
+            self._size += 1
+            if self._size == self.batch_size:
+                self._not_empty.notify()
+        return True
+
+    def _admit_overflow(self):
+        """Apply the overflow policy with the lock held; True means store the record"""
+        if self.overflow == 'block':
+            start = time.perf_counter()
+            self.blocked += 1
+            self._not_empty.notify()
+            self._not_full.wait_for(lambda: self._size < self.capacity, self.block_timeout_s)
+            self.max_block_ms = max(self.max_block_ms, (time.perf_counter() - start) * 1000)
+            if self._size < self.capacity:
+                return True
+        elif self.overflow == 'sample' and self._size < self.capacity:
+            self._overflow_seq += 1
+            if self._overflow_seq % self.sample_every == 0:
+                return True
+            self.sampled_out += 1
+            return False
+        self.dropped += 1
+        return False
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._size < self.batch_size and not self._stopping:
+                    self._not_empty.wait(self.flush_interval_s)
+                batch = [self._slots[(self._head + i) % self.capacity] for i in range(self._size)]
+                for i in range(self._size):
+                    self._slots[(self._head + i) % self.capacity] = None
+                self._head = (self._head + self._size) % self.capacity
+                self._size = 0
+                self._not_full.notify_all()
+                stopping = self._stopping
+            if batch:
+                self._write(batch)
+            elif stopping:
+                return
+
+    def _features_template(self, feature_names):
+        """'{"name": %r, ...}' for a feature list (float repr is valid JSON)"""
+        key = tuple(feature_names)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = (
+                '{' + ', '.join(f'{json.dumps(name)}: %r' for name in key) + '}')
+        return template
+
+    def _lines(self, batch):
+        # Hand-formatted rather than json.dumps per row: the writer shares the
+        # GIL with request threads, so its cost per decision is kept small
+        pid = self._pid
+        for ts, route, model_version, feature_names, features, probabilities, latency_ms in batch:
+            features = np.atleast_2d(features).tolist()
+            probabilities = np.atleast_2d(probabilities).tolist()
+            template = self._features_template(feature_names)
+            timestamp = datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='milliseconds')
+            common = (f'"ts": "{timestamp}", "route": {json.dumps(route)}, '
+                      f'"model": {json.dumps(model_version)}')
+            tail = f'"latency_ms": {round(latency_ms, 3)!r}, "batch_size": {len(features)}}}\n'
+            for row, (rejected, approved) in zip(features, probabilities):
+                self._record_seq += 1
+                # argmax semantics: a tie is not an approval
+                yield (f'{{"id": "{pid}-{self._record_seq}", {common}, '
+                       f'"features": {template % tuple(row)}, "probability": {approved!r}, '
+                       f'"decision": "{"Approved" if approved > rejected else "Not Approved"}", {tail}')
+
+    def _write(self, batch):
+        try:
+            lines = list(self._lines(batch))
+        except Exception:
+            lines = self._format_each(batch)
+            if not lines:
+                return
+        data = ''.join(lines).encode()
+        try:
+            if self._file is None or (self._file_bytes and
+                                      self._file_bytes + len(data) > self.max_file_bytes):
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            self.write_errors += 1
+            self.lost += len(lines)
+            self.last_error = str(e)
+            return
+        self._file_bytes += len(data)
+        self.written += len(lines)
+        self.batches += 1
+        self.bytes_written += len(data)
+
+    def _format_each(self, batch):
+        """
+        Lines of the entries that can be formatted. A bad record must not stop
+        the writer thread; its decisions are counted as lost instead.
+        """
+        lines = []
+        for entry in batch:
+            try:
+                lines += list(self._lines([entry]))
+            except Exception as e:
+                self.write_errors += 1
+                self.lost += self._decisions(entry)
+                self.last_error = f'{type(e).__name__}: {e}'
+        return lines
+
+    @staticmethod
+    def _decisions(entry):
+        """Number of decisions in a queued entry, 1 if its arrays are unreadable"""
+        try:
+            return len(np.atleast_2d(entry[5]))
+        except Exception:
+            return 1
+
+    def _rotate(self):
+        """Close the current file and start the next one of this process"""
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file_seq += 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        self.path = os.path.join(self.directory,
+                                 f'audit-{stamp}-{self._pid}-{self._file_seq:04d}.ndjson')
+        # Append-only: an existing file of the same name is never truncated
+        self._file = open(self.path, 'ab')
+        self._file_bytes = self._file.tell()
+        if self.max_files:
+            self._remove_old_files()
+
+    def _remove_old_files(self):
+        """Delete the oldest audit files of the directory beyond max_files"""
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.startswith('audit-') and name.endswith('.ndjson')]
+        if len(paths) <= self.max_files:
+            return
+        ages = []
+        for path in paths:
+            try:
+                ages.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        ages.sort()
+        # Other workers' current files were written to recently, so they are
+        # among the newest and kept; this process's own is never removed
+        for _, path in ages[:max(len(ages) - self.max_files, 0)]:
+            if path == self.path:
+                continue
+            try:
+                os.remove(path)
+                self.files_removed += 1
+            except OSError:
+                pass
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far has been written"""
+        if self._pid != os.getpid():
+            return True
+        with self._lock:
+            target = self.submitted - self.dropped - self.sampled_out
+            self._not_empty.notify()
+        deadline = time.monotonic() + timeout
+        while self.written + self.lost < target and time.monotonic() < deadline:
+            with self._lock:
+                self._not_empty.notify()
+            time.sleep(0.005)
+        return self.written + self.lost >= target
+
+    def close(self, timeout=5.0):
+        """Drain the buffer, stop the writer and close the file"""
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify()
+        self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pid = None
+
+    def snapshot(self):
+        config = {
+            'directory': self.directory,
+            'capacity': self.capacity,
+            'overflow': self.overflow,
+            'max_files': self.max_files,
+        }
+        if self._pid != os.getpid():
+            return {**config, 'started': False}
+        with self._lock:
+            return {
+                **config,
+                'started': True,
+                'writer_alive': self._thread.is_alive(),
+                'buffered': self._size,
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'sampled_out': self.sampled_out,
+                'blocked': self.blocked,
+                'max_block_ms': round(self.max_block_ms, 2),
+                'written': self.written,
+                'batches': self.batches,
+                'bytes_written': self.bytes_written,
+                'write_errors': self.write_errors,
+                'lost': self.lost,
+                'last_error': self.last_error,
+                'file': self.path,
+                'files_removed': self.files_removed,
+            }
+
+
+def _percentiles_us(seconds):
+    us = np.asarray(seconds) * 1e6
+    return {p: float(np.percentile(us, p)) for p in (50, 99, 99.9)}
+
+
+def _submit_cost(log, features, probabilities, names, n):
+    """Per-call latencies of record() when producing as fast as possible"""
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        log.record('/predict', 'bench', names, features, probabilities, 1.0)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the request-path overhead of the audit log')
+    parser.add_argument('--records', type=int, default=200000,
+                        help='Records submitted back to back per overflow policy')
+    parser.add_argument('--capacity', type=int, default=8192)
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds of /predict load per run (0 skips the load test)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3, help='Alternating load runs per setting')
+    parser.add_argument('--keep', action='store_true', help='Keep the written files')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='audit_bench_')
+    names = [f'f{i}' for i in range(11)]
+    features = np.random.default_rng(0).random((1, 11))
+    probabilities = np.array([[0.3, 0.7]])
+    try:
+        print("\n" + "="*70)
+        print(f"AUDIT LOG SUBMIT COST ({args.records} records back to back, capacity {args.capacity})")
+        print("="*70)
+        print(f"  {'policy':8s} {'p50':>8s} {'p99':>8s} {'p99.9':>8s}   "
+              f"{'written':>8s} {'dropped':>8s} {'sampled':>8s}  rows/s written")
+        for policy in OVERFLOW_POLICIES:
+            log = AuditLog(os.path.join(directory, policy), capacity=args.capacity,
+                           overflow=policy, flush_interval_s=0.05)
+            start = time.perf_counter()
+            latencies = _submit_cost(log, features, probabilities, names, args.records)
+            log.flush(timeout=60)
+            elapsed = time.perf_counter() - start
+            stats = log.snapshot()
+            log.close()
+            p = _percentiles_us(latencies)
+            print(f"  {policy:8s} {p[50]:>6.1f}µs {p[99]:>6.1f}µs {p[99.9]:>6.0f}µs   "
+                  f"{stats['written']:>8d} {stats['dropped']:>8d} {stats['sampled_out']:>8d}  "
+                  f"{stats['written'] / elapsed:>10.0f}")
+
+        if args.duration <= 0:
+            return
+        import app as service
+        from loadtest import InProcessTarget, load_payloads, parse_mix, run_load
+
+        print("\n" + "="*70)
+        print(f"/predict UNDER LOAD ({args.concurrency} clients, {args.rounds} x {args.duration:.0f}s "
+              f"per setting, in-process)")
+        print("="*70)
+        payloads = load_payloads()
+        target = InProcessTarget(service.app)
+        # Settings alternate each round and the best round counts, so slow
+        # phases of a noisy host do not land on one setting only
+        runs = {'audit off': [], 'audit on': []}
+        written = dropped = 0
+        for _ in range(args.rounds):
+            for label in runs:
+                service.audit_log = (AuditLog(os.path.join(directory, 'load'), capacity=args.capacity)
+                                     if label == 'audit on' else None)
+                runs[label].append(run_load(target, parse_mix('predict:1'), payloads, 'concurrency',
+                                            args.concurrency, args.duration))
+                if service.audit_log is not None:
+                    service.audit_log.flush(timeout=30)
+                    stats = service.audit_log.snapshot()
+                    written += stats['written']
+                    dropped += stats['dropped']
+                    service.audit_log.close()
+        best = {}
+        for label, results in runs.items():
+            best[label] = {
+                'rps': max(r['ok_throughput_rps'] for r in results),
+                'p50': min(r['latency']['p50_ms'] for r in results),
+                'p99': min(r['latency']['p99_ms'] for r in results),
+            }
+            print(f"  {label:10s} {best[label]['rps']:>8.1f} req/s   p50 {best[label]['p50']:.3f} ms"
+                  f"   p99 {best[label]['p99']:.2f} ms")
+        off, on = best['audit off'], best['audit on']
+        print(f"  overhead   {on['p50'] - off['p50']:+.3f} ms p50, {on['rps'] / off['rps'] - 1:+.1%} "
+              f"throughput; {written} decisions written, {dropped} dropped")
+    finally:
+        if args.keep:
+            print(f"\n✓ Audit files kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
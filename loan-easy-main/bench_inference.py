@@ -0,0 +1,374 @@
+"""
+Micro-benchmarks for each stage of the inference path
+Times request parsing, categorical encoding, matrix assembly,
+predict/predict_proba per backend and JSON serialization at several batch
+sizes (with the peak memory each stage allocates), checks that every backend
+returns the same probabilities as sklearn (and, for early_exit, how
+many trees a label needs), and compares the timings against a
+stored baseline.
+
+Usage:
+    python bench_inference.py                          # run and print
+    python bench_inference.py --save-baseline          # store benchmarks/inference_baseline.json
+    python bench_inference.py --check --tolerance 0.3  # exit 1 on parity failure or regression
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+from werkzeug.formparser import FormDataParser
+
+from inference_backends import BACKENDS, make_backend
+from preprocessing import FORM_FIELDS, record_from_form
+
+DATA_FILE = 'synthetic_loan_data.csv'
+BASELINE_FILE = os.path.join('benchmarks', 'inference_baseline.json')
+BATCH_SIZES = (1, 16, 256, 10000)
+PARITY_ROWS = 10000
+
+
+def time_call(func, min_time=0.2, repeats=5):
+    """Best seconds per call over `repeats` runs of an auto-sized loop (as timeit)"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats or loops >= 10 ** 6:
+            break
+        loops = max(loops * 2, int(loops * (min_time / repeats) / max(elapsed, 1e-9)))
+    times = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - start) / loops)
+    # The minimum is the least noisy estimate; slower runs measure interference
+    return min(times)
+
+
+def peak_bytes(func):
+    """Peak memory traced (Python and numpy allocations) during one call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_records(path=DATA_FILE, n=PARITY_ROWS, seed=42):
+    """Applicant records (feature-name keyed), repeated if the file is short"""
+    df = pd.read_csv(path).drop(columns=['Loan_Status'], errors='ignore')
+    df = df.sample(frac=1.0, random_state=seed)
+    records = df.to_dict('records')
+    return (records * (n // len(records) + 1))[:n]
+
+
+def build_cases(flask_app, format_prediction, preprocessor, backends, records, n):
+    """(stage, backend, callable) for one batch size, mirroring app.predict*"""
+    batch = records[0] if n == 1 else records[:n]
+    columns = preprocessor.encode_columns(batch)
+    matrix = preprocessor.assemble(columns)
+    proba = backends[0].predict_proba(matrix)
+
+    if n == 1:
+        # /predict: urlencoded form body -> form dict -> feature record
+        form = {field: batch[feature] for field, feature in FORM_FIELDS.items()}
+        body = urlencode(form).encode()
+        parser = FormDataParser()
+
+        def parse():
+            _, parsed, _ = parser.parse(io.BytesIO(body), 'application/x-www-form-urlencoded',
+                                        len(body))
+            return record_from_form(parsed)
+
+        def serialize():
+            result = format_prediction(proba[0])
+            result['status'] = 'success'
+            return flask_app.json.dumps(result)
+    else:
+        # /predict/batch: JSON body of records
+        body = json.dumps({'applications': batch}, default=float)
+
+        def parse():
+            return json.loads(body)['applications']
+
+        def serialize():
+            return flask_app.json.dumps({
+                'results': [format_prediction(row) for row in proba],
+                'count': len(proba),
+                'status': 'success'
+            })
+
+    cases = [
+        ('parse', None, parse),
+        ('encode', None, lambda: preprocessor.encode_columns(batch)),
+        ('array', None, lambda: preprocessor.assemble(columns)),
+    ]
+    for backend in backends:
+        cases.append(('predict_proba', backend.name, lambda b=backend: b.predict_proba(matrix)))
+        cases.append(('predict', backend.name, lambda b=backend: b.predict(matrix)))
+    cases.append(('serialize', None, serialize))
+    return cases
+
+
+def case_key(stage, backend, n):
+    return f"{stage}[{backend}]@{n}" if backend else f"{stage}@{n}"
+
+
+def run_benchmarks(flask_app, format_prediction, preprocessor, backends, records,
+                   sizes=BATCH_SIZES, min_time=0.2, repeats=5):
+    """Time every case; returns (results, case callables by key)"""
+    results = {}
+    cases = {}
+    for n in sizes:
+        for stage, backend, func in build_cases(flask_app, format_prediction, preprocessor,
+                                                backends, records, n):
+            cases[case_key(stage, backend, n)] = func
+            seconds = time_call(func, min_time, repeats)
+            peak = peak_bytes(func)
+            results[case_key(stage, backend, n)] = {
+                'stage': stage,
+                'backend': backend,
+                'batch_size': n,
+                'best_us': round(seconds * 1e6, 3),
+                'per_row_us': round(seconds * 1e6 / n, 4),
+                'peak_bytes': peak,
+            }
+            print(f"  {case_key(stage, backend, n):32s} {seconds * 1e6:>12.1f} µs"
+                  f"  ({seconds * 1e6 / n:.3f} µs/row)  peak {peak / 1024:>9.1f} KiB")
+    return results, cases
+
+
+def check_parity(backends, matrix, atol=1e-12):
+    """Max |p - p_sklearn| and label agreement of every backend"""
+    reference = backends[0]
+    ref_proba = reference.predict_proba(matrix)
+    ref_labels = reference.predict(matrix)
+    report = {}
+    for backend in backends[1:]:
+        diff = float(np.abs(backend.predict_proba(matrix) - ref_proba).max())
+        labels_match = bool(np.array_equal(backend.predict(matrix), ref_labels))
+        report[backend.name] = {
+            'max_abs_diff': diff,
+            'labels_match': labels_match,
+            'ok': diff <= atol and labels_match,
+        }
+    return report
+
+
+def reference_models(n=5000, seed=0):
+    """
+    (name, model, X) of small ensembles on low-cardinality features
+
+    Every feature has fewer than 256 thresholds, so the binned backend codes
+    are uint8 and several features share one mixed-radix lookup table: the
+    case the deployed model (uint16 codes) does not exercise.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.integers(0, k, n) for k in (12, 16, 20, 24, 30)]).astype(np.float64)
+    y = (X.sum(axis=1) / X.max(axis=0).sum() + rng.normal(0, 0.1, n) > 0.5).astype(int)
+    models = [('rf20_d6', RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0)),
+              ('gb50_d4', GradientBoostingClassifier(n_estimators=50, max_depth=4, random_state=1))]
+    return [(name, model.fit(X, y), X) for name, model in models]
+
+
+def check_reference_parity(names, atol=1e-12):
+    """check_parity of every backend on the reference_models"""
+    report = {}
+    for model_name, model, X in reference_models():
+        backends = [make_backend(name, model) for name in names]
+        for backend_name, entry in check_parity(backends, X, atol).items():
+            report[f'{backend_name}[{model_name}]'] = entry
+    return report
+
+
+def early_exit_report(backend, backends, matrix, timed_rows=1000):
+    """
+    Trees the early-exit decision evaluates per row, its label agreement, and
+    single-row predict time averaged over many rows (exit points vary by row)
+    """
+    labels, used = backend.decide(matrix)
+    n_trees = len(backend.trees)
+    rows = [matrix[i:i + 1] for i in range(min(timed_rows, len(matrix)))]
+    single_row_us = {}
+    for other in backends:
+        start = time.perf_counter()
+        for row in rows:
+            other.predict(row)
+        single_row_us[other.name] = round((time.perf_counter() - start) / len(rows) * 1e6, 3)
+    return {
+        'rows': len(matrix),
+        'trees': n_trees,
+        'average_trees': round(float(used.mean()), 3),
+        'median_trees': int(np.median(used)),
+        'all_trees_rows': int(np.sum(used == n_trees)),
+        'labels_match': bool(np.array_equal(backend.classes_[labels], backends[0].predict(matrix))),
+        'single_row_us': single_row_us,
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_us=2.0):
+    """Cases slower than baseline * (1 + tolerance) by more than min_delta_us"""
+    regressions = []
+    for key, entry in results.items():
+        if key not in baseline['results']:
+            continue
+        before = baseline['results'][key]['best_us']
+        now = entry['best_us']
+        if now > before * (1 + tolerance) and now - before > min_delta_us:
+            regressions.append((key, before, now))
+    return regressions
+
+
+def confirm_regressions(regressions, results, baseline, cases, tolerance, min_delta_us,
+                        rounds=3, min_time=0.2, repeats=5):
+    """Re-time flagged cases; only slowdowns that persist every round count"""
+    for _ in range(rounds):
+        if not regressions:
+            break
+        for key, _, _ in regressions:
+            seconds = time_call(cases[key], min_time, repeats)
+            entry = results[key]
+            entry['best_us'] = min(entry['best_us'], round(seconds * 1e6, 3))
+            entry['per_row_us'] = round(entry['best_us'] / entry['batch_size'], 4)
+        flagged = {key for key, _, _ in regressions}
+        regressions = compare_to_baseline({k: results[k] for k in flagged}, baseline,
+                                          tolerance, min_delta_us)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark each stage of the inference path')
+    parser.add_argument('--sizes', default=','.join(map(str, BATCH_SIZES)),
+                        help='Comma-separated batch sizes')
+    parser.add_argument('--backends', default=','.join(BACKENDS),
+                        help='Comma-separated backends (sklearn is always the reference)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per case')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Fail on regressions vs the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Allowed slowdown as a fraction of the baseline (default 0.3)')
+    parser.add_argument('--min-delta-us', type=float, default=2.0,
+                        help='Ignore slowdowns smaller than this many µs (timer noise)')
+    parser.add_argument('--confirm', type=int, default=3,
+                        help='Re-time flagged cases this many rounds before failing')
+    parser.add_argument('--parity-atol', type=float, default=1e-12)
+    parser.add_argument('--output', help='Also write this run as JSON')
+    args = parser.parse_args(argv)
+
+    # The model was fitted on a DataFrame; every backend receives plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    from app import app as flask_app, model, preprocessor, format_prediction
+    if model is None:
+        print("❌ Model not loaded - train it first (python train_new_model.py)")
+        return 1
+
+    names = ['sklearn'] + [b for b in args.backends.split(',') if b and b != 'sklearn']
+    backends = [make_backend(name, model) for name in names]
+    sizes = [int(n) for n in args.sizes.split(',')]
+    records = load_records(args.data, max(max(sizes), PARITY_ROWS))
+
+    print("\n" + "="*70)
+    print("PARITY CHECK")
+    print("="*70)
+    parity = check_parity(backends, preprocessor.transform(records[:PARITY_ROWS]), args.parity_atol)
+    # Small uint8-coded models as well as the deployed one
+    parity.update(check_reference_parity(names, args.parity_atol))
+    for name, entry in parity.items():
+        mark = '✓' if entry['ok'] else '❌'
+        print(f"  {mark} {name:20s} max |Δp| = {entry['max_abs_diff']:.3g}, "
+              f"labels match: {entry['labels_match']}")
+
+    print("\n" + "="*70)
+    print("STAGE TIMINGS (best per call)")
+    print("="*70)
+    results, cases = run_benchmarks(flask_app, format_prediction, preprocessor, backends,
+                                    records, sizes, args.min_time, args.repeats)
+
+    failed = not all(entry['ok'] for entry in parity.values())
+
+    report = None
+    early_exit = [backend for backend in backends if backend.name == 'early_exit']
+    if early_exit:
+        report = early_exit_report(early_exit[0], backends,
+                                   preprocessor.transform(records[:PARITY_ROWS]))
+        print("\n" + "="*70)
+        print(f"EARLY EXIT ({report['rows']} rows, {report['trees']} trees)")
+        print("="*70)
+        print(f"  Trees evaluated: {report['average_trees']:.1f} avg, {report['median_trees']} median, "
+              f"{report['all_trees_rows']} rows needed all")
+        print(f"  {'✓' if report['labels_match'] else '❌'} labels match sklearn: {report['labels_match']}")
+        ours = report['single_row_us']['early_exit']
+        for name, us in report['single_row_us'].items():
+            print(f"  single-row predict[{name}]{'':{12 - len(name)}} {us:>8.1f} µs  ({us / ours:.2f}x)")
+        failed = failed or not report['labels_match']
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\n❌ No baseline at {args.baseline} (run with --save-baseline)")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_delta_us)
+        regressions = confirm_regressions(regressions, results, baseline, cases, args.tolerance,
+                                          args.min_delta_us, args.confirm, args.min_time,
+                                          args.repeats)
+        print(f"\nBaseline {baseline.get('commit')} ({baseline.get('timestamp')}), "
+              f"tolerance {args.tolerance:.0%}:")
+        for key, before, now in regressions:
+            print(f"  ❌ {key:32s} {before:>10.1f} → {now:>10.1f} µs ({now / before - 1:+.0%})")
+        if not regressions:
+            print("  ✓ No stage regressed")
+        failed = failed or bool(regressions)
+
+    run = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count()},
+        'parity': parity,
+        'results': results,
+    }
+    if report is not None:
+        run['early_exit'] = report
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
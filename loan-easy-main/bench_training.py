@@ -0,0 +1,363 @@
+"""
+Training scalability benchmarks across data sizes and n_jobs settings
+Generates synthetic datasets of each size (cached as CSV), then runs the
+training pipeline stage by stage: load the CSV, fit the preprocessor and
+encode, fit each candidate, cross-validate each candidate, and export the
+best one's artifacts (model, preprocessor, drift profile, browser bundle).
+Every stage records wall time, CPU time (this process plus reaped joblib
+workers) and peak RSS of the process tree. Results are printed as tables
+with each stage's scaling exponent, plotted when matplotlib is installed,
+and can be stored and checked against a baseline.
+
+Usage:
+    python bench_training.py                                   # 10k and 100k rows, n_jobs 1 and -1
+    python bench_training.py --sizes 10000,100000,1000000,10000000 --stages load,encode,fit
+    python bench_training.py --save-baseline                   # store benchmarks/training_baseline.json
+    python bench_training.py --check --tolerance 0.3           # exit 1 on regressions vs the baseline
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from model_benchmark import PeakRSSSampler, process_tree_rss
+
+DATA_DIR = os.path.join('benchmarks', 'data')
+BASELINE_FILE = os.path.join('benchmarks', 'training_baseline.json')
+PLOT_FILE = os.path.join('benchmarks', 'training_scaling.png')
+SIZES = (10000, 100000)
+N_JOBS = (1, -1)
+STAGES = ('load', 'encode', 'fit', 'cv', 'export')
+CV_FOLDS = 5
+# Rows generated per call, so 10M-row datasets never sit in memory at once
+GENERATE_CHUNK_ROWS = 1000000
+
+
+def dataset_path(n_rows, data_dir=DATA_DIR, seed=42):
+    """CSV with n_rows synthetic applications, generated on first use"""
+    from generate_synthetic_data import generate_synthetic_loan_data
+
+    path = os.path.join(data_dir, f'loan_data_{n_rows}_seed{seed}.csv')
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    np.random.seed(seed)
+    partial = path + '.partial'
+    with open(partial, 'w', newline='') as f:
+        for start in range(0, n_rows, GENERATE_CHUNK_ROWS):
+            chunk = generate_synthetic_loan_data(min(GENERATE_CHUNK_ROWS, n_rows - start),
+                                                 verbose=False)
+            chunk.to_csv(f, index=False, header=start == 0)
+    os.replace(partial, path)
+    return path
+
+
+def _cpu_seconds():
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (self_usage.ru_utime + self_usage.ru_stime +
+            children.ru_utime + children.ru_stime)
+
+
+def _reap_workers():
+    # Workers are only counted in RUSAGE_CHILDREN once they exit and are
+    # reaped, so each stage shuts joblib's process pool down
+    from joblib.externals.loky import reusable_executor
+    executor = reusable_executor._executor
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def measure_stage(func):
+    """(result, {wall_s, cpu_s, peak_rss_bytes, rss_delta_bytes}) of one call"""
+    cpu_start = _cpu_seconds()
+    with PeakRSSSampler(rss=process_tree_rss) as sampler:
+        start = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - start
+        _reap_workers()
+    return result, {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(_cpu_seconds() - cpu_start, 4),
+        'peak_rss_bytes': sampler.peak,
+        'rss_delta_bytes': sampler.peak_delta,
+    }
+
+
+def run_pipeline(path, n_jobs, stages=STAGES, candidates=None, cv_folds=CV_FOLDS, log=print):
+    """Run and measure the selected training stages on one dataset"""
+    import joblib
+    import pandas as pd
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import cross_val_score, train_test_split
+    from browser_model import export_bundle, save_bundle
+    from drift import build_profile, save_profile
+    from preprocessing import LoanPreprocessor, NUMERIC_COLS, CATEGORICAL_COLS
+    from train_new_model import candidate_models
+
+    measurements = {}
+
+    def stage(name, func):
+        result, measurement = measure_stage(func)
+        measurements[name] = measurement
+        log(f"    {name:28s} wall {measurement['wall_s']:>9.3f} s  cpu {measurement['cpu_s']:>9.3f} s"
+            f"  peak RSS {measurement['peak_rss_bytes'] / 2**20:>8.1f} MiB")
+        return result
+
+    # Later stages need the data even when its own stages are not selected
+    df = stage('load', lambda: pd.read_csv(path)) if 'load' in stages else pd.read_csv(path)
+
+    def encode():
+        preprocessor = LoanPreprocessor(NUMERIC_COLS, CATEGORICAL_COLS).fit(df)
+        X = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.feature_names)
+        y = df['Loan_Status'].map({'Y': 1, 'N': 0})
+        return (preprocessor,) + tuple(train_test_split(X, y, test_size=0.2, random_state=42,
+                                                        stratify=y))
+
+    preprocessor, X_train, X_test, y_train, y_test = (
+        stage('encode', encode) if 'encode' in stages else encode())
+    del df
+
+    models = {name: model for name, model in candidate_models(n_jobs).items()
+              if candidates is None or name in candidates}
+    accuracy = {}
+    for name, model in models.items():
+        if 'fit' in stages or 'export' in stages:
+            if 'fit' in stages:
+                stage(f'fit[{name}]', lambda: model.fit(X_train, y_train))
+            else:
+                model.fit(X_train, y_train)
+            accuracy[name] = accuracy_score(y_test, model.predict(X_test))
+        if 'cv' in stages:
+            # Clones of the candidate, so CV runs whether or not it was fitted
+            stage(f'cv[{name}]', lambda: cross_val_score(model, X_train, y_train, cv=cv_folds,
+                                                         n_jobs=n_jobs))
+
+    if 'export' in stages and models:
+        best = models[max(accuracy, key=accuracy.get)]
+
+        def export():
+            output_dir = tempfile.mkdtemp(prefix='bench_training_')
+            try:
+                joblib.dump(best, os.path.join(output_dir, 'loan_model_real.pkl'))
+                joblib.dump(preprocessor, os.path.join(output_dir, 'preprocessor_real.pkl'))
+                save_profile(build_profile(best, X_train),
+                             os.path.join(output_dir, 'drift_profile_real.json'))
+                save_bundle(export_bundle(best, preprocessor, X_train),
+                            os.path.join(output_dir, 'model_bundle_real.json'))
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+        stage('export', export)
+    return measurements
+
+
+def result_key(stage, rows, n_jobs):
+    return f"{stage}@{rows}/j{n_jobs}"
+
+
+def scaling_exponents(results, n_jobs):
+    """Slope of log(wall time) against log(rows) per stage: time ~ rows^k"""
+    by_stage = {}
+    for entry in results.values():
+        if entry['n_jobs'] == n_jobs and entry['wall_s'] > 0:
+            by_stage.setdefault(entry['stage'], []).append((entry['rows'], entry['wall_s']))
+    exponents = {}
+    for stage, points in by_stage.items():
+        if len({rows for rows, _ in points}) >= 2:
+            rows, wall = np.log(np.array(sorted(points))).T
+            exponents[stage] = float(np.polyfit(rows, wall, 1)[0])
+    return exponents
+
+
+def format_table(results, sizes, n_jobs, metric, scale=1.0):
+    stages = list(dict.fromkeys(entry['stage'] for entry in results.values()))
+    lines = [f"  {'stage':28s}" + ''.join(f"{n:>14,}" for n in sizes)]
+    for stage in stages:
+        cells = []
+        for n in sizes:
+            entry = results.get(result_key(stage, n, n_jobs))
+            cells.append(f"{entry[metric] * scale:>14.2f}" if entry else f"{'-':>14}")
+        lines.append(f"  {stage:28s}" + ''.join(cells))
+    return '\n'.join(lines)
+
+
+def plot_scaling(results, sizes, n_jobs_settings, path=PLOT_FILE):
+    """Wall time and peak RSS against rows per stage, and n_jobs speedup; None without matplotlib"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return None
+
+    stages = list(dict.fromkeys(entry['stage'] for entry in results.values()))
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5.5))
+    base_jobs = n_jobs_settings[0]
+    for stage in stages:
+        points = [(n, results[result_key(stage, n, base_jobs)]) for n in sizes
+                  if result_key(stage, n, base_jobs) in results]
+        if not points:
+            continue
+        rows = [n for n, _ in points]
+        axes[0].plot(rows, [entry['wall_s'] for _, entry in points], marker='o', label=stage)
+        axes[1].plot(rows, [entry['peak_rss_bytes'] / 2**20 for _, entry in points], marker='o',
+                     label=stage)
+        largest = rows[-1]
+        base = results[result_key(stage, largest, base_jobs)]['wall_s']
+        speedups = [(str(j), base / results[result_key(stage, largest, j)]['wall_s'])
+                    for j in n_jobs_settings if result_key(stage, largest, j) in results]
+        axes[2].plot([j for j, _ in speedups], [s for _, s in speedups], marker='o', label=stage)
+
+    axes[0].set(xscale='log', yscale='log', xlabel='Rows', ylabel='Wall time (s)',
+                title=f'Wall time (n_jobs={base_jobs})')
+    axes[1].set(xscale='log', xlabel='Rows', ylabel='Peak RSS (MiB)',
+                title=f'Peak RSS of the process tree (n_jobs={base_jobs})')
+    axes[2].set(xlabel='n_jobs', ylabel=f'Speedup over n_jobs={base_jobs}',
+                title=f'Speedup at {sizes[-1]:,} rows')
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+    axes[0].legend(fontsize=8)
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    plt.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_s=0.05):
+    """Stages slower (wall time) or larger (peak RSS) than the baseline by more than tolerance"""
+    regressions = []
+    for key, entry in results.items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        if (entry['wall_s'] > before['wall_s'] * (1 + tolerance) and
+                entry['wall_s'] - before['wall_s'] > min_delta_s):
+            regressions.append((key, 'wall_s', before['wall_s'], entry['wall_s']))
+        if entry['peak_rss_bytes'] > before['peak_rss_bytes'] * (1 + tolerance):
+            regressions.append((key, 'peak_rss_bytes', before['peak_rss_bytes'],
+                                entry['peak_rss_bytes']))
+    return regressions
+
+
+def main(argv=None):
+    import warnings
+    from bench_inference import git_commit
+
+    parser = argparse.ArgumentParser(description='Training pipeline scaling across data sizes and n_jobs')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='Dataset sizes in rows (e.g. 10000,100000,1000000,10000000)')
+    parser.add_argument('--n-jobs', default=','.join(map(str, N_JOBS)),
+                        help='n_jobs settings for forest fitting and cross-validation')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--candidates', help='Comma-separated candidate names (default: all)')
+    parser.add_argument('--cv-folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Cache of generated datasets')
+    parser.add_argument('--plot', default=PLOT_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Fail on regressions vs the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Allowed slowdown / memory growth before a stage counts as regressed')
+    parser.add_argument('--output', help='Also write this run as JSON')
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(n) for n in args.sizes.split(','))
+    n_jobs_settings = [int(j) for j in args.n_jobs.split(',')]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"❌ Unknown stage(s): {sorted(unknown)}. Expected {list(STAGES)}")
+        return 1
+    candidates = args.candidates.split(',') if args.candidates else None
+    # Small sizes fit few trees per joblib task; keep the log readable
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    results = {}
+    for n in sizes:
+        print("\n" + "="*70)
+        print(f"DATASET: {n:,} ROWS")
+        print("="*70)
+        start = time.perf_counter()
+        path = dataset_path(n, args.data_dir)
+        print(f"  {path} ({os.path.getsize(path) / 2**20:.1f} MiB, ready in "
+              f"{time.perf_counter() - start:.1f} s)")
+        for n_jobs in n_jobs_settings:
+            print(f"\n  n_jobs={n_jobs}")
+            for stage, measurement in run_pipeline(path, n_jobs, stages, candidates,
+                                                   args.cv_folds).items():
+                results[result_key(stage, n, n_jobs)] = dict(
+                    stage=stage, rows=n, n_jobs=n_jobs, **measurement)
+
+    for n_jobs in n_jobs_settings:
+        print("\n" + "="*70)
+        print(f"SCALING (n_jobs={n_jobs})")
+        print("="*70)
+        print("  Wall time (s)")
+        print(format_table(results, sizes, n_jobs, 'wall_s'))
+        print("\n  CPU time (s)")
+        print(format_table(results, sizes, n_jobs, 'cpu_s'))
+        print("\n  Peak RSS (MiB)")
+        print(format_table(results, sizes, n_jobs, 'peak_rss_bytes', 1 / 2**20))
+        exponents = scaling_exponents(results, n_jobs)
+        if exponents:
+            print("\n  Wall time ~ rows^k")
+            for stage, k in exponents.items():
+                print(f"    {stage:28s} k = {k:.2f}")
+
+    path = plot_scaling(results, sizes, n_jobs_settings, args.plot)
+    if path:
+        print(f"\n✓ Scaling plots saved to {path}")
+    else:
+        print("\n⚠️  matplotlib not installed; no plots")
+
+    run = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count()},
+        'sizes': sizes,
+        'n_jobs': n_jobs_settings,
+        'results': results,
+    }
+
+    failed = False
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\n❌ No baseline at {args.baseline} (run with --save-baseline)")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        print(f"\nBaseline {baseline.get('commit')} ({baseline.get('timestamp')}), "
+              f"tolerance {args.tolerance:.0%}:")
+        for key, metric, before, now in regressions:
+            print(f"  ❌ {key:36s} {metric}: {before:,.3f} → {now:,.3f} ({now / before - 1:+.0%})")
+        if not regressions:
+            print("  ✓ No stage regressed")
+        failed = bool(regressions)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
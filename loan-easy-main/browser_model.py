@@ -0,0 +1,273 @@
+"""
+Export a fitted tree model for in-browser scoring
+The bundle is one JSON document: the encoder vocabularies, typical values for
+fields a form does not ask for, and every tree as flat typed arrays
+(base64-encoded, little-endian). static/js/loan_model.js evaluates it the way
+sklearn does (inputs rounded to float32, `x <= threshold`, tree outputs summed
+in order from the init score), so dashboard previews match the server without
+a request per keystroke; /predict stays the authoritative decision.
+
+Usage:
+    python browser_model.py --source Models            # writes Models/model_bundle_real.json
+    python browser_model.py --source Models/real       # writes Models/real/model_bundle.json
+    python browser_model.py --source Models --check    # compare the JS evaluator (node) with sklearn
+"""
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from preprocessing import FORM_FIELDS
+from tree_utils import ensemble_trees, init_log_odds, node_values
+
+BUNDLE_VERSION = 1
+EVALUATOR_PATH = os.path.join('static', 'js', 'loan_model.js')
+# Bundle of the model app.py serves as "default" (Models/*_real.pkl)
+LEGACY_BUNDLE_FILE = 'model_bundle_real.json'
+
+
+def _encode_array(values, dtype):
+    return base64.b64encode(np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+                            .tobytes()).decode('ascii')
+
+
+def _decode_array(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=np.dtype(dtype).newbyteorder('<'))
+
+
+def flatten_trees(model):
+    """
+    Concatenated node arrays of every tree in the ensemble
+
+    Leaf nodes have left == right == -1 and hold their scaled output in
+    `threshold`, so a walk ends by adding threshold[leaf] to the score.
+    """
+    trees, scale, output_space = ensemble_trees(model)
+    roots, features, thresholds, lefts, rights = [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left == -1
+        roots.append(offset)
+        features.append(np.where(leaf, -1, t.feature))
+        thresholds.append(np.where(leaf, scale * node_values(tree, output_space), t.threshold))
+        lefts.append(np.where(leaf, -1, t.children_left + offset))
+        rights.append(np.where(leaf, -1, t.children_right + offset))
+        offset += t.node_count
+    return {
+        'n_trees': len(trees),
+        'n_nodes': offset,
+        'roots': _encode_array(roots, np.int32),
+        'feature': _encode_array(np.concatenate(features), np.int16),
+        'threshold': _encode_array(np.concatenate(thresholds), np.float64),
+        'left': _encode_array(np.concatenate(lefts), np.int32),
+        'right': _encode_array(np.concatenate(rights), np.int32),
+    }
+
+
+def input_defaults(preprocessor, X):
+    """Median of each numeric input and most frequent category, from an encoded matrix"""
+    X = np.asarray(X, dtype=np.float64)
+    index = {name: j for j, name in enumerate(preprocessor.feature_names)}
+    defaults = {}
+    for col in preprocessor.numeric_cols:
+        defaults[col] = float(np.median(X[:, index[col]]))
+    for col in preprocessor.categorical_cols:
+        codes = X[:, index[col]].astype(np.int64)
+        defaults[col] = str(preprocessor.classes_[col][np.bincount(codes).argmax()])
+    return defaults
+
+
+def export_bundle(model, preprocessor, X_reference=None, version=None):
+    """JSON-ready bundle of the model and its encoder; X_reference supplies field defaults"""
+    _, _, output_space = ensemble_trees(model)
+    n_features = len(preprocessor.feature_names)
+    if output_space == 'log_odds':
+        init = init_log_odds(model, np.zeros((1, n_features)))
+        if not isinstance(model.init_, str) and not np.all(
+                init_log_odds(model, np.ones((1, n_features))) == init):
+            raise ValueError("Only constant ('prior' or 'zero') init estimators can be exported")
+        init = float(init[0])
+        logit_scale = 2.0 if getattr(model, 'loss', None) == 'exponential' else 1.0
+    else:
+        init, logit_scale = 0.0, 1.0
+
+    defaults = input_defaults(preprocessor, X_reference) if X_reference is not None else {}
+    # Fields the server fills in when missing must preview the same way
+    defaults.update(preprocessor.defaults)
+    schema = preprocessor.schema()
+    return {
+        'version': BUNDLE_VERSION,
+        'model_version': version,
+        'model_type': type(model).__name__,
+        'output_space': output_space,
+        'init': init,
+        'logit_scale': logit_scale,
+        'features': schema['features'],
+        'numeric': schema['numeric'],
+        'categorical': schema['categorical'],
+        'derived': schema['derived'],
+        'defaults': defaults,
+        'form_fields': {feature: field for field, feature in FORM_FIELDS.items()
+                        if feature in preprocessor.input_fields},
+        'trees': flatten_trees(model),
+    }
+
+
+def save_bundle(bundle, path):
+    with open(path, 'w') as f:
+        json.dump(bundle, f, separators=(',', ':'))
+    return path
+
+
+def load_bundle(path):
+    with open(path) as f:
+        bundle = json.load(f)
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported model bundle version: {bundle.get('version')}")
+    return bundle
+
+
+# Scores records with static/js/loan_model.js; argv: evaluator, bundle, records
+NODE_HARNESS = """
+const fs = require('fs');
+const LoanModel = require(process.argv[2]);
+const model = new LoanModel(JSON.parse(fs.readFileSync(process.argv[3], 'utf8')));
+const records = JSON.parse(fs.readFileSync(process.argv[4], 'utf8'));
+const raw = records.map(r => model.rawScore(model.encode(r)));
+const probabilities = records.map(r => model.predictProba(r));
+const start = process.hrtime.bigint();
+let rounds = 0;
+do {
+    for (const r of records) model.predictProba(r);
+    rounds++;
+} while (process.hrtime.bigint() - start < 200000000n);
+const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+process.stdout.write(JSON.stringify({
+    raw, probabilities, us_per_record: seconds / (rounds * records.length) * 1e6
+}));
+"""
+
+
+def run_node(bundle, records, evaluator=EVALUATOR_PATH, node='node'):
+    """Score records with the JS evaluator under node"""
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = save_bundle(bundle, os.path.join(tmp, 'bundle.json'))
+        records_path = os.path.join(tmp, 'records.json')
+        with open(records_path, 'w') as f:
+            json.dump(records, f)
+        harness_path = os.path.join(tmp, 'harness.js')
+        with open(harness_path, 'w') as f:
+            f.write(NODE_HARNESS)
+        output = subprocess.run([node, harness_path, os.path.abspath(evaluator), bundle_path,
+                                 records_path], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def parity_records(preprocessor, bundle, df, n_rows, seed=0):
+    """Data rows, half of them with a numeric input moved onto a split threshold"""
+    rng = np.random.default_rng(seed)
+    columns = preprocessor.input_fields
+    sample = df.iloc[rng.integers(0, len(df), n_rows)][columns]
+    records = [{col: (str(value).strip() if col in preprocessor.categorical_cols else float(value))
+                for col, value in row.items()} for _, row in sample.iterrows()]
+
+    trees = bundle['trees']
+    feature = _decode_array(trees['feature'], np.int16)
+    threshold = _decode_array(trees['threshold'], np.float64)
+    names = preprocessor.feature_names
+    splits = {col: threshold[feature == names.index(col)] for col in preprocessor.numeric_cols}
+    splits = {col: values for col, values in splits.items() if len(values)}
+    for record in records[::2]:
+        if not splits:
+            break
+        col = list(splits)[rng.integers(len(splits))]
+        # Exactly on the float32 boundary the model sees
+        record[col] = float(np.float32(rng.choice(splits[col])))
+    return records
+
+
+def check_parity(model, preprocessor, bundle, records, evaluator=EVALUATOR_PATH, node='node'):
+    """Compare the JS evaluator's output with sklearn's on the same raw records"""
+    X = preprocessor.transform(records)
+    expected = model.predict_proba(X)[:, 1]
+    result = run_node(bundle, records, evaluator, node)
+    probabilities = np.asarray(result['probabilities'])
+    report = {
+        'rows': len(records),
+        'max_abs_diff': float(np.max(np.abs(probabilities - expected))),
+        'label_mismatches': int(np.sum((probabilities > 0.5) != (expected > 0.5))),
+        'js_us_per_record': result['us_per_record'],
+    }
+    if bundle['output_space'] == 'log_odds':
+        raw = np.asarray(result['raw'])
+        report['raw_identical'] = bool(np.array_equal(raw, model.decision_function(X)))
+    return report
+
+
+def main(argv=None):
+    import pandas as pd
+    from model_registry import ModelSpec, MODEL_FILE
+
+    parser = argparse.ArgumentParser(description='Export a model bundle for in-browser scoring')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--data', default='synthetic_loan_data.csv',
+                        help='Training data, for the defaults of fields a form does not ask for')
+    parser.add_argument('--check', action='store_true',
+                        help='Score records with the JS evaluator under node and compare with sklearn')
+    parser.add_argument('--rows', type=int, default=2000, help='Records for --check')
+    parser.add_argument('--node', default='node', help='node executable for --check')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl',
+                         bundle_file=LEGACY_BUNDLE_FILE)
+    model, preprocessor = spec.load()
+    path = spec.bundle_path
+
+    df = pd.read_csv(args.data)
+    df.columns = df.columns.str.strip()
+    bundle = export_bundle(model, preprocessor, preprocessor.transform(df), spec.version)
+    save_bundle(bundle, path)
+
+    print("\n" + "="*70)
+    print(f"BROWSER MODEL BUNDLE ({bundle['model_type']}, {bundle['trees']['n_trees']} trees, "
+          f"{bundle['trees']['n_nodes']} nodes)")
+    print("="*70)
+    print(f"  Size: {os.path.getsize(path) / 1024:.1f} KB")
+    for col, value in bundle['defaults'].items():
+        print(f"  default {col:20s} {value}")
+    print(f"\n✓ Bundle saved to {path}")
+
+    if not args.check:
+        return 0
+
+    records = parity_records(preprocessor, bundle, df, args.rows)
+    start = time.perf_counter()
+    report = check_parity(model, preprocessor, bundle, records, node=args.node)
+    print("\n" + "="*70)
+    print(f"PARITY: JS EVALUATOR vs SKLEARN ({report['rows']} records)")
+    print("="*70)
+    if 'raw_identical' in report:
+        print(f"  Raw scores identical: {'✓' if report['raw_identical'] else '❌'}")
+    print(f"  Max |Δ probability|:  {report['max_abs_diff']:.2e}")
+    print(f"  Label mismatches:     {report['label_mismatches']}")
+    print(f"  JS scoring:           {report['js_us_per_record']:.1f} µs/record")
+    print(f"  Check time:           {time.perf_counter() - start:.1f} s")
+    ok = report['label_mismatches'] == 0 and report['max_abs_diff'] <= 1e-12
+    print(f"\n{'✅ Parity OK' if ok else '❌ Parity FAILED'}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
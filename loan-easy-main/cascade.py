@@ -0,0 +1,403 @@
+"""
+Cascade inference: a distilled surrogate tree in front of the full ensemble
+Most applications are far from the decision boundary (Credit_History alone
+carries most of the importance), so a shallow regression tree fitted to the
+full model's probabilities already decides them. At serving time the surrogate
+answers whenever its probability is more than `margin` away from 0.5; the rest
+fall back to the full model.
+
+The margin is calibrated on held-out rows: it is the smallest one at which the
+rows the surrogate would answer agree with the full model's label at least
+`target_agreement` of the time. A surrogate answer returns the surrogate's
+probability (the mean of the full model's probabilities in its leaf), so
+labels match at the calibrated rate but confidences are approximate. Every
+`shadow_every`-th surrogate answer is also scored by the full model to track
+live agreement.
+
+A 99.9% target needs far more than the ~1000 held-out rows of a 10k dataset
+to be checked: a single disagreement among 1000 answers is already 0.1%.
+With --synthetic-rows N the margin is calibrated, and the cascade evaluated,
+on N fresh applications each from generate_synthetic_data.py (the deployed
+model's training distribution), and every agreement is reported with a 95%
+interval.
+
+Usage:
+    python cascade.py --source Models                 # distill, calibrate, benchmark, save
+    python cascade.py --source Models --synthetic-rows 100000
+    python cascade.py --source Models --depths 3,4,5,6 --no-save
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeRegressor
+
+DEFAULT_DEPTH = 5
+DEFAULT_MIN_SAMPLES_LEAF = 20
+DEFAULT_TARGET_AGREEMENT = 0.999
+DEFAULT_SHADOW_EVERY = 100
+CASCADE_FILE = 'cascade.pkl'
+
+
+class Surrogate:
+    """Distilled shallow tree as flat arrays, plus its calibrated margin"""
+
+    def __init__(self, tree, margin, calibration, model_version=None):
+        t = tree.tree_
+        self.feature = t.feature.tolist()
+        self.threshold = t.threshold.tolist()
+        self.left = t.children_left.tolist()
+        self.right = t.children_right.tolist()
+        self.value = np.clip(t.value[:, 0, 0], 0.0, 1.0)
+        self.depth = int(t.max_depth)
+        self.n_leaves = int(t.n_leaves)
+        self.margin = float(margin)
+        self.calibration = calibration
+        self.model_version = model_version
+        self._arrays = (t.feature.copy(), t.threshold.copy(), t.children_left.copy(),
+                        t.children_right.copy())
+
+    def predict_proba_one(self, row):
+        """Approval probability of one float32-valued row (list of floats)"""
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        node = 0
+        while left[node] != -1:
+            node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+        return self.value[node]
+
+    def predict(self, X):
+        """Approval probability per row, compared like sklearn (float32 inputs)"""
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 1:
+            return np.array([self.predict_proba_one(X[0].tolist())])
+        feature, threshold, left, right = self._arrays
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.intp)
+        for _ in range(self.depth):
+            internal = left[node] != -1
+            go_left = X[rows, np.maximum(feature[node], 0)] <= threshold[node]
+            node = np.where(internal, np.where(go_left, left[node], right[node]), node)
+        return self.value[node]
+
+
+def distill(model, X, max_depth=DEFAULT_DEPTH, min_samples_leaf=DEFAULT_MIN_SAMPLES_LEAF):
+    """Regression tree fitted to the full model's approval probabilities"""
+    X = np.asarray(X, dtype=np.float64)
+    target = model.predict_proba(X)[:, 1]
+    return DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+                                 random_state=0).fit(X, target)
+
+
+def calibrate_margin(surrogate_p, full_p, target_agreement=DEFAULT_TARGET_AGREEMENT,
+                     lower_bound=False):
+    """
+    Smallest margin whose surrogate answers agree with the full model often enough
+
+    Rows with |p - 0.5| > margin are answered by the surrogate. Rows in the same
+    leaf share a distance, so candidate margins are the distinct distances.
+    With lower_bound the 95% lower bound of the agreement, not the observed
+    agreement, must reach the target (needs thousands of rows per 0.1%).
+    Returns (margin, hit rate, agreement on the answered rows).
+    """
+    distance = np.abs(np.asarray(surrogate_p) - 0.5)
+    agree = (np.asarray(surrogate_p) > 0.5) == (np.asarray(full_p) > 0.5)
+    levels = np.unique(distance)[::-1]
+    best = (0.5, 0.0, 1.0)
+    answered = agreed = 0
+    for i, level in enumerate(levels):
+        group = distance == level
+        answered += int(group.sum())
+        agreed += int(agree[group].sum())
+        observed = wilson_interval(agreed, answered)[0] if lower_bound else agreed / answered
+        if observed < target_agreement:
+            continue
+        # Answer every row strictly above the next lower distance
+        margin = float(levels[i + 1]) if i + 1 < len(levels) else 0.0
+        best = (margin, answered / len(distance), agreed / answered)
+    return best
+
+
+def build_surrogate(model, X_fit, X_calibrate, max_depth=DEFAULT_DEPTH,
+                    target_agreement=DEFAULT_TARGET_AGREEMENT,
+                    min_samples_leaf=DEFAULT_MIN_SAMPLES_LEAF, model_version=None,
+                    lower_bound=False):
+    """Distill on X_fit, calibrate the margin on held-out X_calibrate"""
+    tree = distill(model, X_fit, max_depth, min_samples_leaf)
+    full_p = model.predict_proba(np.asarray(X_calibrate, dtype=np.float64))[:, 1]
+    margin, hit_rate, agreement = calibrate_margin(tree.predict(X_calibrate), full_p,
+                                                   target_agreement, lower_bound)
+    calibration = {
+        'rows': int(len(full_p)),
+        'target_agreement': target_agreement,
+        'lower_bound': lower_bound,
+        'hit_rate': hit_rate,
+        'agreement': agreement,
+    }
+    return Surrogate(tree, margin, calibration, model_version)
+
+
+class CascadeModel:
+    """predict_proba that answers confident rows with the surrogate"""
+
+    def __init__(self, full, surrogate, shadow_every=DEFAULT_SHADOW_EVERY):
+        self.full = full
+        self.surrogate = surrogate
+        self.shadow_every = shadow_every
+        self.classes_ = full.classes_
+        self.n_features_in_ = getattr(full, 'n_features_in_', None)
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.surrogate_rows = 0
+        self.shadow_rows = 0
+        self.shadow_agreed = 0
+        self.surrogate_calls = 0
+        self.surrogate_seconds = 0.0
+        self.fallback_calls = 0
+        self.fallback_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, full, path):
+        shadow_every = int(os.environ.get('CASCADE_SHADOW_EVERY', DEFAULT_SHADOW_EVERY))
+        return cls(full, load_surrogate(path), shadow_every)
+
+    def predict_proba(self, X):
+        start = time.perf_counter()
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 1:
+            # Scalar path: numpy calls would cost more than the tree walk
+            p = self.surrogate.predict_proba_one(X.astype(np.float32)[0].tolist())
+            if abs(p - 0.5) > self.surrogate.margin:
+                self._shadow_check(X, np.array([p]), np.array([0]))
+                self._count(1, 1, False, time.perf_counter() - start)
+                return np.array([[1 - p, p]])
+            proba = self.full.predict_proba(X)
+            self._count(1, 0, True, time.perf_counter() - start)
+            return proba
+
+        p = self.surrogate.predict(X)
+        answered = np.abs(p - 0.5) > self.surrogate.margin
+        proba = np.column_stack([1 - p, p])
+        fallback = ~answered
+        if fallback.any():
+            proba[fallback] = self.full.predict_proba(X[fallback])
+        self._shadow_check(X, p, np.flatnonzero(answered))
+        self._count(len(X), int(answered.sum()), bool(fallback.any()),
+                    time.perf_counter() - start)
+        return proba
+
+    def _shadow_check(self, X, p, answered):
+        """Score every shadow_every-th surrogate answer with the full model too"""
+        if not len(answered) or self.shadow_every <= 0:
+            return
+        with self._lock:
+            first = (-self.surrogate_rows) % self.shadow_every
+        picks = answered[first::self.shadow_every]
+        if not len(picks):
+            return
+        agreed = (self.full.predict_proba(X[picks])[:, 1] > 0.5) == (p[picks] > 0.5)
+        with self._lock:
+            self.shadow_rows += len(picks)
+            self.shadow_agreed += int(agreed.sum())
+
+    def _count(self, rows, answered, fell_back, seconds):
+        with self._lock:
+            self.rows += rows
+            self.surrogate_rows += answered
+            if fell_back:
+                self.fallback_calls += 1
+                self.fallback_seconds += seconds
+            else:
+                self.surrogate_calls += 1
+                self.surrogate_seconds += seconds
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def snapshot(self):
+        calls = self.surrogate_calls + self.fallback_calls
+        surrogate_ms = (self.surrogate_seconds / self.surrogate_calls * 1000
+                        if self.surrogate_calls else None)
+        fallback_ms = (self.fallback_seconds / self.fallback_calls * 1000
+                       if self.fallback_calls else None)
+        mean_ms = (self.surrogate_seconds + self.fallback_seconds) / calls * 1000 if calls else None
+        return {
+            'margin': self.surrogate.margin,
+            'depth': self.surrogate.depth,
+            'calibration': self.surrogate.calibration,
+            'rows': self.rows,
+            'surrogate_rows': self.surrogate_rows,
+            'hit_rate': round(self.surrogate_rows / self.rows, 4) if self.rows else None,
+            'shadow_rows': self.shadow_rows,
+            'shadow_agreement': (round(self.shadow_agreed / self.shadow_rows, 4)
+                                 if self.shadow_rows else None),
+            'surrogate_call_ms': round(surrogate_ms, 4) if surrogate_ms is not None else None,
+            'fallback_call_ms': round(fallback_ms, 4) if fallback_ms is not None else None,
+            # Requests needing the full model vs the observed average
+            'estimated_speedup': (round(fallback_ms / mean_ms, 2)
+                                  if fallback_ms is not None and mean_ms else None),
+        }
+
+
+def save_surrogate(surrogate, path):
+    joblib.dump(surrogate, path)
+    return path
+
+
+def load_surrogate(path):
+    return joblib.load(path)
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """95% Wilson score interval of a proportion"""
+    if not trials:
+        return (0.0, 1.0)
+    p = successes / trials
+    centre = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    half = z * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return (float(centre - half), float(centre + half))
+
+
+def _best_per_row(func, rows, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for row in rows:
+            func(row)
+        best = min(best, (time.perf_counter() - start) / len(rows))
+    return best
+
+
+def evaluate_cascade(model, surrogate, X, singles=500):
+    """Hit rate, label agreement and latency of the cascade vs the full model"""
+    X = np.asarray(X, dtype=np.float64)
+    cascade = CascadeModel(model, surrogate, shadow_every=0)
+    full = model.predict_proba(X)
+    ours = cascade.predict_proba(X)
+    answered = np.abs(surrogate.predict(X) - 0.5) > surrogate.margin
+    rows = [X[i:i + 1] for i in range(min(singles, len(X)))]
+    full_single = _best_per_row(model.predict_proba, rows)
+    cascade_single = _best_per_row(cascade.predict_proba, rows)
+    full_batch = _best_per_row(model.predict_proba, [X[:10000]])
+    cascade_batch = _best_per_row(cascade.predict_proba, [X[:10000]])
+    agree = (full[:, 1] > 0.5) == (ours[:, 1] > 0.5)
+    return {
+        'rows': len(X),
+        'batch_rows': min(len(X), 10000),
+        'hit_rate': float(answered.mean()),
+        'agreement': float(np.mean(agree)),
+        'agreement_interval': wilson_interval(int(agree.sum()), len(X)),
+        'answered_agreement': float(agree[answered].mean()) if answered.any() else 1.0,
+        'answered_agreement_interval': wilson_interval(int(agree[answered].sum()),
+                                                       int(answered.sum())),
+        'answered_abs_proba_diff': (float(np.abs(full[answered, 1] - ours[answered, 1]).mean())
+                                    if answered.any() else 0.0),
+        'single_full_ms': full_single * 1000,
+        'single_cascade_ms': cascade_single * 1000,
+        'batch_full_ms': full_batch * 1000,
+        'batch_cascade_ms': cascade_batch * 1000,
+    }
+
+
+def format_cascade(surrogate, report):
+    c = surrogate.calibration
+    return '\n'.join([
+        f"Surrogate: depth {surrogate.depth}, {surrogate.n_leaves} leaves, margin {surrogate.margin:.4f}",
+        f"Calibration ({c['rows']} rows): hit rate {c['hit_rate']*100:.1f}%, "
+        f"agreement {c['agreement']*100:.2f}% (target {c['target_agreement']*100:.2f}%"
+        f"{' on the 95% lower bound' if c.get('lower_bound') else ''})",
+        f"Evaluation ({report['rows']} rows): hit rate {report['hit_rate']*100:.1f}%, "
+        f"label agreement {report['agreement']*100:.2f}% "
+        f"(95% CI {report['agreement_interval'][0]*100:.2f}-{report['agreement_interval'][1]*100:.2f}%), "
+        f"on surrogate answers {report['answered_agreement']*100:.2f}% "
+        f"(95% CI {report['answered_agreement_interval'][0]*100:.2f}-"
+        f"{report['answered_agreement_interval'][1]*100:.2f}%)",
+        f"Mean |Δp| on surrogate answers {report['answered_abs_proba_diff']:.4f}",
+        f"Single row: {report['single_full_ms']:.3f} → {report['single_cascade_ms']:.3f} ms "
+        f"({report['single_full_ms']/report['single_cascade_ms']:.2f}x)",
+        f"Batch of {report['batch_rows']}: {report['batch_full_ms']:.2f} → {report['batch_cascade_ms']:.2f} ms "
+        f"({report['batch_full_ms']/report['batch_cascade_ms']:.2f}x)",
+    ])
+
+
+def add_cascade_arguments(parser):
+    """Register the surrogate depth and agreement target on a parser"""
+    parser.add_argument('--cascade-depth', type=int, default=DEFAULT_DEPTH,
+                        help='Depth of the distilled surrogate tree')
+    parser.add_argument('--cascade-agreement', type=float, default=DEFAULT_TARGET_AGREEMENT,
+                        help='Label agreement the surrogate answers must reach (default 0.999)')
+
+
+def main(argv=None):
+    import warnings
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from model_registry import ModelSpec, MODEL_FILE
+
+    parser = argparse.ArgumentParser(description='Distill and calibrate a cascade surrogate')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--data', default='synthetic_loan_data.csv')
+    parser.add_argument('--depths', default=None, help='Comma-separated depths to compare')
+    parser.add_argument('--synthetic-rows', type=int, default=0,
+                        help='Calibrate and evaluate on this many fresh generated applications each')
+    parser.add_argument('--no-save', action='store_true')
+    add_cascade_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+        path = os.path.join(args.source, CASCADE_FILE)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl')
+        path = os.path.join(args.source, 'cascade_real.pkl')
+    model, preprocessor = spec.load()
+    # The model was fitted on a DataFrame; the cascade scores plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    df = pd.read_csv(args.data)
+    df.columns = df.columns.str.strip()
+    X = preprocessor.transform(df)
+    # Distill on 80% of the rows; the held-out 20% is halved into
+    # calibration and evaluation rows
+    X_fit, X_held = train_test_split(X, test_size=0.2, random_state=42)
+    X_calibrate, X_eval = train_test_split(X_held, test_size=0.5, random_state=0)
+    if args.synthetic_rows:
+        from generate_synthetic_data import generate_synthetic_loan_data
+        # Seeds other than the dataset's 42, so no row repeats a training row
+        generated = []
+        for seed in (1, 2):
+            np.random.seed(seed)
+            generated.append(preprocessor.transform(
+                generate_synthetic_loan_data(args.synthetic_rows, verbose=False)))
+        X_calibrate, X_eval = generated
+
+    depths = [int(d) for d in args.depths.split(',')] if args.depths else [args.cascade_depth]
+    chosen = None
+    for depth in depths:
+        surrogate = build_surrogate(model, X_fit, X_calibrate, depth, args.cascade_agreement,
+                                    model_version=spec.version,
+                                    lower_bound=bool(args.synthetic_rows))
+        report = evaluate_cascade(model, surrogate, X_eval)
+        print("\n" + "="*70)
+        print(f"CASCADE (surrogate depth {depth})")
+        print("="*70)
+        print(format_cascade(surrogate, report))
+        if depth == args.cascade_depth:
+            chosen = surrogate
+
+    if args.no_save or chosen is None:
+        return 0
+    save_surrogate(chosen, path)
+    print(f"\n✓ Cascade surrogate saved to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    # Pickles must reference cascade.Surrogate, not __main__.Surrogate
+    from cascade import main
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+Post-training model compaction
+Rewrites a fitted tree ensemble as one shared node table:
+
+- splits whose two children differ by at most `leaf_tolerance` collapse into
+  a leaf, and trees whose leaves span at most `tree_tolerance` are dropped
+  (their mean is folded into a constant bias)
+- identical subtrees, within and across trees, are stored once
+- thresholds and leaf values are float32, node/feature indices use the
+  smallest unsigned integer type that fits
+
+Thresholds are rounded *down* to float32. sklearn compares float32 inputs, and
+for a float32 x, x <= t exactly when x <= floor32(t), so no split changes.
+Only pruning and float32 leaf values can move the output. The accuracy delta is
+measured, and export is refused above the configured loss.
+
+Usage:
+    python compaction.py --source Models --output-dir Models/compact
+    python compaction.py --source Models/real --data real_data/loan_approval_dataset.csv \\
+        --target loan_status --positive Approved --leaf-tolerance 0.01
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from scipy.special import expit
+from sklearn.dummy import DummyClassifier
+
+from model_benchmark import artifact_size, measure_latency
+from tree_utils import ensemble_trees, node_values, init_log_odds
+
+DEFAULT_MAX_ACCURACY_LOSS = 0.001
+
+
+def floor_float32(values):
+    """Largest float32 <= each value"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def index_dtype(max_value):
+    """Smallest unsigned integer dtype holding 0..max_value"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+class CompactEnsemble:
+    """Tree ensemble in a shared float32 node table with compact indices"""
+
+    def __init__(self, feature, threshold, children, value, roots, depth, bias,
+                 output_space, logit_scale, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node + went_left]: right child first, then left
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.bias = bias
+        self.output_space = output_space
+        self.logit_scale = logit_scale
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.value)
+
+    def decision_function(self, X):
+        """Raw output: log-odds (boosting) or class-1 probability (forests)"""
+        X = np.asarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_start = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.repeat(self.roots[None, :].astype(np.intp), len(X), axis=0)
+        for _ in range(self.depth):
+            values = np.take(flat_X, row_start + np.take(self.feature, node))
+            go_left = values <= np.take(self.threshold, node)
+            node = np.take(self.children, 2 * node + go_left).astype(np.intp)
+        return self.bias + np.take(self.value, node).sum(axis=1, dtype=np.float64)
+
+    def predict_proba(self, X):
+        raw = self.decision_function(X)
+        proba = np.ones((len(raw), 2), dtype=np.float64)
+        if self.output_space == 'log_odds':
+            proba[:, 1] = expit(self.logit_scale * raw)
+        else:
+            proba[:, 1] = np.clip(raw, 0.0, 1.0)
+        proba[:, 0] -= proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class _NodeTable:
+    """Hash-consing builder: equal (sub)trees get the same node id"""
+
+    def __init__(self):
+        self.ids = {}
+        self.nodes = []
+
+    def _intern(self, key):
+        node_id = self.ids.get(key)
+        if node_id is None:
+            node_id = self.ids[key] = len(self.nodes)
+            self.nodes.append(key)
+        return node_id
+
+    def leaf(self, value):
+        return self._intern(('leaf', np.float32(value).item()))
+
+    def split(self, feature, threshold, left, right):
+        if left == right:
+            # Both branches lead to the same subtree: the test is redundant
+            return left
+        return self._intern(('split', int(feature), threshold, left, right))
+
+
+def _add_tree(table, tree, values, leaf_tolerance):
+    """Intern one tree; returns (root id, depth)"""
+    t = tree.tree_
+    weights = t.weighted_n_node_samples
+    thresholds = floor_float32(t.threshold)
+
+    def visit(node):
+        # -> (node id, leaf value or None, weight, depth)
+        left, right = t.children_left[node], t.children_right[node]
+        if left == -1:
+            return table.leaf(values[node]), values[node], weights[node], 0
+        l_id, l_value, l_weight, l_depth = visit(left)
+        r_id, r_value, r_weight, r_depth = visit(right)
+        if (l_value is not None and r_value is not None
+                and abs(l_value - r_value) <= leaf_tolerance):
+            # Boosted trees only update leaf values, so merge from the leaves
+            weight = l_weight + r_weight
+            value = (l_value * l_weight + r_value * r_weight) / weight
+            return table.leaf(value), value, weight, 0
+        node_id = table.split(t.feature[node], thresholds[node].item(), l_id, r_id)
+        if node_id == l_id:
+            # Redundant split (identical branches) collapsed onto its child
+            return node_id, l_value, weights[node], l_depth
+        return node_id, None, weights[node], 1 + max(l_depth, r_depth)
+
+    root, _, _, depth = visit(0)
+    return root, depth
+
+
+def _leaf_stats(tree, values):
+    """(spread, sample-weighted mean) of a tree's leaf values"""
+    t = tree.tree_
+    leaves = t.children_left == -1
+    leaf_values = values[leaves]
+    mean = np.average(leaf_values, weights=t.weighted_n_node_samples[leaves])
+    return leaf_values.max() - leaf_values.min(), mean
+
+
+def compact_model(model, leaf_tolerance=0.0, tree_tolerance=0.0):
+    """Build a CompactEnsemble from a fitted sklearn tree model"""
+    trees, scale, output_space = ensemble_trees(model)
+
+    bias = 0.0
+    logit_scale = 1.0
+    if output_space == 'log_odds':
+        init = model.init_
+        if isinstance(init, str) and init == 'zero':
+            bias = 0.0
+        elif isinstance(init, DummyClassifier) and init.strategy == 'prior':
+            bias = float(init_log_odds(model, np.zeros((1, model.n_features_in_)))[0])
+        else:
+            raise ValueError("Only the default (prior) or 'zero' init can be compacted")
+        logit_scale = 2.0 if getattr(model, 'loss', None) == 'exponential' else 1.0
+
+    table = _NodeTable()
+    roots, depth = [], 0
+    for tree in trees:
+        values = scale * node_values(tree, output_space)
+        spread, mean = _leaf_stats(tree, values)
+        if spread <= tree_tolerance:
+            bias += mean
+            continue
+        root, tree_depth = _add_tree(table, tree, values, leaf_tolerance)
+        roots.append(root)
+        depth = max(depth, tree_depth)
+
+    n = len(table.nodes)
+    node_dtype = index_dtype(max(n - 1, 0))
+    feature = np.zeros(n, dtype=index_dtype(max(model.n_features_in_ - 1, 0)))
+    threshold = np.full(n, np.inf, dtype=np.float32)
+    # Leaves point back to themselves, so extra levels are no-ops
+    children = np.repeat(np.arange(n, dtype=node_dtype), 2)
+    value = np.zeros(n, dtype=np.float32)
+    for i, node in enumerate(table.nodes):
+        if node[0] == 'leaf':
+            value[i] = node[1]
+        else:
+            _, feature[i], threshold[i], children[2 * i + 1], children[2 * i] = node
+
+    return CompactEnsemble(feature, threshold, children, value,
+                           np.asarray(roots, dtype=node_dtype), depth, bias,
+                           output_space, logit_scale, model.classes_, model.n_features_in_)
+
+
+def count_nodes(model):
+    trees, _, _ = ensemble_trees(model)
+    return sum(tree.tree_.node_count for tree in trees)
+
+
+def load_time(model, repeats=5):
+    """Best time in seconds to joblib.load the serialized model"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    best = float('inf')
+    for _ in range(repeats):
+        buffer.seek(0)
+        start = time.perf_counter()
+        joblib.load(buffer)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate_compaction(model, compact, X, y):
+    """Accuracy, agreement, size, load time and latency: original vs compact"""
+    X, y = np.asarray(X), np.asarray(y)
+    proba = model.predict_proba(X)
+    compact_proba = compact.predict_proba(X)
+    accuracy = float(np.mean(model.classes_[proba.argmax(axis=1)] == y))
+    compact_accuracy = float(np.mean(compact.classes_[compact_proba.argmax(axis=1)] == y))
+
+    def profile(m, trees, nodes):
+        return {
+            'trees': trees,
+            'nodes': nodes,
+            'size_bytes': artifact_size(m),
+            'load_time_ms': load_time(m) * 1000,
+            **measure_latency(m, X),
+        }
+
+    trees, _, _ = ensemble_trees(model)
+    return {
+        'accuracy': accuracy,
+        'compact_accuracy': compact_accuracy,
+        'accuracy_loss': accuracy - compact_accuracy,
+        'agreement': float(np.mean(proba.argmax(axis=1) == compact_proba.argmax(axis=1))),
+        'max_abs_proba_diff': float(np.abs(proba[:, 1] - compact_proba[:, 1]).max()),
+        'original': profile(model, len(trees), count_nodes(model)),
+        'compact': profile(compact, compact.n_trees, compact.n_nodes),
+    }
+
+
+def format_compaction(report):
+    lines = []
+    o, c = report['original'], report['compact']
+    lines.append(f"{'':16s} {'original':>12s} {'compact':>12s} {'ratio':>8s}")
+    for key, label, fmt in [('trees', 'Trees', '{:.0f}'), ('nodes', 'Nodes', '{:.0f}'),
+                            ('size_bytes', 'Size (KB)', '{:.1f}'),
+                            ('load_time_ms', 'Load (ms)', '{:.2f}'),
+                            ('single_p50_ms', 'Single p50 ms', '{:.3f}'),
+                            ('single_p99_ms', 'Single p99 ms', '{:.3f}'),
+                            ('batch_p50_ms', 'Batch p50 ms', '{:.3f}')]:
+        before, after = o[key], c[key]
+        if key == 'size_bytes':
+            before, after = before / 1024, after / 1024
+        ratio = after / before if before else 0.0
+        lines.append(f"{label:16s} {fmt.format(before):>12s} {fmt.format(after):>12s} {ratio:>7.2f}x")
+    lines.append(f"Accuracy: {report['accuracy']:.4f} → {report['compact_accuracy']:.4f} "
+                 f"(loss {report['accuracy_loss']:+.4f}), agreement {report['agreement']*100:.2f}%, "
+                 f"max |Δp| {report['max_abs_proba_diff']:.2e}")
+    return '\n'.join(lines)
+
+
+def export_compact(compact, report, output_dir, preprocessor,
+                   max_accuracy_loss=DEFAULT_MAX_ACCURACY_LOSS):
+    """Write model.pkl + preprocessor.pkl, refusing if accuracy dropped too much"""
+    if report['accuracy_loss'] > max_accuracy_loss:
+        raise ValueError(f"Compaction lost {report['accuracy_loss']:.4f} accuracy "
+                         f"(limit {max_accuracy_loss:.4f}); not exported")
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(compact, os.path.join(output_dir, 'model.pkl'))
+    joblib.dump(preprocessor, os.path.join(output_dir, 'preprocessor.pkl'))
+    return output_dir
+
+
+def add_compaction_arguments(parser):
+    """Register the compaction tolerances and accuracy-loss limit on a parser"""
+    parser.add_argument('--leaf-tolerance', type=float, default=0.0,
+                        help='Collapse splits whose children differ by at most this (output units)')
+    parser.add_argument('--tree-tolerance', type=float, default=0.0,
+                        help='Drop trees whose leaf values span at most this')
+    parser.add_argument('--max-accuracy-loss', type=float, default=DEFAULT_MAX_ACCURACY_LOSS,
+                        help='Refuse export above this accuracy loss (default 0.001)')
+
+
+def main(argv=None):
+    # CLI-only imports: unpickling a CompactEnsemble in the app should stay light
+    import pandas as pd
+    from model_registry import ModelSpec, MODEL_FILE
+
+    parser = argparse.ArgumentParser(description='Compact a trained tree model')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--output-dir', default=os.path.join('Models', 'compact'),
+                        help='Served as /models/<dir name>/predict')
+    parser.add_argument('--data', default='synthetic_loan_data.csv', help='Evaluation data')
+    parser.add_argument('--target', default='Loan_Status')
+    parser.add_argument('--positive', default='Y', help='Target value of the approved class')
+    add_compaction_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl')
+    model, preprocessor = spec.load()
+
+    df = pd.read_csv(args.data)
+    df.columns = df.columns.str.strip()
+    y = (df[args.target].astype(str).str.strip() == args.positive).astype(int).to_numpy()
+    X = preprocessor.transform(df)
+
+    print("\n" + "="*70)
+    print("MODEL COMPACTION")
+    print("="*70)
+    compact = compact_model(model, args.leaf_tolerance, args.tree_tolerance)
+    report = evaluate_compaction(model, compact, X, y)
+    print(format_compaction(report))
+
+    try:
+        path = export_compact(compact, report, args.output_dir, preprocessor, args.max_accuracy_loss)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        return 1
+    print(f"\n✓ Compact model saved to '{path}/'")
+    return 0
+
+
+if __name__ == '__main__':
+    # Run from the imported module so pickles reference compaction.CompactEnsemble,
+    # not __main__.CompactEnsemble (which the app could not unpickle)
+    from compaction import main
+    sys.exit(main())
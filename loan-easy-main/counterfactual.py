@@ -0,0 +1,213 @@
+"""
+Counterfactual "what would get me approved" search
+Candidate values for each mutable feature are taken only at the fitted
+trees' split thresholds (nudged to the side that changes the split), since the
+model output cannot change between two consecutive thresholds. Candidates are
+scored in vectorized batches, cheapest first, pruned against the current
+top-k and stopped at a latency budget.
+"""
+import itertools
+import time
+
+import numpy as np
+
+from tree_utils import split_thresholds
+
+DEFAULT_K = 3
+DEFAULT_BUDGET_MS = 50.0
+PAIR_CANDIDATES = 40
+BATCH_ROWS = 2048
+
+
+class FeatureRule:
+    """How a feature may realistically change and what a change costs"""
+
+    def __init__(self, direction='any', step=1.0, minimum=None, maximum=None,
+                 allowed=None, weight=1.0, scale_floor=1.0):
+        if direction not in ('increase', 'decrease', 'any'):
+            raise ValueError(f"Unknown direction: {direction}")
+        self.direction = direction
+        self.step = step
+        self.minimum = minimum
+        self.maximum = maximum
+        self.allowed = None if allowed is None else np.asarray(allowed, dtype=np.float64)
+        self.weight = weight
+        self.scale_floor = scale_floor
+
+    def cost(self, current, values):
+        """Weighted relative change, vectorized over candidate values"""
+        scale = max(abs(current), self.scale_floor)
+        return self.weight * np.abs(values - current) / scale
+
+
+# Synthetic-schema defaults: borrow less, add co-applicant income, earn more
+# (costlier), or pick another standard term
+DEFAULT_RULES = {
+    'LoanAmount': FeatureRule('decrease', step=1, minimum=10, weight=1.0, scale_floor=10),
+    'CoapplicantIncome': FeatureRule('increase', step=100, minimum=0, weight=1.0, scale_floor=1000),
+    'ApplicantIncome': FeatureRule('increase', step=100, weight=2.0, scale_floor=1000),
+    'Loan_Amount_Term': FeatureRule(allowed=(120, 180, 240, 360, 480), weight=0.5, scale_floor=120),
+}
+
+
+class CounterfactualSearch:
+    """Find the cheapest feature changes that flip a rejection to an approval"""
+
+    def __init__(self, model, preprocessor, rules=None, threshold=0.5):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.threshold = threshold
+        feature_names = preprocessor.feature_names
+        self.feature_index = {name: j for j, name in enumerate(feature_names)}
+
+        rules = DEFAULT_RULES if rules is None else rules
+        # Derived features would go stale when an input is overwritten in place
+        self.rules = {name: rule for name, rule in rules.items()
+                      if name in self.feature_index and not preprocessor.derived}
+        self.thresholds = split_thresholds(model, len(feature_names))
+
+    def candidates(self, feature, current):
+        """Candidate values for one feature and their costs, cheapest first"""
+        rule = self.rules[feature]
+        if rule.allowed is not None:
+            values = rule.allowed
+        else:
+            thresholds = self.thresholds[self.feature_index[feature]]
+            step = rule.step
+            # x <= t goes left: the largest step-multiple <= t crosses downwards,
+            # the next step-multiple above t crosses upwards
+            below = np.floor(thresholds[thresholds < current] / step) * step
+            above = (np.floor(thresholds[thresholds >= current] / step) + 1) * step
+            if rule.direction == 'decrease':
+                values = below
+            elif rule.direction == 'increase':
+                values = above
+            else:
+                values = np.concatenate([below, above])
+
+        values = np.unique(values)
+        if rule.minimum is not None:
+            values = values[values >= rule.minimum]
+        if rule.maximum is not None:
+            values = values[values <= rule.maximum]
+        if rule.direction == 'decrease':
+            values = values[values < current]
+        elif rule.direction == 'increase':
+            values = values[values > current]
+        values = values[values != current]
+
+        costs = rule.cost(current, values)
+        order = np.argsort(costs, kind='stable')
+        return values[order], costs[order]
+
+    def _approval_probability(self, matrix):
+        return self.model.predict_proba(matrix)[:, 1]
+
+    def search(self, record, k=DEFAULT_K, budget_ms=DEFAULT_BUDGET_MS, max_changes=2):
+        """
+        Top-k cheapest changes that get the applicant approved
+
+        Returns a dict with the current probability, the suggestions (each
+        with its changes, cost and new probability) and whether the search
+        finished inside the latency budget.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        base = self.preprocessor.transform(record)
+        probability = float(self._approval_probability(base)[0])
+        result = {'probability': round(probability, 4), 'suggestions': [], 'complete': True}
+        if probability > self.threshold:
+            return result
+
+        row = base[0]
+        features = list(self.rules)
+        columns = [self.feature_index[f] for f in features]
+        options = [self.candidates(f, row[j]) for f, j in zip(features, columns)]
+
+        # Cheapest flip per set of changed features keeps suggestions diverse
+        best = {}
+
+        def kth_cost():
+            if len(best) < k:
+                return np.inf
+            return sorted(entry['cost'] for entry in best.values())[k - 1]
+
+        def record_flip(changes, cost, p):
+            key = frozenset(changes)
+            if key not in best or cost < best[key]['cost']:
+                best[key] = {'changes': changes, 'cost': float(cost), 'probability': float(p)}
+
+        # Single-feature changes: one batch over every threshold candidate
+        single_feature = np.concatenate([np.full(len(v), i) for i, (v, _) in enumerate(options)])
+        single_value = np.concatenate([v for v, _ in options])
+        single_cost = np.concatenate([c for _, c in options])
+        flips_alone = np.zeros(len(single_value), dtype=bool)
+        if len(single_value):
+            block = np.repeat(base, len(single_value), axis=0)
+            for i, j in enumerate(columns):
+                mask = single_feature == i
+                block[mask, j] = single_value[mask]
+            probabilities = self._approval_probability(block)
+            flips_alone = probabilities > self.threshold
+            for n in np.flatnonzero(flips_alone):
+                record_flip({features[single_feature[n]]: float(single_value[n])},
+                            single_cost[n], probabilities[n])
+
+        # Two-feature changes, cheapest combinations first. A value that flips
+        # on its own dominates every pair containing it, so it is left out.
+        if max_changes >= 2 and time.perf_counter() < deadline:
+            pair_options = []
+            for i in range(len(features)):
+                keep = (single_feature == i) & ~flips_alone
+                pair_options.append((single_value[keep][:PAIR_CANDIDATES],
+                                     single_cost[keep][:PAIR_CANDIDATES]))
+
+            pair_a, pair_b, value_a, value_b, pair_cost = [], [], [], [], []
+            for a, b in itertools.combinations(range(len(features)), 2):
+                (va, ca), (vb, cb) = pair_options[a], pair_options[b]
+                if not len(va) or not len(vb):
+                    continue
+                ia, ib = np.divmod(np.arange(len(va) * len(vb)), len(vb))
+                pair_a.append(np.full(len(ia), a))
+                pair_b.append(np.full(len(ia), b))
+                value_a.append(va[ia])
+                value_b.append(vb[ib])
+                pair_cost.append(ca[ia] + cb[ib])
+
+            if pair_cost:
+                pair_a, pair_b = np.concatenate(pair_a), np.concatenate(pair_b)
+                value_a, value_b = np.concatenate(value_a), np.concatenate(value_b)
+                pair_cost = np.concatenate(pair_cost)
+                order = np.argsort(pair_cost, kind='stable')
+
+                for start in range(0, len(order), BATCH_ROWS):
+                    if time.perf_counter() >= deadline:
+                        result['complete'] = False
+                        break
+                    idx = order[start:start + BATCH_ROWS]
+                    # Costs are sorted, so once a batch is pruned empty we are done
+                    idx = idx[pair_cost[idx] < kth_cost()]
+                    if not len(idx):
+                        break
+                    block = np.repeat(base, len(idx), axis=0)
+                    for i, j in enumerate(columns):
+                        mask = pair_a[idx] == i
+                        block[mask, j] = value_a[idx][mask]
+                        mask = pair_b[idx] == i
+                        block[mask, j] = value_b[idx][mask]
+                    probabilities = self._approval_probability(block)
+                    for n in np.flatnonzero(probabilities > self.threshold):
+                        i = idx[n]
+                        record_flip({features[pair_a[i]]: float(value_a[i]),
+                                     features[pair_b[i]]: float(value_b[i])},
+                                    pair_cost[i], probabilities[n])
+        elif max_changes >= 2:
+            result['complete'] = False
+
+        suggestions = sorted(best.values(), key=lambda entry: entry['cost'])[:k]
+        result['suggestions'] = [{
+            'changes': {f: {'from': float(row[self.feature_index[f]]), 'to': v}
+                        for f, v in entry['changes'].items()},
+            'cost': round(entry['cost'], 4),
+            'probability': round(entry['probability'], 4),
+        } for entry in suggestions]
+        return result
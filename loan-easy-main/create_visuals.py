@@ -5,6 +5,10 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
 import numpy as np
+import joblib
+import os
+
+from diagnostics import load_report
 
 fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 fig.suptitle('Loan Approval Prediction System - Visual Explanation', fontsize=18, fontweight='bold')
@@ -42,26 +46,47 @@ for x, y, text in boxes_train:
 ax2 = axes[0, 1]
 ax2.set_title('2. What the Model Learned (Feature Importance)', fontsize=14, fontweight='bold', pad=20)
 
-features = ['Credit History', 'Applicant Income', 'Coapp. Income', 'Loan Amount', 
-            'Loan Term', 'Dependents', 'Property Area', 'Education', 'Married', 'Gender', 'Self Employed']
-importance = [0.419, 0.151, 0.124, 0.111, 0.044, 0.040, 0.040, 0.023, 0.019, 0.016, 0.013]
-
+# Permutation importance of the saved model on held-out data, cached by
+# `python diagnostics.py`; the model's impurity importances otherwise
+model_path = os.path.join('Models', 'loan_model_real.pkl')
+report = load_report(model_path)
+if report is not None:
+    ranked = report['permutation_importance']
+    features = [entry['feature'].replace('_', ' ') for entry in ranked]
+    importance = [entry['importance_mean'] for entry in ranked]
+    errors = [entry['importance_std'] for entry in ranked]
+    xlabel = f"Held-out {report['scoring']} drop when shuffled"
+else:
+    print("⚠️  No diagnostics report for this model (run: python diagnostics.py); "
+          "showing impurity importances")
+    model = joblib.load(model_path)
+    feature_names = joblib.load(os.path.join('Models', 'feature_names_real.pkl'))
+    order = np.argsort(model.feature_importances_)[::-1]
+    features = [feature_names[i].replace('_', ' ') for i in order]
+    importance = [float(model.feature_importances_[i]) for i in order]
+    errors = None
+    xlabel = 'Importance Score (impurity)'
+
+# Strongest feature, the next three, the rest
 colors = ['#d32f2f' if i == 0 else '#ff9800' if i < 4 else '#4caf50' for i in range(len(features))]
-bars = ax2.barh(features, importance, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+bars = ax2.barh(features, importance, xerr=errors, color=colors, alpha=0.8, edgecolor='black',
+                linewidth=1.5)
+ax2.invert_yaxis()
 
-ax2.set_xlabel('Importance Score', fontsize=11, fontweight='bold')
-ax2.set_xlim(0, 0.45)
+ax2.set_xlabel(xlabel, fontsize=11, fontweight='bold')
+ax2.set_xlim(min(0, min(importance)), max(importance) * 1.2)
 ax2.grid(axis='x', alpha=0.3, linestyle='--')
 
 # Add percentage labels
 for i, (feat, imp) in enumerate(zip(features, importance)):
-    ax2.text(imp + 0.01, i, f'{imp*100:.1f}%', va='center', fontsize=9, fontweight='bold')
+    ax2.text(max(imp, 0) + max(importance) * 0.02, i, f'{imp*100:.1f}%', va='center',
+             fontsize=9, fontweight='bold')
 
 # Add legend
 legend_elements = [
-    mpatches.Patch(color='#d32f2f', label='Critical (>40%)'),
-    mpatches.Patch(color='#ff9800', label='Important (10-20%)'),
-    mpatches.Patch(color='#4caf50', label='Minor (<5%)')
+    mpatches.Patch(color='#d32f2f', label='Strongest'),
+    mpatches.Patch(color='#ff9800', label='Important (next 3)'),
+    mpatches.Patch(color='#4caf50', label='Minor')
 ]
 ax2.legend(handles=legend_elements, loc='lower right', fontsize=9)
 
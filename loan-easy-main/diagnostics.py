@@ -0,0 +1,255 @@
+"""
+Model diagnostics: permutation importance on a held-out set
+Impurity-based feature_importances_ favour numeric features with many split
+points (e.g. ApplicantIncome). Permutation importance measures how much the
+held-out score drops when one feature's values are shuffled, for any model.
+
+The encoded held-out matrix is copied once into shared memory; a process
+pool spreads the (feature, repeat) tasks, and each task shuffles its column
+into small row blocks instead of copying the matrix. Every task seeds its own
+generator from (seed, feature, repeat), so results do not depend on the
+number of processes.
+
+Reports are cached as <model dir>/diagnostics/<model hash>.json, so
+create_visuals.py and analyze_model.py read the numbers of the model actually
+on disk and a retrained model is never described by a stale report.
+
+Usage:
+    python diagnostics.py --source Models                  # legacy Models/*_real.pkl layout
+    python diagnostics.py --source Models/real --repeats 20 --processes 4
+    python diagnostics.py --source Models --scoring roc_auc --force
+    python diagnostics.py --model loan_model.pkl --data loan_data.csv  # train_model.py output
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from audit_log import file_digest
+
+REPORT_VERSION = 1
+CACHE_DIR = 'diagnostics'
+DEFAULT_REPEATS = 10
+SCORINGS = ('accuracy', 'roc_auc')
+# Rows per shuffled block a task scores at a time
+BLOCK_ROWS = 8192
+
+# Worker-process state, set by _init_worker
+_worker_model = None
+_worker_segment = None
+_worker_X = None
+_worker_y = None
+
+
+def _init_worker(model, name, n_rows, n_features):
+    global _worker_model, _worker_segment, _worker_X, _worker_y
+    # Models fitted on a DataFrame warn on every array; workers only see arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    _worker_model = model
+    _worker_segment = shared_memory.SharedMemory(name=name)
+    _worker_X = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=_worker_segment.buf)
+    _worker_y = np.ndarray((n_rows,), dtype=np.float64, buffer=_worker_segment.buf,
+                           offset=_worker_X.nbytes)
+
+
+def _output(model, X, scoring):
+    return model.predict_proba(X)[:, 1] if scoring == 'roc_auc' else model.predict(X)
+
+
+def _metric(y, output, scoring):
+    if scoring == 'roc_auc':
+        from sklearn.metrics import roc_auc_score
+        return float(roc_auc_score(y, output))
+    return float(np.mean(output == y))
+
+
+def _permuted_score(feature, repeat, seed, scoring):
+    """Score of the shared held-out set with one feature shuffled, built block by block"""
+    X, y = _worker_X, _worker_y
+    permutation = np.random.default_rng([seed, feature, repeat]).permutation(len(X))
+    outputs = []
+    for start in range(0, len(X), BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, len(X))
+        block = X[start:stop].copy()
+        block[:, feature] = X[permutation[start:stop], feature]
+        outputs.append(_output(_worker_model, block, scoring))
+    return feature, repeat, _metric(y, np.concatenate(outputs), scoring)
+
+
+def permutation_importance(model, X, y, n_repeats=DEFAULT_REPEATS, processes=None, seed=42,
+                           scoring='accuracy'):
+    """
+    {'baseline', 'scores'} where scores[j, r] is the score with feature j
+    shuffled in repeat r; importance is baseline - scores
+    """
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring '{scoring}'. Expected one of {list(SCORINGS)}")
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_rows, n_features = X.shape
+    baseline = _metric(y, _output(model, X, scoring), scoring)
+    scores = np.empty((n_features, n_repeats))
+    processes = processes or os.cpu_count() or 1
+
+    segment = shared_memory.SharedMemory(create=True, size=X.nbytes + y.nbytes)
+    try:
+        np.ndarray(X.shape, dtype=np.float64, buffer=segment.buf)[:] = X
+        np.ndarray(y.shape, dtype=np.float64, buffer=segment.buf, offset=X.nbytes)[:] = y
+        # spawn, not fork, like the inference pool
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_worker,
+                                 initargs=(model, segment.name, n_rows, n_features)) as executor:
+            futures = [executor.submit(_permuted_score, j, r, seed, scoring)
+                       for j in range(n_features) for r in range(n_repeats)]
+            for future in futures:
+                j, r, score = future.result()
+                scores[j, r] = score
+    finally:
+        segment.close()
+        segment.unlink()
+    return {'baseline': baseline, 'scores': scores}
+
+
+def report_path(model_path, cache_dir=None):
+    """Cache file of a model's diagnostics report, keyed by the model's hash"""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(model_path) or '.', CACHE_DIR)
+    return os.path.join(cache_dir, f'{file_digest(model_path)}.json')
+
+
+def load_report(model_path, cache_dir=None):
+    """Cached report for the model file as it is now, or None"""
+    if not os.path.exists(model_path):
+        return None
+    path = report_path(model_path, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        report = json.load(f)
+    if report.get('version') != REPORT_VERSION:
+        return None
+    return report
+
+
+def build_report(model, model_path, feature_names, X_test, y_test, n_repeats=DEFAULT_REPEATS,
+                 processes=None, seed=42, scoring='accuracy', data=None):
+    start = time.perf_counter()
+    result = permutation_importance(model, X_test, y_test, n_repeats, processes, seed, scoring)
+    importances = result['baseline'] - result['scores']
+    impurity = getattr(model, 'feature_importances_', None)
+    features = []
+    for j, name in enumerate(feature_names):
+        features.append({
+            'feature': name,
+            'importance_mean': round(float(importances[j].mean()), 6),
+            'importance_std': round(float(importances[j].std()), 6),
+            'importances': [round(float(v), 6) for v in importances[j]],
+            'impurity_importance': round(float(impurity[j]), 6) if impurity is not None else None,
+        })
+    features.sort(key=lambda entry: entry['importance_mean'], reverse=True)
+    return {
+        'version': REPORT_VERSION,
+        'model_hash': file_digest(model_path),
+        'model_type': type(model).__name__,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'held_out': {'rows': int(len(X_test)), **(data or {})},
+        'scoring': scoring,
+        'baseline_score': round(float(result['baseline']), 6),
+        'n_repeats': n_repeats,
+        'seed': seed,
+        'processes': processes or os.cpu_count() or 1,
+        'elapsed_s': round(time.perf_counter() - start, 3),
+        'permutation_importance': features,
+    }
+
+
+def save_report(report, model_path, cache_dir=None):
+    path = report_path(model_path, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def main(argv=None):
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from model_registry import ModelSpec, MODEL_FILE
+
+    parser = argparse.ArgumentParser(description='Permutation importance for a saved model')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--model', default=None,
+                        help='Explicit model file (e.g. loan_model.pkl); its preprocessor.pkl or '
+                             'label_encoders.pkl must sit next to it. Overrides --source')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Report directory (default: diagnostics/ next to the model)')
+    parser.add_argument('--data', default='synthetic_loan_data.csv')
+    parser.add_argument('--test-size', type=float, default=0.2,
+                        help='Held-out fraction (the training scripts split 0.2, random_state 42)')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--processes', type=int, default=None, help='Default: one per core')
+    parser.add_argument('--scoring', choices=SCORINGS, default='accuracy')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='Recompute even if a cached report exists')
+    args = parser.parse_args(argv)
+
+    if args.model:
+        # train_model.py layout: loan_model.pkl with preprocessor.pkl / label_encoders.pkl
+        spec = ModelSpec('source', os.path.dirname(args.model) or '.', os.path.basename(args.model),
+                         'preprocessor.pkl', 'label_encoders.pkl', 'feature_names.pkl')
+    elif os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl')
+
+    report = None if args.force else load_report(spec.model_path, args.cache_dir)
+    if report is not None and (report['scoring'], report['n_repeats'], report['seed']) != (
+            args.scoring, args.repeats, args.seed):
+        report = None
+    if report is None:
+        model, preprocessor = spec.load()
+        df = pd.read_csv(args.data)
+        df.columns = df.columns.str.strip()
+        X = preprocessor.transform(df)
+        y = (df['Loan_Status'] == 'Y').astype(int).to_numpy()
+        # The same held-out split as training, so no row was seen in fit
+        _, X_test, _, y_test = train_test_split(X, y, test_size=args.test_size, random_state=42,
+                                                stratify=y)
+        report = build_report(model, spec.model_path, preprocessor.feature_names, X_test, y_test,
+                              args.repeats, args.processes, args.seed, args.scoring,
+                              data={'data': args.data, 'test_size': args.test_size,
+                                    'random_state': 42})
+        path = save_report(report, spec.model_path, args.cache_dir)
+        status = f"computed in {report['elapsed_s']:.1f} s on {report['processes']} processes"
+    else:
+        path = report_path(spec.model_path, args.cache_dir)
+        status = 'cached'
+
+    print("\n" + "="*70)
+    print(f"PERMUTATION IMPORTANCE ({report['model_type']} {report['model_hash']}, "
+          f"{report['held_out']['rows']} held-out rows, {report['n_repeats']} repeats)")
+    print("="*70)
+    print(f"  Baseline {report['scoring']}: {report['baseline_score']:.4f}")
+    print(f"\n  {'feature':20s} {'Δ ' + report['scoring']:>22s}   {'impurity':>8s}")
+    for entry in report['permutation_importance']:
+        impurity = entry['impurity_importance']
+        impurity = '-' if impurity is None else f'{impurity:.4f}'
+        print(f"  {entry['feature']:20s} {entry['importance_mean']:>12.4f} ± {entry['importance_std']:.4f}"
+              f"   {impurity:>8s}")
+    print(f"\n✓ Report {status}: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    # Pool workers are spawned and import this module by name
+    from diagnostics import main
+    sys.exit(main())
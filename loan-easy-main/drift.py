@@ -0,0 +1,246 @@
+"""
+Streaming input-drift monitoring against a training-time reference profile
+The training scripts save a profile of the training set: per feature, fixed
+bin edges (one bin per value for categorical/discrete features, quantile bins
+otherwise) with the reference share of each bin, and the same for the
+predicted approval probability. At serving time DriftMonitor only counts
+requests into those bins (constant memory, a few microseconds per request);
+PSI and a binned KS distance are computed when /metrics is read. The profile
+records the version of the model it was built with, and the service ignores a
+profile whose version does not match the loaded model.
+
+Usage:
+    python drift.py --source Models                  # profile for the legacy *_real.pkl model
+    python drift.py --source Models/real --data real_data/loan_approval_dataset.csv
+"""
+import argparse
+import json
+import os
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+PROFILE_VERSION = 1
+PROBABILITY = 'probability'
+DEFAULT_BINS = 10
+PROBABILITY_BINS = 10
+
+# Conventional PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 drift
+PSI_MODERATE = 0.1
+PSI_DRIFT = 0.25
+MIN_SCORED_SAMPLES = 100
+SMOOTHING = 1e-4
+
+
+def bin_edges(values, bins=DEFAULT_BINS):
+    """Interior edges; bin k holds edges[k-1] <= x < edges[k]"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    unique = np.unique(values)
+    if len(unique) <= 1:
+        return []
+    if len(unique) <= bins:
+        # Discrete / encoded categorical: one bin per observed value
+        return ((unique[:-1] + unique[1:]) / 2).tolist()
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    # A quantile equal to the minimum would leave the first bin empty
+    return edges[edges > unique[0]].tolist()
+
+
+def bin_shares(values, edges):
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return (counts / max(1, counts.sum())).tolist()
+
+
+def build_profile(model, X, feature_names=None, bins=DEFAULT_BINS,
+                  probability_bins=PROBABILITY_BINS, model_version=None):
+    """Reference profile of a training matrix and the model's probabilities on it"""
+    if feature_names is None:
+        feature_names = list(X.columns)
+    X = np.asarray(X, dtype=np.float64)
+    features = []
+    for j, name in enumerate(feature_names):
+        edges = bin_edges(X[:, j], bins)
+        features.append({'name': name, 'edges': edges, 'reference': bin_shares(X[:, j], edges)})
+    probabilities = model.predict_proba(X)[:, 1]
+    edges = np.linspace(0, 1, probability_bins + 1)[1:-1].tolist()
+    return {
+        'version': PROFILE_VERSION,
+        'model_version': model_version,
+        'n_samples': int(len(X)),
+        'features': features,
+        'probability': {'edges': edges, 'reference': bin_shares(probabilities, edges)},
+    }
+
+
+def save_profile(profile, path):
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def load_profile(path):
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('version') != PROFILE_VERSION:
+        raise ValueError(f"Unsupported drift profile version: {profile.get('version')}")
+    return profile
+
+
+def psi(observed, expected):
+    """Population stability index of two bin-share vectors (smoothed)"""
+    observed = (np.asarray(observed) + SMOOTHING) / (1 + SMOOTHING * len(observed))
+    expected = (np.asarray(expected) + SMOOTHING) / (1 + SMOOTHING * len(expected))
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+def binned_ks(observed, expected):
+    """Largest CDF gap at the bin edges (a lower bound on the KS statistic)"""
+    return float(np.max(np.abs(np.cumsum(observed) - np.cumsum(expected))))
+
+
+def drift_status(value):
+    if value is None:
+        return 'insufficient data'
+    if value >= PSI_DRIFT:
+        return 'drift'
+    if value >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """
+    Fixed-size bin counters per feature and for the approval probability
+
+    Counts are kept for the current and the previous window of `window`
+    requests' rows, so scores follow recent traffic in constant memory.
+    """
+
+    def __init__(self, profile, window=10000):
+        columns = profile['features'] + [dict(profile['probability'], name=PROBABILITY)]
+        self.model_version = profile.get('model_version')
+        self.names = [column['name'] for column in columns]
+        self.window = window
+        self._edges = [list(column['edges']) for column in columns]
+        self._reference = [np.asarray(column['reference'], dtype=np.float64) for column in columns]
+        sizes = [len(edges) + 1 for edges in self._edges]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).tolist()
+        self._size = sum(sizes)
+        self._bounds = list(zip(self._offsets, sizes))
+        self._single = list(zip(self._edges, self._offsets))
+        self._lock = threading.Lock()
+        self._current = [0] * self._size
+        self._previous = [0] * self._size
+        self._current_rows = 0
+        self._previous_rows = 0
+        self.observed = 0
+
+    @classmethod
+    def from_file(cls, path, window=None):
+        window = window or int(os.environ.get('DRIFT_WINDOW', 10000))
+        return cls(load_profile(path), window)
+
+    def update(self, features, probabilities):
+        """Count a request's feature rows and predict_proba rows (or one row)"""
+        if features.ndim == 1 or len(features) == 1:
+            # bisect over Python lists beats numpy call overhead for one row
+            values = features.ravel().tolist()
+            values.append(float(probabilities.ravel()[-1]))
+            bins = [offset + bisect_right(edges, value)
+                    for (edges, offset), value in zip(self._single, values)]
+            with self._lock:
+                current = self._current
+                for index in bins:
+                    current[index] += 1
+                self._advance(1)
+            return
+
+        columns = np.column_stack([features, np.atleast_2d(probabilities)[:, 1]])
+        flat = np.concatenate([offset + np.searchsorted(edges, columns[:, j], side='right')
+                               for j, (edges, offset) in enumerate(self._single)])
+        counts = np.bincount(flat, minlength=self._size).tolist()
+        with self._lock:
+            self._current = [a + b for a, b in zip(self._current, counts)]
+            self._advance(len(features))
+
+    def _advance(self, rows):
+        self.observed += rows
+        self._current_rows += rows
+        if self._current_rows >= self.window:
+            self._previous, self._current = self._current, [0] * self._size
+            self._previous_rows, self._current_rows = self._current_rows, 0
+
+    def scores(self):
+        """Per-column PSI and binned KS over the current and previous windows"""
+        with self._lock:
+            counts = np.add(self._current, self._previous)
+            rows = self._current_rows + self._previous_rows
+        result = {}
+        for name, (offset, size), reference in zip(self.names, self._bounds, self._reference):
+            if rows < MIN_SCORED_SAMPLES:
+                result[name] = {'psi': None, 'ks': None, 'status': drift_status(None)}
+                continue
+            observed = counts[offset:offset + size] / rows
+            value = psi(observed, reference)
+            result[name] = {
+                'psi': round(value, 4),
+                'ks': round(binned_ks(observed, reference), 4),
+                'status': drift_status(value),
+            }
+        return result, rows
+
+    def snapshot(self):
+        columns, rows = self.scores()
+        features = {name: entry for name, entry in columns.items() if name != PROBABILITY}
+        scored = [entry['psi'] for entry in features.values() if entry['psi'] is not None]
+        max_psi = max(scored) if scored else None
+        return {
+            'observed': self.observed,
+            'window': self.window,
+            'scored_rows': rows,
+            'max_feature_psi': max_psi,
+            'status': drift_status(max_psi),
+            'prediction': columns[PROBABILITY],
+            'features': features,
+        }
+
+
+def main(argv=None):
+    import pandas as pd
+    from model_registry import ModelSpec, MODEL_FILE, DRIFT_PROFILE_FILE
+
+    parser = argparse.ArgumentParser(description='Save a drift reference profile for a trained model')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--data', default='synthetic_loan_data.csv', help='Reference (training) data')
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+        path = os.path.join(args.source, DRIFT_PROFILE_FILE)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl')
+        path = os.path.join(args.source, 'drift_profile_real.json')
+    model, preprocessor = spec.load()
+
+    df = pd.read_csv(args.data)
+    df.columns = df.columns.str.strip()
+    profile = build_profile(model, preprocessor.transform(df), preprocessor.feature_names, args.bins,
+                            model_version=spec.version)
+    save_profile(profile, path)
+
+    print("\n" + "="*70)
+    print(f"DRIFT REFERENCE PROFILE ({profile['n_samples']} rows, model {profile['model_version']})")
+    print("="*70)
+    for column in profile['features'] + [dict(profile['probability'], name=PROBABILITY)]:
+        print(f"  {column['name']:20s} {len(column['reference']):>3d} bins")
+    print(f"\n✓ Profile saved to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    main()
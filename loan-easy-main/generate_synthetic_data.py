@@ -7,7 +7,7 @@ import numpy as np
 
 np.random.seed(42)
 
-def generate_synthetic_loan_data(n_samples=10000):
+def generate_synthetic_loan_data(n_samples=10000, verbose=True):
     """
     Generate realistic synthetic loan application data
     Features: ApplicantIncome, CoapplicantIncome, LoanAmount, Loan_Amount_Term,
@@ -15,10 +15,11 @@ def generate_synthetic_loan_data(n_samples=10000):
               Self_Employed, Property_Area
     """
     
-    print("="*70)
-    print("GENERATING SYNTHETIC LOAN DATA")
-    print("="*70)
-    print(f"Target samples: {n_samples}")
+    if verbose:
+        print("="*70)
+        print("GENERATING SYNTHETIC LOAN DATA")
+        print("="*70)
+        print(f"Target samples: {n_samples}")
     
     # Generate features with realistic distributions
     data = {
@@ -28,7 +29,7 @@ def generate_synthetic_loan_data(n_samples=10000):
         # Co-applicant income (many have 0, others have reasonable income)
         'CoapplicantIncome': np.concatenate([
             np.zeros(int(n_samples * 0.4)),  # 40% have no co-applicant
-            np.random.gamma(shape=2, scale=1000, size=int(n_samples * 0.6)).astype(int) + 1000
+            np.random.gamma(shape=2, scale=1000, size=n_samples - int(n_samples * 0.4)).astype(int) + 1000
         ]),
         
         # Loan amount in thousands (realistic range: $50k - $500k)
@@ -74,93 +75,60 @@ def generate_synthetic_loan_data(n_samples=10000):
     
     # Generate target variable based on explainable rules
     # Credit history is the strongest factor, followed by income-to-loan ratio
-    df['Loan_Status'] = 'N'  # Default: Not approved
+    if verbose:
+        print("\nApplying approval logic...")
     
-    print("\nApplying approval logic...")
+    # CREDIT HISTORY - Strongest factor (worth 5 points)
+    # Poor credit is a major red flag
+    score = np.where(df['Credit_History'] == 1, 5.0, -3.0)
     
-    for idx, row in df.iterrows():
-        score = 0
-        
-        # CREDIT HISTORY - Strongest factor (worth 5 points)
-        if row['Credit_History'] == 1:
-            score += 5
-        else:
-            score -= 3  # Poor credit is a major red flag
-        
-        # INCOME-TO-LOAN RATIO - Second most important
-        total_income = row['ApplicantIncome'] + row['CoapplicantIncome']
-        loan_amount_dollars = row['LoanAmount'] * 1000
-        
-        if total_income > 0:
-            # Monthly payment estimation (rough)
-            loan_to_income_ratio = loan_amount_dollars / (total_income * 12)
-            
-            if loan_to_income_ratio < 2:  # Very affordable
-                score += 4
-            elif loan_to_income_ratio < 3:  # Affordable
-                score += 3
-            elif loan_to_income_ratio < 4:  # Manageable
-                score += 2
-            elif loan_to_income_ratio < 5:  # Stretching
-                score += 1
-            else:  # Too high
-                score -= 1
-        
-        # HOUSEHOLD INCOME - Total income matters
-        if total_income > 10000:
-            score += 2
-        elif total_income > 7000:
-            score += 1
-        elif total_income < 3000:
-            score -= 1
-        
-        # EDUCATION - Slight positive factor
-        if row['Education'] == 'Graduate':
-            score += 1
-        
-        # MARRIED - Stability factor
-        if row['Married'] == 'Yes':
-            score += 1
-        
-        # PROPERTY AREA - Urban properties may have better prospects
-        if row['Property_Area'] == 'Urban':
-            score += 1
-        elif row['Property_Area'] == 'Rural':
-            score -= 0.5
-        
-        # SELF EMPLOYED - Slight risk factor
-        if row['Self_Employed'] == 'Yes':
-            score -= 0.5
-        
-        # DEPENDENTS - More dependents = more financial burden
-        if row['Dependents'] == '3+':
-            score -= 1
-        elif row['Dependents'] in ['1', '2']:
-            score -= 0.5
-        
-        # LOAN TERM - Longer terms are easier to approve
-        if row['Loan_Amount_Term'] >= 360:
-            score += 0.5
-        
-        # FINAL APPROVAL DECISION
-        # High score = definitely approved
-        if score >= 8:
-            df.at[idx, 'Loan_Status'] = 'Y'
-        # Good score = likely approved
-        elif score >= 6:
-            if np.random.random() > 0.15:  # 85% approval
-                df.at[idx, 'Loan_Status'] = 'Y'
-        # Medium score = 50/50 chance
-        elif score >= 4:
-            if np.random.random() > 0.5:
-                df.at[idx, 'Loan_Status'] = 'Y'
-        # Low score = small chance
-        elif score >= 2:
-            if np.random.random() > 0.85:  # 15% approval
-                df.at[idx, 'Loan_Status'] = 'Y'
-        # Very low score = rejection
-        else:
-            df.at[idx, 'Loan_Status'] = 'N'
+    # INCOME-TO-LOAN RATIO - Second most important
+    total_income = (df['ApplicantIncome'] + df['CoapplicantIncome']).to_numpy()
+    loan_amount_dollars = df['LoanAmount'].to_numpy() * 1000
+    loan_to_income_ratio = np.divide(loan_amount_dollars, total_income * 12,
+                                     out=np.full(n_samples, np.inf), where=total_income > 0)
+    # Very affordable (< 2), affordable, manageable, stretching, too high (>= 5)
+    ratio_points = np.select(
+        [loan_to_income_ratio < 2, loan_to_income_ratio < 3, loan_to_income_ratio < 4,
+         loan_to_income_ratio < 5],
+        [4, 3, 2, 1], default=-1)
+    score += np.where(total_income > 0, ratio_points, 0)
+    
+    # HOUSEHOLD INCOME - Total income matters
+    score += np.select([total_income > 10000, total_income > 7000, total_income < 3000],
+                       [2, 1, -1], default=0)
+    
+    # EDUCATION - Slight positive factor
+    score += np.where(df['Education'] == 'Graduate', 1, 0)
+    
+    # MARRIED - Stability factor
+    score += np.where(df['Married'] == 'Yes', 1, 0)
+    
+    # PROPERTY AREA - Urban properties may have better prospects
+    score += np.select([df['Property_Area'] == 'Urban', df['Property_Area'] == 'Rural'],
+                       [1, -0.5], default=0)
+    
+    # SELF EMPLOYED - Slight risk factor
+    score -= np.where(df['Self_Employed'] == 'Yes', 0.5, 0)
+    
+    # DEPENDENTS - More dependents = more financial burden
+    score -= np.select([df['Dependents'] == '3+', df['Dependents'].isin(['1', '2'])],
+                       [1, 0.5], default=0)
+    
+    # LOAN TERM - Longer terms are easier to approve
+    score += np.where(df['Loan_Amount_Term'] >= 360, 0.5, 0)
+    
+    # FINAL APPROVAL DECISION
+    # High score = definitely approved; good score = 85% approval;
+    # medium score = 50/50 chance; low score = 15% approval;
+    # very low score = rejection
+    approved = score >= 8
+    chance = np.select([score >= 8, score >= 6, score >= 4, score >= 2],
+                       [np.nan, 0.15, 0.5, 0.85], default=np.nan)
+    # One draw per row in the chance bands, in row order (as a per-row loop would)
+    drawn = ~np.isnan(chance)
+    approved[drawn] = np.random.random(drawn.sum()) > chance[drawn]
+    df['Loan_Status'] = np.where(approved, 'Y', 'N')
     
     return df
 
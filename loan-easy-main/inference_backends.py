@@ -0,0 +1,496 @@
+"""
+Interchangeable inference backends for the fitted tree ensemble
+Every backend exposes predict_proba/predict with sklearn's semantics:
+
+- sklearn:  the fitted estimator itself
+- flat:     all trees concatenated into flat node arrays, traversed level by
+            level for the whole (rows x trees) block at once
+- codegen:  the ensemble compiled to nested Python if/else source (no numpy
+            per row, best at batch size 1)
+- binned:   rows converted to uint8/uint16 codes against each feature's sorted
+            split thresholds; trees evaluated with per-code leaf bitmask
+            lookup tables (no float comparisons)
+- early_exit: predict() stops adding trees once the remaining ones provably
+            cannot flip the class; predict_proba is the exact full sum
+
+The tree backends compare float32 inputs against the stored thresholds and
+add leaf values tree by tree in ensemble order, exactly like sklearn, so the
+gradient boosting probabilities are bit-for-bit identical.
+"""
+import numpy as np
+from scipy.special import expit
+from sklearn.dummy import DummyClassifier
+
+from tree_utils import ensemble_trees, node_values, init_log_odds, split_thresholds
+
+# CPython's parser rejects more than ~100 nested indentation levels
+MAX_CODEGEN_DEPTH = 90
+
+
+class SklearnBackend:
+    """Reference backend: delegate to the fitted estimator"""
+
+    name = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+class _TreeBackend:
+    """Shared ensemble bookkeeping for the backends that walk trees themselves"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.trees, self.scale, self.output_space = ensemble_trees(model)
+        # Exponential-loss boosting maps raw scores through expit(2 * raw)
+        self.logit_scale = 2.0 if getattr(model, 'loss', None) == 'exponential' else 1.0
+
+        # The default 'prior' init is a constant; anything else is evaluated per call
+        self._init = None
+        if self.output_space == 'log_odds':
+            init = model.init_
+            if isinstance(init, DummyClassifier) and init.strategy == 'prior':
+                self._init = float(init_log_odds(model, np.zeros((1, model.n_features_in_)))[0])
+
+    def init_scores(self, X):
+        """Starting score per row before any tree is added"""
+        if self.output_space != 'log_odds':
+            return np.zeros(len(X))
+        if self._init is not None:
+            return np.full(len(X), self._init)
+        return init_log_odds(self.model, X)
+
+    def _to_proba(self, raw):
+        proba = np.ones((raw.shape[0], 2), dtype=np.float64)
+        if self.output_space == 'log_odds':
+            proba[:, 1] = expit(self.logit_scale * raw)
+        else:
+            proba[:, 1] = raw
+        proba[:, 0] -= proba[:, 1]
+        return proba
+
+    def predict_proba(self, X):
+        return self._to_proba(self.decision_function(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class FlatTreeBackend(_TreeBackend):
+    """All trees in shared flat arrays, evaluated one depth level at a time"""
+
+    name = 'flat'
+
+    def __init__(self, model):
+        super().__init__(model)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for tree in self.trees:
+            t = tree.tree_
+            n = t.node_count
+            leaf = t.children_left == -1
+            own = np.arange(n) + offset
+            roots.append(offset)
+            features.append(np.where(leaf, 0, t.feature))
+            # Leaves loop back to themselves, so extra levels are no-ops
+            thresholds.append(np.where(leaf, np.inf, t.threshold))
+            lefts.append(np.where(leaf, own, t.children_left + offset))
+            rights.append(np.where(leaf, own, t.children_right + offset))
+            values.append(self.scale * node_values(tree, self.output_space))
+            depth = max(depth, t.max_depth)
+            offset += n
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    def leaves(self, X):
+        """(rows x trees) matrix of reached leaf indices into the flat arrays"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def decision_function(self, X):
+        leaf_values = self.value[self.leaves(X)]
+        # cumsum adds strictly left to right: init, then one tree at a time,
+        # which is sklearn's accumulation order (a pairwise sum() is not)
+        scores = np.column_stack([self.init_scores(X), leaf_values])
+        return np.cumsum(scores, axis=1)[:, -1]
+
+
+def _tree_source(tree, values, lines, indent):
+    """Emit nested if/else statements that add one tree's leaf value"""
+    t = tree.tree_
+    stack = [(0, indent)]
+    while stack:
+        node, level = stack.pop()
+        pad = '    ' * level
+        if isinstance(node, str):
+            lines.append(pad + node)
+            continue
+        left = t.children_left[node]
+        if left == -1:
+            lines.append(f"{pad}raw += {float(values[node])!r}")
+            continue
+        lines.append(f"{pad}if x[{int(t.feature[node])}] <= {float(t.threshold[node])!r}:")
+        # Pushed in reverse: left subtree, then 'else:', then right subtree
+        stack.append((int(t.children_right[node]), level + 1))
+        stack.append(('else:', level))
+        stack.append((int(left), level + 1))
+
+
+class CodegenBackend(_TreeBackend):
+    """Ensemble compiled into one generated Python function"""
+
+    name = 'codegen'
+
+    def __init__(self, model):
+        super().__init__(model)
+        depth = max(tree.tree_.max_depth for tree in self.trees)
+        if depth > MAX_CODEGEN_DEPTH:
+            raise ValueError(f"Trees of depth {depth} are too deep to compile "
+                             f"(max {MAX_CODEGEN_DEPTH})")
+        lines = ['def score(x, raw):']
+        for tree in self.trees:
+            values = self.scale * node_values(tree, self.output_space)
+            _tree_source(tree, values, lines, 1)
+        lines.append('    return raw')
+        self.source = '\n'.join(lines) + '\n'
+        namespace = {}
+        exec(compile(self.source, '<generated ensemble>', 'exec'), namespace)
+        self._score = namespace['score']
+
+    def decision_function(self, X):
+        # float32 -> Python floats keeps the exact values sklearn compares
+        X = np.asarray(X, dtype=np.float32)
+        init = self.init_scores(X).tolist()
+        rows = X.tolist()
+        score = self._score
+        return np.array([score(x, raw) for x, raw in zip(rows, init)], dtype=np.float64)
+
+
+def _code_dtype(n_codes):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_codes <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Too many split thresholds per feature ({n_codes})")
+
+
+def _leaf_order(t):
+    """Leaves left to right, and the leaves under each node's left child"""
+    leaves = []
+    left_leaves = {}
+    # Post-order walk: a node's leaves are contiguous in left-to-right order
+    span = {}
+    stack = [(0, False)]
+    while stack:
+        node, visited = stack.pop()
+        left, right = t.children_left[node], t.children_right[node]
+        if left == -1:
+            span[node] = (len(leaves), len(leaves) + 1)
+            leaves.append(node)
+        elif visited:
+            span[node] = (span[left][0], span[right][1])
+            left_leaves[node] = span[left]
+        else:
+            stack.extend([(node, True), (int(right), False), (int(left), False)])
+    return leaves, left_leaves
+
+
+class BinnedBackend(_TreeBackend):
+    """
+    Trees evaluated on integer bin codes instead of float features
+
+    Each feature's split thresholds t_0 < ... < t_m are collected at load time
+    and a value x is encoded as code = #{t_k < x} (searchsorted 'left'), so
+    x <= t_k  <=>  code <= k  for every split. Codes fit uint8 when every
+    feature has fewer than 256 thresholds, uint16 otherwise.
+
+    Trees with at most 64 leaves use leaf bitmasks: a row that goes right at
+    a node can never reach that node's left-subtree leaves, so for every
+    feature and code a table holds, per tree, the leaves still reachable.
+    AND-ing one table column per feature leaves the exit leaf as the lowest
+    set bit (leaves are numbered left to right). Features with few codes share
+    one table indexed by their combined code. Deeper trees walk the nodes
+    level by level on the codes. Leaf values are added tree by tree in
+    ensemble order, as sklearn does (forest averages can differ in the last
+    bit). Group indices are computed in intp: with uint8 codes the product
+    code * stride would otherwise wrap.
+    """
+
+    name = 'binned'
+    MAX_MASK_LEAVES = 64
+    # Features are merged into one lookup table while it has at most this many codes
+    MAX_GROUP_CODES = 8192
+    BLOCK_ROWS = 1024
+
+    def __init__(self, model):
+        super().__init__(model)
+        n_features = model.n_features_in_
+        self.thresholds = split_thresholds(model, n_features)
+        self.used_features = [f for f in range(n_features) if len(self.thresholds[f])]
+        self.code_dtype = _code_dtype(max([len(t) for t in self.thresholds] + [1]))
+
+        orders = [_leaf_order(tree.tree_) for tree in self.trees]
+        max_leaves = max(len(leaves) for leaves, _ in orders)
+        self.use_masks = max_leaves <= self.MAX_MASK_LEAVES
+        if self.use_masks:
+            self._build_masks(orders, max_leaves)
+        else:
+            self._build_nodes()
+
+    def _threshold_code(self, feature, threshold):
+        return int(np.searchsorted(self.thresholds[feature], threshold))
+
+    def _feature_groups(self):
+        """Features sharing a lookup table, few-code features packed together"""
+        groups, group, size = [], [], 1
+        for f in sorted(self.used_features, key=lambda f: len(self.thresholds[f])):
+            codes = len(self.thresholds[f]) + 1
+            if group and size * codes > self.MAX_GROUP_CODES:
+                groups.append(group)
+                group, size = [], 1
+            group.append(f)
+            size *= codes
+        return groups + [group] if group else groups
+
+    def _build_masks(self, orders, max_leaves):
+        self.mask_dtype = np.uint32 if max_leaves <= 32 else np.uint64
+        n_trees = len(self.trees)
+        full = np.iinfo(self.mask_dtype).max
+        # Per feature: (trees x codes) leaves of each tree reachable given the code
+        tables = {f: np.full((n_trees, len(self.thresholds[f]) + 1), full, dtype=self.mask_dtype)
+                  for f in self.used_features}
+        leaf_values = np.zeros((n_trees, max_leaves), dtype=np.float64)
+        for i, (tree, (leaves, left_leaves)) in enumerate(zip(self.trees, orders)):
+            t = tree.tree_
+            values = self.scale * node_values(tree, self.output_space)
+            leaf_values[i, :len(leaves)] = values[leaves]
+            for node, (start, stop) in left_leaves.items():
+                feature = int(t.feature[node])
+                code = self._threshold_code(feature, t.threshold[node])
+                left_bits = sum(1 << bit for bit in range(start, stop))
+                # code > k means x > t_k: the row goes right at this node
+                tables[feature][i, code + 1:] &= self.mask_dtype(full ^ left_bits)
+
+        # One table per group, indexed by the mixed-radix code of its features
+        self.groups = []
+        for group in self._feature_groups():
+            sizes = [len(self.thresholds[f]) + 1 for f in group]
+            strides = [int(np.prod(sizes[k + 1:])) for k in range(len(group))]
+            table = np.full((n_trees,) + tuple(sizes), full, dtype=self.mask_dtype)
+            for k, f in enumerate(group):
+                shape = [n_trees] + [1] * len(group)
+                shape[k + 1] = sizes[k]
+                table &= tables[f].reshape(shape)
+            self.groups.append((group, strides, table.reshape(n_trees, -1)))
+
+        # The lowest set bit is a power of two, exact as a float: its biased
+        # exponent field gives the leaf position, folded into the row offsets
+        if self.mask_dtype == np.uint32:
+            self._float, self._int, self._shift, bias = np.float32, np.int32, 23, 127
+        else:
+            self._float, self._int, self._shift, bias = np.float64, np.int64, 52, 1023
+        self.leaf_values = leaf_values
+        self._leaf_offsets = (np.arange(n_trees) * max_leaves - bias)[:, None]
+
+    def _build_nodes(self):
+        features, codes, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        never = np.iinfo(self.code_dtype).max
+        for tree in self.trees:
+            t = tree.tree_
+            n = t.node_count
+            leaf = t.children_left == -1
+            own = np.arange(n) + offset
+            roots.append(offset)
+            features.append(np.where(leaf, 0, t.feature))
+            # Leaves always "go left" to themselves, so extra levels are no-ops
+            codes.append([never if leaf[node] else self._threshold_code(t.feature[node], t.threshold[node])
+                          for node in range(n)])
+            lefts.append(np.where(leaf, own, t.children_left + offset))
+            rights.append(np.where(leaf, own, t.children_right + offset))
+            values.append(self.scale * node_values(tree, self.output_space))
+            depth = max(depth, t.max_depth)
+            offset += n
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.code = np.concatenate(codes).astype(self.code_dtype)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    def encode(self, X):
+        """(rows x features) bin codes, one searchsorted per split feature"""
+        # sklearn compares the float32 input against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        codes = np.zeros(X.shape, dtype=self.code_dtype)
+        for f in self.used_features:
+            codes[:, f] = np.searchsorted(self.thresholds[f], X[:, f].astype(np.float64))
+        return codes
+
+    def tree_values(self, codes):
+        """(trees x rows) value of the leaf each row reaches in each tree"""
+        if not self.use_masks:
+            rows = np.arange(len(codes))[:, None]
+            node = np.repeat(self.roots[None, :], len(codes), axis=0)
+            for _ in range(self.depth):
+                go_left = codes[rows, self.feature[node]] <= self.code[node]
+                node = np.where(go_left, self.left[node], self.right[node])
+            return self.value[node].T
+
+        reachable = None
+        for group, strides, table in self.groups:
+            index = codes[:, group[0]].astype(np.intp) * strides[0]
+            for f, stride in zip(group[1:], strides[1:]):
+                index += codes[:, f].astype(np.intp) * stride
+            masks = table.take(index, axis=1)
+            if reachable is None:
+                reachable = masks
+            else:
+                reachable &= masks
+        lowest = reachable & (~reachable + self.mask_dtype(1))
+        exponent = lowest.astype(self._float).view(self._int) >> self._shift
+        return self.leaf_values.ravel().take(self._leaf_offsets + exponent)
+
+    def decision_function(self, X):
+        init = self.init_scores(X)
+        codes = self.encode(X)
+        raw = np.empty(len(codes), dtype=np.float64)
+        # Row blocks bound the (trees x rows) temporaries and stay in cache
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            stop = start + self.BLOCK_ROWS
+            values = self.tree_values(codes[start:stop])
+            scores = np.empty((len(values) + 1, values.shape[1]), dtype=np.float64)
+            scores[0] = init[start:stop]
+            scores[1:] = values
+            # Reducing over the outer axis adds row after row: init, then one
+            # tree at a time, which is sklearn's accumulation order
+            np.add.reduce(scores, axis=0, out=raw[start:stop])
+        return raw
+
+
+class EarlyExitBackend(_TreeBackend):
+    """
+    Labels that stop adding trees once the rest cannot change the class
+
+    Trees are ordered by the spread of their leaf values, largest first. After
+    k trees the remaining ones can move the score by at least the sum of their
+    smallest leaves and at most the sum of their largest, so a row whose
+    partial score is past the decision cut by more than that is decided. The
+    ordered trees and those checks are compiled into one generated function
+    (as CodegenBackend). predict_proba always evaluates every tree (exact).
+
+    Exiting only pays per row: for larger batches sklearn's compiled walk
+    over all trees is faster than any numpy early exit, so those go to the
+    fitted model.
+    """
+
+    name = 'early_exit'
+    # Slack on the bound checks; covers rounding of the reordered partial sums
+    EPSILON = 1e-9
+    # Above this many rows the model's own predict is faster
+    MAX_LOOP_ROWS = 16
+
+    def __init__(self, model):
+        super().__init__(model)
+        depth = max(tree.tree_.max_depth for tree in self.trees)
+        if depth > MAX_CODEGEN_DEPTH:
+            raise ValueError(f"Trees of depth {depth} are too deep to compile "
+                             f"(max {MAX_CODEGEN_DEPTH})")
+        # Class 1 iff the score is above the cut: raw > 0 is p > 0.5
+        self.cut = 0.0 if self.output_space == 'log_odds' else 0.5
+        values = [self.scale * node_values(tree, self.output_space) for tree in self.trees]
+        leaves = [tree.tree_.children_left == -1 for tree in self.trees]
+        low = np.array([v[leaf].min() for v, leaf in zip(values, leaves)])
+        high = np.array([v[leaf].max() for v, leaf in zip(values, leaves)])
+        self.order = np.argsort(-(high - low), kind='stable')
+
+        # remaining_*[k]: bounds on what the trees after the k-th can still add
+        n_trees = len(self.trees)
+        self.remaining_low = np.zeros(n_trees + 1)
+        self.remaining_high = np.zeros(n_trees + 1)
+        self.remaining_low[:-1] = np.cumsum(low[self.order][::-1])[::-1]
+        self.remaining_high[:-1] = np.cumsum(high[self.order][::-1])[::-1]
+        upper = self.cut - self.remaining_low + self.EPSILON
+        lower = self.cut - self.remaining_high - self.EPSILON
+
+        lines = ['def decide(x, raw):']
+        for k, i in enumerate(self.order, 1):
+            _tree_source(self.trees[i], values[i], lines, 1)
+            lines.append(f"    if raw > {float(upper[k])!r}: return 1, {k}")
+            lines.append(f"    if raw < {float(lower[k])!r}: return 0, {k}")
+        # Within EPSILON of the cut after every tree: the caller asks the model
+        lines.append(f"    return -1, {n_trees}")
+        namespace = {}
+        exec(compile('\n'.join(lines) + '\n', '<generated early exit>', 'exec'), namespace)
+        self._decide = namespace['decide']
+
+        self.rows = 0
+        self.trees_evaluated = 0
+
+    @property
+    def average_trees(self):
+        """Trees evaluated per row by predict() so far"""
+        return self.trees_evaluated / self.rows if self.rows else 0.0
+
+    def decide(self, X):
+        """(class index, trees evaluated) per row"""
+        X = np.asarray(X, dtype=np.float32)
+        init = self.init_scores(X)
+        labels = np.empty(len(X), dtype=np.intp)
+        used = np.empty(len(X), dtype=np.intp)
+        for j, (row, raw) in enumerate(zip(X.tolist(), init.tolist())):
+            labels[j], used[j] = self._decide(row, raw)
+        undecided = labels == -1
+        if undecided.any():
+            labels[undecided] = np.argmax(self.model.predict_proba(X[undecided]), axis=1)
+        return labels, used
+
+    def predict(self, X):
+        if len(X) > self.MAX_LOOP_ROWS:
+            return self.model.predict(X)
+        labels, used = self.decide(X)
+        self.rows += len(labels)
+        self.trees_evaluated += int(used.sum())
+        return self.classes_[labels]
+
+    def predict_proba(self, X):
+        # Confidences need every tree
+        return self.model.predict_proba(X)
+
+
+BACKENDS = {
+    SklearnBackend.name: SklearnBackend,
+    FlatTreeBackend.name: FlatTreeBackend,
+    CodegenBackend.name: CodegenBackend,
+    BinnedBackend.name: BinnedBackend,
+    EarlyExitBackend.name: EarlyExitBackend,
+}
+
+
+def make_backend(name, model):
+    """Instantiate a registered backend for a fitted model"""
+    try:
+        return BACKENDS[name](model)
+    except KeyError:
+        raise ValueError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}") from None
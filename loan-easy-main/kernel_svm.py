@@ -0,0 +1,106 @@
+"""
+Scalable RBF-kernel SVM candidate
+Nystroem kernel approximation + linear SVM with sigmoid-calibrated probabilities.
+Fit cost grows linearly with the number of rows, unlike the exact
+SVC(kernel='rbf', probability=True) whose fit is quadratic to cubic in rows
+and runs an extra internal 5-fold Platt calibration.
+"""
+import time
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.kernel_approximation import Nystroem
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC, LinearSVC
+
+
+def make_approx_svm(n_components=300, C=1.0, calibration_folds=3, random_state=42):
+    """Build the kernel-approximation SVM pipeline (picklable, no lambdas)"""
+    return Pipeline([
+        ('scale', StandardScaler()),
+        # gamma = 1 / n_features matches SVC(gamma='scale') on standardised data
+        ('kernel', Nystroem(kernel='rbf', n_components=n_components,
+                            random_state=random_state)),
+        ('svm', CalibratedClassifierCV(
+            LinearSVC(C=C, dual=False, random_state=random_state),
+            method='sigmoid', cv=calibration_folds)),
+    ])
+
+
+def make_exact_svm(random_state=42):
+    """
+    The exact RBF SVC on the same standardised input as make_approx_svm
+
+    SVC(gamma='scale') on standardised data uses gamma = 1 / n_features, the
+    Nystroem kernel above, so the comparison isolates the approximation.
+    """
+    return Pipeline([
+        ('scale', StandardScaler()),
+        ('svm', SVC(kernel='rbf', random_state=random_state, probability=True)),
+    ])
+
+
+def _fit_and_score(model, X_train, y_train, X_test, y_test):
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = model.predict_proba(X_test)
+    predict_time = time.perf_counter() - start
+
+    accuracy = accuracy_score(y_test, np.asarray(model.classes_)[proba.argmax(axis=1)])
+    return {'accuracy': accuracy, 'fit_time_s': fit_time, 'predict_time_s': predict_time}
+
+
+def compare_svm_variants(X_train, X_test, y_train, y_test, sizes=None,
+                         max_exact_rows=None, random_state=42):
+    """
+    Fit exact and approximate SVMs on growing training subsets
+
+    Returns one row per training size with accuracy, fit and predict time of
+    both variants. The exact SVC is skipped above `max_exact_rows`.
+    """
+    n_rows = len(X_train)
+    if sizes is None:
+        sizes = sorted({min(n_rows, s) for s in (1000, 2000, 4000, 8000, n_rows)})
+
+    rng = np.random.RandomState(random_state)
+    order = rng.permutation(n_rows)
+    X_train, X_test = np.asarray(X_train), np.asarray(X_test)
+    y_train = np.asarray(y_train)
+
+    rows = []
+    for size in sizes:
+        idx = order[:size]
+        row = {'train_rows': int(size)}
+        row['approx'] = _fit_and_score(make_approx_svm(random_state=random_state),
+                                       X_train[idx], y_train[idx], X_test, y_test)
+        if max_exact_rows is None or size <= max_exact_rows:
+            row['exact'] = _fit_and_score(make_exact_svm(random_state),
+                                          X_train[idx], y_train[idx], X_test, y_test)
+        rows.append(row)
+    return rows
+
+
+def print_svm_comparison(rows):
+    """Print the exact vs approximate SVM trade-off table"""
+    print(f"\n{'Rows':>8} | {'Exact acc':>9} {'fit s':>8} {'pred s':>8} | "
+          f"{'Approx acc':>10} {'fit s':>8} {'pred s':>8} | {'Speedup':>7}")
+    print('-' * 86)
+    for row in rows:
+        approx = row['approx']
+        exact = row.get('exact')
+        if exact:
+            speedup = exact['fit_time_s'] / max(approx['fit_time_s'], 1e-9)
+            exact_cols = (f"{exact['accuracy']:>9.4f} {exact['fit_time_s']:>8.2f} "
+                          f"{exact['predict_time_s']:>8.3f}")
+            speedup_col = f"{speedup:>6.1f}x"
+        else:
+            exact_cols = f"{'skipped':>9} {'-':>8} {'-':>8}"
+            speedup_col = f"{'-':>7}"
+        print(f"{row['train_rows']:>8} | {exact_cols} | "
+              f"{approx['accuracy']:>10.4f} {approx['fit_time_s']:>8.2f} "
+              f"{approx['predict_time_s']:>8.3f} | {speedup_col}")
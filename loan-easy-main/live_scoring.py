@@ -0,0 +1,341 @@
+"""
+Live scoring channels for interactive form previews
+A page opens one Server-Sent Events stream per form. The server keeps that
+session's encoded feature row, and the page POSTs only the fields that
+changed. Each patch re-encodes just those columns (and the derived features
+that depend on them); the stream thread re-scores the row and pushes the
+result. Patches that arrive while a score is being computed are coalesced,
+so a result that is already stale is dropped instead of sent. Every open
+stream holds a server thread, so each worker accepts at most `max_channels`.
+
+Benchmark:
+    python live_scoring.py --updates 2000
+"""
+import argparse
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+from inference_backends import make_backend
+from preprocessing import DERIVED_FEATURES, FORM_FIELDS
+
+DEFAULT_HEARTBEAT_S = 15.0
+DEFAULT_IDLE_TIMEOUT_S = 300.0
+DEFAULT_DEBOUNCE_S = 0.025
+# Single rows: the generated-code backend is ~10x faster than sklearn, same output
+DEFAULT_BACKEND = 'codegen'
+RETRY_MS = 3000
+
+
+class ChannelLimitError(Exception):
+    """All live channels of this worker are in use"""
+
+
+def sse_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class LiveSession:
+    """One form's encoded feature row and its update/score versions"""
+
+    def __init__(self, session_id, row, missing):
+        self.id = session_id
+        self.row = row
+        self.missing = set(missing)
+        self.version = 0
+        self.client_seq = -1
+        self.scored_version = 0
+        self.last_update = time.monotonic()
+        self.closed = False
+        self.changed = threading.Condition()
+
+
+class LiveChannels:
+    """Per-worker registry of live scoring sessions"""
+
+    def __init__(self, scorer, preprocessor, format_result, max_channels=4,
+                 debounce_s=DEFAULT_DEBOUNCE_S, heartbeat_s=DEFAULT_HEARTBEAT_S,
+                 idle_timeout_s=DEFAULT_IDLE_TIMEOUT_S):
+        self.scorer = scorer
+        self.preprocessor = preprocessor
+        self.format_result = format_result
+        self.max_channels = max_channels
+        self.debounce_s = debounce_s
+        self.heartbeat_s = heartbeat_s
+        self.idle_timeout_s = idle_timeout_s
+        self._index = {name: j for j, name in enumerate(preprocessor.feature_names)}
+        self._categorical = set(preprocessor.categorical_cols)
+        self._numeric = set(preprocessor.numeric_cols)
+        self._derived = [(self._index[name], DERIVED_FEATURES[name][0], DERIVED_FEATURES[name][1])
+                         for name in preprocessor.derived]
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+        self.updates = 0
+        self.scored = 0
+        self.coalesced = 0
+        self.unknown_session = 0
+        self.reaped = 0
+
+    @classmethod
+    def from_env(cls, model, preprocessor, format_result):
+        max_channels = int(os.environ.get('LIVE_MAX_CHANNELS', 0))
+        scorer = model
+        if max_channels > 0:
+            try:
+                scorer = make_backend(os.environ.get('LIVE_BACKEND', DEFAULT_BACKEND), model)
+            except (TypeError, ValueError):
+                # Not a (compilable) tree model: score with the model itself
+                scorer = model
+        return cls(
+            scorer, preprocessor, format_result,
+            max_channels=max_channels,
+            debounce_s=float(os.environ.get('LIVE_DEBOUNCE_MS', DEFAULT_DEBOUNCE_S * 1000)) / 1000,
+            idle_timeout_s=float(os.environ.get('LIVE_IDLE_TIMEOUT_S', DEFAULT_IDLE_TIMEOUT_S)),
+        )
+
+    def _reap_idle(self):
+        """Close sessions with no update for idle_timeout_s (e.g. clients that vanished)"""
+        cutoff = time.monotonic() - self.idle_timeout_s
+        with self._lock:
+            idle = [session_id for session_id, session in self._sessions.items()
+                    if session.last_update < cutoff]
+        for session_id in idle:
+            self.close(session_id)
+            self.reaped += 1
+
+    def _check_capacity(self):
+        # Caller holds self._lock
+        if len(self._sessions) >= self.max_channels:
+            self.rejected += 1
+            raise ChannelLimitError(f'{self.max_channels} live channels already open')
+
+    def open(self):
+        """
+        New session, or ChannelLimitError when the worker is at its cap
+
+        The session only takes a channel once its stream starts (events()),
+        so a response that is never streamed (HEAD, a client gone before the
+        first chunk) cannot hold one.
+        """
+        self._reap_idle()
+        with self._lock:
+            self._check_capacity()
+        row = np.zeros(len(self._index))
+        known = {}
+        for col, value in self.preprocessor.defaults.items():
+            known.update(self._encode(col, value))
+        for col, value in known.items():
+            row[self._index[col]] = value
+        missing = [col for col in self.preprocessor.input_fields if col not in known]
+        session = LiveSession(secrets.token_urlsafe(12), row, missing)
+        self._refresh_derived(session, set(known))
+        return session
+
+    def _register(self, session):
+        with self._lock:
+            self._check_capacity()
+            session.last_update = time.monotonic()
+            self._sessions[session.id] = session
+            self.opened += 1
+
+    def _encode(self, name, value):
+        """{feature: encoded value} for one form field or feature name"""
+        feature = FORM_FIELDS.get(name, name)
+        if feature in self._categorical:
+            return {feature: float(self.preprocessor.encode_categorical(feature, [value])[0])}
+        if feature in self._numeric:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                number = float('nan')
+            if not np.isfinite(number):
+                raise ValueError(f"Invalid number for '{name}': {value!r}")
+            return {feature: number}
+        raise ValueError(f"Unknown field: '{name}'")
+
+    def _refresh_derived(self, session, changed):
+        row, index = session.row, self._index
+        for j, inputs, func in self._derived:
+            if changed.intersection(inputs) and not session.missing.intersection(inputs):
+                columns = {col: row[index[col]:index[col] + 1] for col in inputs}
+                row[j] = func(columns)[0]
+
+    def update(self, session_id, fields, client_seq=None):
+        """
+        Apply changed fields to a session; returns its new version
+
+        Patches older than one already applied (by client sequence number)
+        are ignored, so out-of-order requests cannot roll a field back.
+        """
+        session = self._sessions.get(session_id)
+        if session is None or session.closed:
+            self.unknown_session += 1
+            raise KeyError(session_id)
+        encoded = {}
+        for name, value in fields.items():
+            encoded.update(self._encode(name, value))
+
+        with session.changed:
+            if client_seq is not None:
+                if client_seq <= session.client_seq:
+                    return session.version
+                session.client_seq = client_seq
+            for col, value in encoded.items():
+                session.row[self._index[col]] = value
+            session.missing.difference_update(encoded)
+            self._refresh_derived(session, set(encoded))
+            session.version += 1
+            session.last_update = time.monotonic()
+            session.changed.notify()
+            self.updates += 1
+            return session.version
+
+    def _wait_for_change(self, session):
+        """Latest (version, row copy) once a newer version settles, or None on timeout"""
+        with session.changed:
+            if session.version == session.scored_version:
+                session.changed.wait(self.heartbeat_s)
+            if session.version == session.scored_version or session.closed:
+                return None
+            # Debounce: let a burst of keystrokes settle before scoring
+            deadline = time.monotonic() + 4 * self.debounce_s
+            while self.debounce_s > 0:
+                version = session.version
+                session.changed.wait(min(self.debounce_s, max(0.0, deadline - time.monotonic())))
+                if session.version == version or time.monotonic() >= deadline:
+                    break
+            return session.version, session.row.copy(), sorted(session.missing)
+
+    def events(self, session):
+        """SSE stream for a session; closing the generator frees its channel"""
+        try:
+            # Streams opened concurrently may all have passed open()'s check
+            self._register(session)
+        except ChannelLimitError as e:
+            # The page stops the stream instead of reconnecting
+            yield sse_event('unavailable', {'error': f'Live scoring unavailable: {e}'})
+            return
+        try:
+            yield f'retry: {RETRY_MS}\n' + sse_event('session', {
+                'session': session.id,
+                'missing': sorted(session.missing),
+            })
+            while not session.closed:
+                change = self._wait_for_change(session)
+                if change is None:
+                    if time.monotonic() - session.last_update > self.idle_timeout_s:
+                        return
+                    yield ': keepalive\n\n'
+                    continue
+
+                version, row, missing = change
+                if missing:
+                    with session.changed:
+                        session.scored_version = version
+                    yield sse_event('incomplete', {'version': version, 'missing': missing}, version)
+                    continue
+                result = self.format_result(self.scorer.predict_proba(row.reshape(1, -1))[0])
+                self.scored += 1
+                with session.changed:
+                    session.scored_version = version
+                    stale = session.version != version
+                if stale:
+                    # A newer patch arrived while scoring; score that instead
+                    self.coalesced += 1
+                    continue
+                result['version'] = version
+                yield sse_event('score', result, version)
+        finally:
+            self.close(session.id)
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            with session.changed:
+                session.closed = True
+                session.changed.notify()
+
+    def snapshot(self):
+        return {
+            'open': len(self._sessions),
+            'max_channels': self.max_channels,
+            'opened': self.opened,
+            'rejected': self.rejected,
+            'updates': self.updates,
+            'scored': self.scored,
+            'coalesced': self.coalesced,
+            'unknown_session': self.unknown_session,
+            'reaped': self.reaped,
+        }
+
+
+def main(argv=None):
+    import pandas as pd
+    import app as serving
+
+    parser = argparse.ArgumentParser(description='Per-update cost: live channel vs full /predict posts')
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--data', default='synthetic_loan_data.csv')
+    args = parser.parse_args(argv)
+
+    if serving.model is None:
+        print("❌ Model not loaded")
+        return 1
+    channels = LiveChannels(make_backend(DEFAULT_BACKEND, serving.model), serving.preprocessor,
+                            serving.format_prediction, max_channels=1, debounce_s=0)
+    serving.live_channels = channels
+    client = serving.app.test_client()
+
+    df = pd.read_csv(args.data)
+    df.columns = df.columns.str.strip()
+    form = {field: str(df[feature].iloc[0]).strip() for field, feature in FORM_FIELDS.items()}
+    incomes = itertools.cycle(df['ApplicantIncome'].astype(str).tolist())
+
+    # One slider moving: only applicant_income changes between evaluations
+    predict_bytes = 0
+    start = time.perf_counter()
+    for _ in range(args.updates):
+        form['applicant_income'] = next(incomes)
+        response = client.post('/predict', data=form)
+        predict_bytes += len(urlencode(form)) + len(response.data)
+    predict_s = (time.perf_counter() - start) / args.updates
+
+    response = client.get('/live/stream', buffered=False)
+    stream = iter(response.response)
+    session_id = json.loads(next(stream).decode().split('data: ', 1)[1])['session']
+    client.post(f'/live/{session_id}', json={'seq': 0, 'fields': form})
+    next(stream)
+    live_bytes = 0
+    start = time.perf_counter()
+    for seq in range(1, args.updates + 1):
+        patch = {'seq': seq, 'fields': {'applicant_income': next(incomes)}}
+        ack = client.post(f'/live/{session_id}', json=patch)
+        live_bytes += len(json.dumps(patch)) + len(ack.data) + len(next(stream))
+    live_s = (time.perf_counter() - start) / args.updates
+    response.close()
+
+    print("\n" + "="*70)
+    print(f"LIVE SCORING ({args.updates} single-field updates, in-process)")
+    print("="*70)
+    print(f"  Full /predict post:      {predict_s*1e6:>8.0f} µs/update  "
+          f"{predict_bytes/args.updates:>5.0f} body bytes/update")
+    print(f"  Live patch + SSE event:  {live_s*1e6:>8.0f} µs/update  "
+          f"{live_bytes/args.updates:>5.0f} body bytes/update  ({predict_s/live_s:.2f}x)")
+    print(f"  Channel stats:           {channels.snapshot()}")
+    return 0
+
+
+if __name__ == '__main__':
+    main()
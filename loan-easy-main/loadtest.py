@@ -0,0 +1,430 @@
+"""
+Reproducible HTTP load test for the Flask app
+Drives wsgi:app either in-process (Flask test client) or through a locally
+started gunicorn, replaying applicant payloads sampled from
+synthetic_loan_data.csv at a fixed request rate (open loop) or with a fixed
+number of concurrent clients (closed loop). Writes a JSON report with
+throughput, latency percentiles and error rates so runs can be compared
+across commits.
+
+Usage:
+    python loadtest.py --target inprocess --concurrency 8 --duration 10
+    python loadtest.py --target gunicorn --workers 2 --threads 4 --rate 200
+    python loadtest.py --url http://127.0.0.1:5000 --mix predict:8,checker:1,futuristic:1
+    python loadtest.py ... --compare benchmarks/loadtest_baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import FORM_FIELDS
+
+DATA_FILE = 'synthetic_loan_data.csv'
+REPORT_DIR = 'benchmarks'
+BATCH_RECORDS = 16
+
+# Endpoint name -> (method, path); request bodies are built per payload
+ENDPOINTS = {
+    'predict': ('POST', '/predict'),
+    'batch': ('POST', '/predict/batch'),
+    'dashboard': ('GET', '/'),
+    'futuristic': ('GET', '/futuristic'),
+    'futuristic-v2': ('GET', '/futuristic-v2'),
+    'checker': ('GET', '/checker'),
+    'health': ('GET', '/health'),
+}
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+JSON_HEADERS = {'Content-Type': 'application/json'}
+PAGE_HEADERS = {'Accept-Encoding': 'gzip, br'}
+
+
+def load_payloads(path=DATA_FILE, n=1000, seed=42):
+    """Sample applicant records (feature-name keyed) from the synthetic data"""
+    df = pd.read_csv(path).drop(columns=['Loan_Status'], errors='ignore')
+    df = df.sample(n=min(n, len(df)), random_state=seed)
+    return df.to_dict('records')
+
+
+def to_form(record):
+    """Feature-name record -> HTML form fields posted by the checker page"""
+    return {field: record[feature] for field, feature in FORM_FIELDS.items()}
+
+
+def parse_mix(spec):
+    """'predict:8,checker:1' -> [('predict', 0.8), ('checker', 0.1), ...]"""
+    weights = []
+    for part in spec.split(','):
+        name, _, weight = part.partition(':')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}', expected one of {sorted(ENDPOINTS)}")
+        weights.append((name, float(weight or 1)))
+    total = sum(w for _, w in weights)
+    return [(name, w / total) for name, w in weights]
+
+
+def build_requests(mix, payloads, n, seed=42):
+    """Pre-build n (endpoint, method, path, body, headers) tuples"""
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [w for _, w in mix]
+    requests = []
+    for i in range(n):
+        name = rng.choices(names, weights)[0]
+        method, path = ENDPOINTS[name]
+        if name == 'predict':
+            body, headers = urlencode(to_form(payloads[i % len(payloads)])).encode(), FORM_HEADERS
+        elif name == 'batch':
+            start = (i * BATCH_RECORDS) % len(payloads)
+            records = (payloads + payloads)[start:start + BATCH_RECORDS]
+            body, headers = json.dumps({'applications': records}, default=float).encode(), JSON_HEADERS
+        else:
+            body, headers = None, PAGE_HEADERS
+        requests.append((name, method, path, body, headers))
+    return requests
+
+
+class InProcessTarget:
+    """Send requests through Flask's test client (no network, no server)"""
+
+    name = 'inprocess'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, method, path, body, headers):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+
+class HttpTarget:
+    """Send requests over HTTP with one persistent connection per thread"""
+
+    name = 'http'
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def send(self, method, path, body, headers):
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    self._local.conn = None
+                return response.status
+            except (http.client.HTTPException, ConnectionError, socket.timeout, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers=1, threads=1, worker_class='sync', port=None,
+                   extra_args=(), env=None, startup_timeout=60):
+    """Start gunicorn wsgi:app on localhost and wait for /health"""
+    port = port or free_port()
+    cmd = [sys.executable, '-m', 'gunicorn', 'wsgi:app',
+           '--bind', f'127.0.0.1:{port}',
+           '--workers', str(workers), '--threads', str(threads),
+           '--worker-class', worker_class, '--log-level', 'warning', *extra_args]
+    # Log to a file: an undrained pipe would eventually block the workers
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, env={**os.environ, **(env or {})},
+                               stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"gunicorn exited: {log.read().decode()[-2000:]}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not become healthy in time')
+
+
+def stop_process(process, timeout=10):
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _send(target, request, samples, lock, scheduled=None):
+    name, method, path, body, headers = request
+    start = time.perf_counter()
+    try:
+        status = target.send(method, path, body, headers)
+    except Exception:
+        status = 0
+    end = time.perf_counter()
+    # Open loop: measure from the scheduled send time (no coordinated omission)
+    latency = end - (scheduled if scheduled is not None else start)
+    with lock:
+        samples.append((name, status, latency, end))
+
+
+def run_closed_loop(target, requests, concurrency, duration):
+    """`concurrency` clients each send back-to-back requests for `duration` s"""
+    samples, lock = [], threading.Lock()
+    stop_at = time.perf_counter() + duration
+    counter = iter(range(10 ** 12))
+
+    def client():
+        while time.perf_counter() < stop_at:
+            i = next(counter)
+            _send(target, requests[i % len(requests)], samples, lock)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+def run_open_loop(target, requests, rate, duration, max_threads=256):
+    """Issue requests on a fixed schedule of `rate` per second for `duration` s"""
+    samples, lock = [], threading.Lock()
+    total = int(rate * duration)
+    start = time.perf_counter() + 0.05
+    schedule = iter(range(total))
+    schedule_lock = threading.Lock()
+
+    def dispatcher():
+        while True:
+            with schedule_lock:
+                i = next(schedule, None)
+            if i is None:
+                return
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            _send(target, requests[i % len(requests)], samples, lock, scheduled)
+
+    n_threads = min(max_threads, max(1, int(rate)))
+    threads = [threading.Thread(target=dispatcher, daemon=True) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+def _latency_stats(latencies):
+    if not len(latencies):
+        return {}
+    ms = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+        'mean_ms': round(float(ms.mean()), 3),
+    }
+
+
+def summarize(samples, elapsed):
+    """Aggregate samples into throughput, latency percentiles and error rates"""
+    statuses = {}
+    for _, status, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [latency for _, status, latency, _ in samples if 200 <= status < 400]
+    errors = len(samples) - len(ok)
+
+    endpoints = {}
+    for name in sorted({s[0] for s in samples}):
+        rows = [s for s in samples if s[0] == name]
+        ok_rows = [latency for _, status, latency, _ in rows if 200 <= status < 400]
+        endpoints[name] = {
+            'requests': len(rows),
+            'error_rate': round(1 - len(ok_rows) / len(rows), 4),
+            **_latency_stats(ok_rows),
+        }
+
+    return {
+        'requests': len(samples),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'ok_throughput_rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'status_counts': statuses,
+        'latency': _latency_stats(ok),
+        'endpoints': endpoints,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load(target, mix, payloads, mode, load, duration, warmup=1.0, seed=42):
+    """Warm up, run the measured phase and return the summary dict"""
+    requests = build_requests(mix, payloads, max(1000, len(payloads)), seed)
+    if warmup > 0:
+        run_closed_loop(target, requests, concurrency=2, duration=warmup)
+    if mode == 'rate':
+        samples, elapsed = run_open_loop(target, requests, load, duration)
+    else:
+        samples, elapsed = run_closed_loop(target, requests, int(load), duration)
+    return summarize(samples, elapsed)
+
+
+def print_summary(report):
+    result = report['result']
+    lat = result['latency']
+    print(f"\n{'='*70}")
+    print(f"LOAD TEST ({report['config']['target']}, {report['config']['mode']}={report['config']['load']})")
+    print('='*70)
+    print(f"Requests:    {result['requests']} in {result['elapsed_s']:.1f}s "
+          f"→ {result['throughput_rps']:.1f} req/s ({result['ok_throughput_rps']:.1f} ok/s)")
+    print(f"Errors:      {result['error_rate']*100:.2f}%  {result['status_counts']}")
+    if lat:
+        print(f"Latency ms:  p50 {lat['p50_ms']:.2f}  p95 {lat['p95_ms']:.2f}  "
+              f"p99 {lat['p99_ms']:.2f}  max {lat['max_ms']:.2f}")
+    for name, stats in result['endpoints'].items():
+        if 'p99_ms' in stats:
+            print(f"  {name:14s} {stats['requests']:>7} req  p50 {stats['p50_ms']:.2f}  "
+                  f"p99 {stats['p99_ms']:.2f}  errors {stats['error_rate']*100:.2f}%")
+
+
+def print_comparison(report, baseline):
+    """Relative change of the headline metrics against a previous report"""
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    new, old = report['result'], baseline['result']
+    rows = [('throughput_rps', new['throughput_rps'], old['throughput_rps'])]
+    for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'):
+        if key in new['latency'] and key in old['latency']:
+            rows.append((key, new['latency'][key], old['latency'][key]))
+    rows.append(('error_rate', new['error_rate'], old['error_rate']))
+    for key, now, before in rows:
+        change = (now - before) / before * 100 if before else 0.0
+        print(f"  {key:15s} {before:>10.3f} → {now:>10.3f}  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the loan prediction app')
+    parser.add_argument('--target', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--url', help='Drive an already running server instead')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=int, help='Closed loop: concurrent clients')
+    load.add_argument('--rate', type=float, help='Open loop: requests per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Warm-up seconds')
+    parser.add_argument('--mix', default='predict:1', help="Endpoint weights, e.g. 'predict:8,checker:1'")
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--payloads', type=int, default=1000, help='Distinct applicants sampled')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Report path (default benchmarks/loadtest_<commit>_<time>.json)')
+    parser.add_argument('--compare', help='Previous report to compare against')
+    args = parser.parse_args(argv)
+
+    mode, load_value = ('rate', args.rate) if args.rate else ('concurrency', args.concurrency or 4)
+    mix = parse_mix(args.mix)
+    payloads = load_payloads(args.data, args.payloads, args.seed)
+
+    process = None
+    if args.url:
+        target, target_name = HttpTarget(args.url), 'url'
+    elif args.target == 'gunicorn':
+        process, url = start_gunicorn(args.workers, args.threads, args.worker_class)
+        target, target_name = HttpTarget(url), 'gunicorn'
+    else:
+        from wsgi import app
+        target, target_name = InProcessTarget(app), 'inprocess'
+
+    try:
+        result = run_load(target, mix, payloads, mode, load_value, args.duration, args.warmup, args.seed)
+    finally:
+        if process is not None:
+            stop_process(process)
+
+    report = {
+        'tool': 'loadtest',
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count()},
+        'config': {
+            'target': target_name, 'url': args.url, 'mode': mode, 'load': load_value,
+            'duration_s': args.duration, 'mix': dict(mix), 'payloads': len(payloads),
+            'seed': args.seed,
+            'gunicorn': ({'workers': args.workers, 'threads': args.threads,
+                          'worker_class': args.worker_class} if target_name == 'gunicorn' else None),
+        },
+        'result': result,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(REPORT_DIR, f"loadtest_{report['commit'] or 'local'}_{stamp}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    print(f"\n✓ Report saved to {output}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
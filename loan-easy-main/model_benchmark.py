@@ -0,0 +1,256 @@
+"""
+Serving-cost benchmarks for candidate models
+Measures fit time, peak fit memory, artifact size and predict_proba latency
+so that model selection can trade accuracy against serving cost
+"""
+import io
+import json
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+# Default number of timed calls for the latency benchmarks
+SINGLE_ROW_CALLS = 200
+BATCH_SIZE = 1000
+BATCH_CALLS = 20
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+def _child_pids(pid):
+    pids = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+
+def process_tree_rss(pid=None):
+    """
+    RSS of a process (default: this one) and all its descendants, e.g.
+    joblib or gunicorn workers; Linux only, elsewhere just this process
+    """
+    root = pid or os.getpid()
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = [root]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            if pid == root:
+                return current_rss() if root == os.getpid() else 0
+            continue
+        stack.extend(_child_pids(pid))
+    return total
+
+
+class PeakRSSSampler:
+    """Sample RSS in a background thread and record the peak above the start"""
+
+    def __init__(self, interval=0.01, rss=current_rss):
+        self.interval = interval
+        self.rss = rss
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.rss()
+        self.peak = self.baseline
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+        return False
+
+    @property
+    def peak_delta(self):
+        """Peak RSS growth over the baseline in bytes"""
+        return max(0, self.peak - self.baseline)
+
+
+def measure_fit(model, X_train, y_train):
+    """Fit the model and return (fit_time_s, peak_fit_memory_bytes)"""
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+    return fit_time, sampler.peak_delta
+
+
+def artifact_size(model):
+    """Size in bytes of the model as written by joblib.dump"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _percentiles_ms(timings):
+    timings = np.asarray(timings) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def measure_latency(model, X, single_calls=SINGLE_ROW_CALLS,
+                    batch_size=BATCH_SIZE, batch_calls=BATCH_CALLS):
+    """Time single-row and batch predict_proba calls, returning p50/p99 in ms"""
+    X = np.asarray(X)
+    n_rows = X.shape[0]
+
+    # Warm up caches and lazily-initialised estimator state
+    model.predict_proba(X[:1])
+
+    single = []
+    for i in range(single_calls):
+        row = X[i % n_rows:i % n_rows + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - start)
+
+    batch_rows = X[np.arange(batch_size) % n_rows]
+    batch = []
+    for _ in range(batch_calls):
+        start = time.perf_counter()
+        model.predict_proba(batch_rows)
+        batch.append(time.perf_counter() - start)
+
+    single_p50, single_p99 = _percentiles_ms(single)
+    batch_p50, batch_p99 = _percentiles_ms(batch)
+    return {
+        'single_p50_ms': single_p50,
+        'single_p99_ms': single_p99,
+        'batch_size': batch_size,
+        'batch_p50_ms': batch_p50,
+        'batch_p99_ms': batch_p99,
+    }
+
+
+def benchmark_model(model, X_sample):
+    """Collect serving-cost figures for an already fitted model"""
+    stats = measure_latency(model, X_sample)
+    stats['artifact_bytes'] = artifact_size(model)
+    return stats
+
+
+def select_best_model(results, max_latency_ms=None, max_size_bytes=None,
+                      accuracy_tolerance=0.0, latency_key='single_p99_ms'):
+    """
+    Pick the best candidate subject to serving budgets
+
+    Candidates over the latency or size budget are discarded. Among the rest,
+    every model within `accuracy_tolerance` of the best accuracy is considered
+    equivalent and the one with the lowest latency wins.
+    """
+    eligible = []
+    for name, result in results.items():
+        bench = result.get('benchmark', {})
+        if max_latency_ms is not None and bench.get(latency_key, 0) > max_latency_ms:
+            continue
+        if max_size_bytes is not None and bench.get('artifact_bytes', 0) > max_size_bytes:
+            continue
+        eligible.append(name)
+
+    if not eligible:
+        raise ValueError(
+            "No candidate model satisfies the serving budget "
+            f"(max_latency_ms={max_latency_ms}, max_size_bytes={max_size_bytes}): "
+            + ", ".join(f"{name} {format_benchmark(results[name].get('benchmark', {}))}"
+                        for name in results)
+        )
+
+    best_accuracy = max(results[name]['accuracy'] for name in eligible)
+    contenders = [name for name in eligible
+                  if results[name]['accuracy'] >= best_accuracy - accuracy_tolerance]
+    return min(contenders, key=lambda name: (
+        results[name].get('benchmark', {}).get(latency_key, 0),
+        -results[name]['accuracy'],
+    ))
+
+
+def format_benchmark(bench):
+    """One-line human readable summary of a benchmark dict"""
+    if not bench:
+        return '(not benchmarked)'
+    return (f"fit {bench.get('fit_time_s', 0):.2f}s, "
+            f"fit mem {bench.get('peak_fit_bytes', 0) / 1e6:.1f}MB, "
+            f"size {bench.get('artifact_bytes', 0) / 1e6:.2f}MB, "
+            f"single p50/p99 {bench.get('single_p50_ms', 0):.3f}/{bench.get('single_p99_ms', 0):.3f}ms, "
+            f"batch[{bench.get('batch_size', 0)}] p50/p99 "
+            f"{bench.get('batch_p50_ms', 0):.2f}/{bench.get('batch_p99_ms', 0):.2f}ms")
+
+
+def write_benchmark_info(f, results, selected_name):
+    """Append the per-candidate benchmark table to an open model info file"""
+    f.write("\nCandidate Benchmarks:\n")
+    for name, result in results.items():
+        marker = '*' if name == selected_name else ' '
+        f.write(f" {marker} {name}: accuracy {result['accuracy']:.4f}, "
+                f"{format_benchmark(result.get('benchmark', {}))}\n")
+
+
+def save_benchmarks_json(results, selected_name, path, budgets=None):
+    """Write the benchmark figures for every candidate as JSON"""
+    payload = {
+        'selected': selected_name,
+        'budgets': budgets or {},
+        'candidates': {
+            name: dict(accuracy=float(result['accuracy']),
+                       cv_score=float(result['cv_score']),
+                       **result.get('benchmark', {}))
+            for name, result in results.items()
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def add_budget_arguments(parser):
+    """Register the selection budget options on an argparse parser"""
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help='Reject candidates whose single-row p99 predict_proba latency exceeds this')
+    parser.add_argument('--max-size-mb', type=float, default=None,
+                        help='Reject candidates whose serialized artifact exceeds this size')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.0,
+                        help='Prefer the fastest model within this accuracy of the best')
+    return parser
+
+
+def budgets_from_args(args):
+    """Translate parsed budget arguments into select_best_model keyword arguments"""
+    return {
+        'max_latency_ms': args.max_latency_ms,
+        'max_size_bytes': None if args.max_size_mb is None else int(args.max_size_mb * 1e6),
+        'accuracy_tolerance': args.accuracy_tolerance,
+    }
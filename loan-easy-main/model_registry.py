@@ -0,0 +1,262 @@
+"""
+Registry of servable models, loaded lazily and unloaded LRU-first
+Each model lives in its own directory under Models/ (as written by
+train_model_real.py) with its fitted preprocessor, so its input schema comes
+from the artifacts rather than from app.py. Each loaded model is accounted as
+the largest of its artifact size, the RSS growth measured while loading it and
+the size of the arrays it holds (an unpickled estimator is usually bigger than
+its compressed file, and RSS growth is blurred by allocator reuse), and the
+least recently used ones are unloaded when the configured memory cap is
+exceeded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+from audit_log import file_digest
+from drift import DriftMonitor
+from model_benchmark import current_rss
+from preprocessing import LoanPreprocessor
+
+MODEL_FILE = 'model.pkl'
+PREPROCESSOR_FILE = 'preprocessor.pkl'
+ENCODERS_FILE = 'label_encoders.pkl'
+FEATURES_FILE = 'feature_names.pkl'
+DRIFT_PROFILE_FILE = 'drift_profile.json'
+BROWSER_BUNDLE_FILE = 'model_bundle.json'
+
+
+class ModelSpec:
+    """Where a named model's artifacts live"""
+
+    def __init__(self, name, directory, model_file=MODEL_FILE, preprocessor_file=PREPROCESSOR_FILE,
+                 encoders_file=ENCODERS_FILE, features_file=FEATURES_FILE,
+                 drift_profile_file=DRIFT_PROFILE_FILE, bundle_file=BROWSER_BUNDLE_FILE):
+        self.name = name
+        self.model_path = os.path.join(directory, model_file)
+        self.preprocessor_path = os.path.join(directory, preprocessor_file)
+        self.encoders_path = os.path.join(directory, encoders_file)
+        self.features_path = os.path.join(directory, features_file)
+        self.drift_profile_path = os.path.join(directory, drift_profile_file)
+        self.bundle_path = os.path.join(directory, bundle_file)
+
+    @property
+    def artifact_bytes(self):
+        """On-disk size of the artifacts kept in memory once loaded"""
+        return sum(os.path.getsize(path) for path in (self.model_path, self.preprocessor_path)
+                   if os.path.exists(path))
+
+    @property
+    def version(self):
+        """Content hash of the model artifact"""
+        return file_digest(self.model_path)
+
+    def load(self):
+        """(model, preprocessor), rebuilding the preprocessor from encoders if needed"""
+        model = joblib.load(self.model_path)
+        if os.path.exists(self.preprocessor_path):
+            preprocessor = joblib.load(self.preprocessor_path)
+        else:
+            preprocessor = LoanPreprocessor.from_label_encoders(
+                joblib.load(self.encoders_path), joblib.load(self.features_path))
+        return model, preprocessor
+
+    def drift_monitor(self, version=None):
+        """
+        DriftMonitor for the saved training profile, or None without one or
+        when the profile was built for another model version
+        """
+        if not os.path.exists(self.drift_profile_path):
+            return None
+        monitor = DriftMonitor.from_file(self.drift_profile_path)
+        if monitor.model_version != (version or self.version):
+            print(f"⚠️  Drift profile of '{self.name}' was built for another model version; not used")
+            return None
+        return monitor
+
+
+class LoadedModel:
+    """A model resident in memory plus its accounting"""
+
+    def __init__(self, name, model, preprocessor, size_bytes, pinned=False,
+                 load_time_s=0.0, rss_delta_bytes=0, version=None, drift=None):
+        self.name = name
+        self.model = model
+        self.preprocessor = preprocessor
+        self.version = version
+        self.drift = drift
+        self.size_bytes = size_bytes
+        self.pinned = pinned
+        self.load_time_s = load_time_s
+        self.rss_delta_bytes = rss_delta_bytes
+        self.array_bytes = array_bytes((model, preprocessor))
+        self.hits = 0
+        self.last_used = time.time()
+
+    @property
+    def memory_bytes(self):
+        """Bytes counted against the memory cap"""
+        return max(self.size_bytes, self.rss_delta_bytes, self.array_bytes)
+
+
+def array_bytes(obj, _seen=None):
+    """Bytes of the numpy arrays reachable from a fitted model or preprocessor"""
+    # Visited objects are kept alive so a freed temporary's id is not reused
+    seen = {} if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return obj.nbytes + sum(array_bytes(item, seen) for item in obj.ravel())
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(array_bytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(array_bytes(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        return array_bytes(vars(obj), seen)
+    # Cython objects such as sklearn's Tree expose their arrays through pickling
+    if hasattr(obj, '__getstate__') and not isinstance(obj, (str, bytes, int, float)):
+        try:
+            state = obj.__getstate__()
+        except TypeError:
+            return 0
+        return array_bytes(state, seen) if isinstance(state, dict) else 0
+    return 0
+
+
+def discover_models(model_dir):
+    """Model name -> ModelSpec for every Models/<name>/ holding a model.pkl"""
+    specs = {}
+    if not os.path.isdir(model_dir):
+        return specs
+    for name in sorted(os.listdir(model_dir)):
+        directory = os.path.join(model_dir, name)
+        if os.path.isfile(os.path.join(directory, MODEL_FILE)):
+            specs[name] = ModelSpec(name, directory)
+    return specs
+
+
+class ModelRegistry:
+    """Thread-safe lazy loader with an LRU memory cap"""
+
+    ACCOUNTING = 'max(size_bytes, rss_delta_bytes, array_bytes)'
+
+    def __init__(self, specs=None, memory_cap_bytes=None):
+        self.specs = dict(specs or {})
+        self.memory_cap_bytes = memory_cap_bytes
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.loads = {}
+        self.evictions = {}
+
+    @classmethod
+    def from_env(cls, model_dir):
+        cap_mb = os.environ.get('MODEL_MEMORY_CAP_MB')
+        cap = int(float(cap_mb) * 1024 * 1024) if cap_mb else None
+        return cls(discover_models(model_dir), memory_cap_bytes=cap)
+
+    def register_loaded(self, name, model, preprocessor, size_bytes, version=None, drift=None):
+        """Add an already loaded model that must never be unloaded"""
+        with self._lock:
+            self._loaded[name] = LoadedModel(name, model, preprocessor, size_bytes, pinned=True,
+                                             version=version, drift=drift)
+
+    def names(self):
+        return sorted(set(self.specs) | set(self._loaded))
+
+    def loaded_entries(self):
+        with self._lock:
+            return list(self._loaded.values())
+
+    @property
+    def used_bytes(self):
+        return sum(entry.memory_bytes for entry in self._loaded.values())
+
+    def get(self, name):
+        """Loaded model `name`, loading it (and unloading others) on first use"""
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                return self._touch(entry)
+            if name not in self.specs:
+                raise KeyError(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock; concurrent requests for the same
+        # model wait for the first load instead of loading it twice
+        with load_lock:
+            with self._lock:
+                entry = self._loaded.get(name)
+                if entry is not None:
+                    return self._touch(entry)
+            spec = self.specs[name]
+            rss_before = current_rss()
+            start = time.perf_counter()
+            model, preprocessor = spec.load()
+            version = spec.version
+            entry = LoadedModel(name, model, preprocessor, spec.artifact_bytes,
+                                load_time_s=time.perf_counter() - start,
+                                rss_delta_bytes=max(0, current_rss() - rss_before),
+                                version=version, drift=spec.drift_monitor(version))
+            with self._lock:
+                self._loaded[name] = entry
+                self.loads[name] = self.loads.get(name, 0) + 1
+                self._evict(keep=name)
+                return self._touch(entry)
+
+    def _touch(self, entry):
+        self._loaded.move_to_end(entry.name)
+        entry.hits += 1
+        entry.last_used = time.time()
+        return entry
+
+    def _evict(self, keep):
+        """Unload least recently used models until under the cap"""
+        if self.memory_cap_bytes is None:
+            return
+        for name in list(self._loaded):
+            if self.used_bytes <= self.memory_cap_bytes:
+                break
+            entry = self._loaded[name]
+            if entry.pinned or name == keep:
+                continue
+            del self._loaded[name]
+            self.evictions[name] = self.evictions.get(name, 0) + 1
+
+    def unload(self, name):
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None and not entry.pinned:
+                del self._loaded[name]
+
+    def snapshot(self):
+        with self._lock:
+            models = {}
+            for name in self.names():
+                entry = self._loaded.get(name)
+                models[name] = {
+                    'loaded': entry is not None,
+                    'pinned': bool(entry and entry.pinned),
+                    'version': entry.version if entry else None,
+                    'size_bytes': entry.size_bytes if entry else None,
+                    'rss_delta_bytes': entry.rss_delta_bytes if entry else None,
+                    'array_bytes': entry.array_bytes if entry else None,
+                    'memory_bytes': entry.memory_bytes if entry else None,
+                    'load_time_ms': round(entry.load_time_s * 1000, 2) if entry else None,
+                    'hits': entry.hits if entry else 0,
+                    'loads': self.loads.get(name, 0),
+                    'evictions': self.evictions.get(name, 0),
+                }
+            return {
+                'memory_cap_bytes': self.memory_cap_bytes,
+                'accounting': self.ACCOUNTING,
+                'used_bytes': self.used_bytes,
+                'models': models,
+            }
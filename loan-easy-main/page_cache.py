@@ -0,0 +1,171 @@
+"""
+Pre-rendered, precompressed page and static asset cache
+Pages are rendered once at startup and kept in memory as identity, gzip and
+(when the brotli package is installed) brotli bodies. Responses carry strong
+ETags and Cache-Control headers, and conditional requests get a 304.
+Static CSS/JS files are served under content-fingerprinted URLs so browsers
+can cache them for a year.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort, render_template, request
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+PAGE_CACHE_CONTROL = 'no-cache'
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_DIRS = ('css', 'js')
+ASSET_URL_PREFIX = '/assets/'
+
+# Preference order when the client accepts several encodings
+ENCODINGS = ('br', 'gzip')
+
+
+class CachedEntry:
+    """One cacheable resource with every encoded representation precomputed"""
+
+    def __init__(self, body, mimetype, cache_control):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:20]
+        self.bodies = {'identity': body}
+
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.bodies['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.bodies['br'] = compressed
+
+        # Strong validators differ per representation since the bytes differ
+        self.etags = {encoding: self.etag(encoding) for encoding in self.bodies}
+
+    def etag(self, encoding):
+        if encoding == 'identity':
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+def accepted_encodings(header):
+    """Parse Accept-Encoding into the set of codings with a non-zero q-value"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def etag_matches(header, etags):
+    """If-None-Match uses weak comparison, so any representation's tag matches"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return not candidates.isdisjoint(etags)
+
+
+class PageCache:
+    """Serve pre-rendered templates and fingerprinted static assets from memory"""
+
+    def __init__(self, app=None, enabled=True):
+        self.enabled = enabled
+        self.pages = {}
+        self.assets = {}
+        self.asset_paths = {}
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.jinja_env.globals['asset_url'] = self.asset_url
+        app.add_url_rule(ASSET_URL_PREFIX + '<path:filename>', 'asset', self.serve_asset)
+        self.load_assets()
+
+    def load_assets(self):
+        """Read and fingerprint every CSS/JS file under the static folder"""
+        static_folder = self.app.static_folder
+        for subdir in ASSET_DIRS:
+            folder = os.path.join(static_folder, subdir)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                path = f'{subdir}/{name}'
+                with open(os.path.join(folder, name), 'rb') as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                entry = CachedEntry(body, f'{mimetype}; charset=utf-8', ASSET_CACHE_CONTROL)
+                stem, ext = os.path.splitext(path)
+                fingerprinted = f'{stem}.{entry.digest[:10]}{ext}'
+                self.assets[fingerprinted] = entry
+                self.asset_paths[path] = fingerprinted
+
+    def asset_url(self, path):
+        """URL for a static asset, fingerprinted by content hash"""
+        fingerprinted = self.asset_paths.get(path)
+        if fingerprinted is None:
+            return f'{self.app.static_url_path}/{path}'
+        return ASSET_URL_PREFIX + fingerprinted
+
+    def render_pages(self, templates):
+        """Render each template once and keep the encoded bodies"""
+        if not self.enabled:
+            return
+        with self.app.test_request_context():
+            for template in templates:
+                body = render_template(template).encode('utf-8')
+                self.pages[template] = CachedEntry(body, 'text/html; charset=utf-8',
+                                                   PAGE_CACHE_CONTROL)
+
+    def respond(self, entry):
+        """Build a 200 or 304 response for the entry honouring the request headers"""
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+        encoding = next((e for e in ENCODINGS if e in accepted and e in entry.bodies), 'identity')
+
+        headers = {
+            'ETag': entry.etags[encoding],
+            'Cache-Control': entry.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        if etag_matches(request.headers.get('If-None-Match'), entry.etags.values()):
+            return Response(status=304, headers=headers)
+
+        return Response(entry.bodies[encoding], mimetype=entry.mimetype, headers=headers)
+
+    def page(self, template):
+        """Serve a pre-rendered page (or render it live when the cache is off)"""
+        entry = self.pages.get(template)
+        if entry is None:
+            return render_template(template)
+        return self.respond(entry)
+
+    def serve_asset(self, filename):
+        entry = self.assets.get(filename)
+        if entry is None:
+            abort(404)
+        return self.respond(entry)
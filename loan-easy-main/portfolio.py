@@ -0,0 +1,247 @@
+"""
+Portfolio analytics: grouped approval statistics for a whole book of applications
+An uploaded portfolio is read and scored in chunks of rows, each chunk one
+vectorized encode + predict_proba call. Per-group accumulators (count,
+approvals, summed probability and variance) are updated with np.bincount on
+the chunk's encoded columns, so memory and the summary's size depend on the
+number of groups, never on the number of rows.
+
+Groups are categorical inputs (by their fitted vocabulary) or fixed bands of a
+numeric value (see BANDS). Expected approvals is the sum of the approval
+probabilities; its standard deviation treats rows as independent Bernoulli
+trials.
+
+Usage:
+    python portfolio.py --input synthetic_loan_data.csv
+    python portfolio.py --input book.csv --group-by Property_Area,Income_Band --chunk-rows 50000
+    python portfolio.py --input synthetic_loan_data.csv --repeat 20 --output summary.json
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 10000
+DEFAULT_GROUP_BY = ('Property_Area', 'Education', 'Income_Band', 'Credit_History')
+HISTOGRAM_BINS = 10
+
+
+def _total_income(columns):
+    return columns['ApplicantIncome'] + columns['CoapplicantIncome']
+
+
+def _band_labels(edges, unit=''):
+    labels = [f'<{unit}{edges[0]:,}']
+    labels += [f'{unit}{low:,}-{unit}{high:,}' for low, high in zip(edges, edges[1:])]
+    labels.append(f'>={unit}{edges[-1]:,}')
+    return labels
+
+
+# Banded numeric groups: name -> (value from encoded columns, band edges, labels).
+# Incomes are monthly and loan amounts in $1000s, as in the dataset.
+INCOME_EDGES = (2500, 5000, 10000, 20000)
+LOAN_AMOUNT_EDGES = (100, 200, 300, 500)
+BANDS = {
+    'Income_Band': (_total_income, INCOME_EDGES, _band_labels(INCOME_EDGES, '$')),
+    'Loan_Amount_Band': (lambda columns: columns['LoanAmount'], LOAN_AMOUNT_EDGES,
+                         _band_labels(LOAN_AMOUNT_EDGES, '$')),
+    'Credit_History': (lambda columns: columns['Credit_History'], (0.5,), ['0', '1']),
+}
+
+
+class PortfolioSummary:
+    """Streaming grouped accumulators over scored chunks"""
+
+    # Accumulator columns
+    COUNT, APPROVED, PROBABILITY, VARIANCE = range(4)
+
+    def __init__(self, preprocessor, group_by=DEFAULT_GROUP_BY, bins=HISTOGRAM_BINS):
+        self.group_by = list(group_by)
+        self._groups = []
+        for name in self.group_by:
+            if name in preprocessor.categorical_cols:
+                labels = [str(value) for value in preprocessor.classes_[name]]
+                self._groups.append((name, None, None, labels))
+            elif name in BANDS:
+                value, edges, labels = BANDS[name]
+                self._groups.append((name, value, np.asarray(edges, dtype=np.float64), labels))
+            else:
+                raise ValueError(f"Unknown group '{name}'. Expected one of "
+                                 f"{preprocessor.categorical_cols + list(BANDS)}")
+        self._stats = {name: np.zeros((len(labels), 4)) for name, _, _, labels in self._groups}
+        self._total = np.zeros(4)
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.chunks = 0
+
+    @property
+    def rows(self):
+        return int(self._total[self.COUNT])
+
+    def update(self, columns, probabilities):
+        """Add one chunk: its encoded columns and predict_proba output"""
+        p = np.asarray(probabilities)[:, 1]
+        # Same decision as format_prediction (argmax picks "Not Approved" on ties)
+        approved = (p > 0.5).astype(np.float64)
+        variance = p * (1 - p)
+        weights = (None, approved, p, variance)
+        self._total += [len(p), approved.sum(), p.sum(), variance.sum()]
+
+        for name, value, edges, labels in self._groups:
+            if value is None:
+                codes = columns[name]
+            else:
+                codes = np.searchsorted(edges, value(columns), side='right')
+            stats = self._stats[name]
+            for j, w in enumerate(weights):
+                stats[:, j] += np.bincount(codes, weights=w, minlength=len(labels))
+
+        bins = len(self.histogram)
+        self.histogram += np.bincount(np.minimum((p * bins).astype(np.intp), bins - 1),
+                                      minlength=bins)
+        self.chunks += 1
+
+    @staticmethod
+    def _describe(stats):
+        count, approved, probability, variance = stats
+        if count == 0:
+            return {'count': 0, 'approved': 0, 'approval_rate': None, 'mean_probability': None,
+                    'expected_approvals': 0.0, 'expected_approvals_std': 0.0}
+        return {
+            'count': int(count),
+            'approved': int(approved),
+            'approval_rate': round(float(approved / count), 4),
+            'mean_probability': round(float(probability / count), 4),
+            'expected_approvals': round(float(probability), 2),
+            'expected_approvals_std': round(float(np.sqrt(variance)), 2),
+        }
+
+    def summary(self):
+        """JSON-ready summary; its size depends only on the groups"""
+        bins = len(self.histogram)
+        return {
+            'rows': self.rows,
+            'overall': self._describe(self._total),
+            'groups': {
+                name: [dict(self._describe(stats), value=label)
+                       for label, stats in zip(labels, self._stats[name])]
+                for name, _, _, labels in self._groups
+            },
+            'probability_histogram': {
+                'edges': [round(i / bins, 4) for i in range(bins + 1)],
+                'counts': self.histogram.tolist(),
+            },
+        }
+
+
+def csv_chunks(stream, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Columnar chunks ({column: [str values]}) of a CSV text or binary stream"""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    reader = csv.reader(stream)
+    header = [name.strip() for name in next(reader, [])]
+    if not header:
+        raise ValueError('Empty portfolio')
+    while True:
+        rows = [row for _, row in zip(range(chunk_rows), reader)]
+        if not rows:
+            return
+        if any(len(row) != len(header) for row in rows):
+            raise ValueError(f'Every CSV row needs {len(header)} fields')
+        yield {name: list(values) for name, values in zip(header, zip(*rows))}
+
+
+def batch_chunks(batch, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Chunks of a list of records or a {column: [values]} dict"""
+    if isinstance(batch, dict):
+        n_rows = len(next(iter(batch.values()), []))
+        for start in range(0, n_rows, chunk_rows):
+            yield {col: values[start:start + chunk_rows] for col, values in batch.items()}
+    else:
+        for start in range(0, len(batch), chunk_rows):
+            yield batch[start:start + chunk_rows]
+
+
+def score_portfolio(chunks, preprocessor, scorer, summary):
+    """Encode, score and accumulate every chunk; returns the summary"""
+    for chunk in chunks:
+        columns = preprocessor.encode_columns(chunk)
+        summary.update(columns, scorer.predict_proba(preprocessor.assemble(columns)))
+    return summary
+
+
+def main(argv=None):
+    import warnings
+    from inference_backends import BACKENDS, make_backend
+    from model_registry import ModelSpec, MODEL_FILE
+
+    parser = argparse.ArgumentParser(description='Grouped approval statistics for a portfolio CSV')
+    parser.add_argument('--input', default='synthetic_loan_data.csv')
+    parser.add_argument('--source', default='Models',
+                        help='Model directory (Models/<name>/ or the legacy Models/ *_real.pkl layout)')
+    parser.add_argument('--group-by', default=','.join(DEFAULT_GROUP_BY))
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--backend', default='sklearn', choices=sorted(BACKENDS))
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Score the input this many times (a larger portfolio)')
+    parser.add_argument('--output', help='Also write the summary as JSON')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.source, MODEL_FILE)):
+        spec = ModelSpec('source', args.source)
+    else:
+        spec = ModelSpec('source', args.source, 'loan_model_real.pkl', 'preprocessor_real.pkl',
+                         'label_encoders_real.pkl', 'feature_names_real.pkl')
+    model, preprocessor = spec.load()
+    # The model was fitted on a DataFrame; chunks are plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    scorer = make_backend(args.backend, model)
+
+    try:
+        summary = PortfolioSummary(preprocessor, [g for g in args.group_by.split(',') if g])
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        with open(args.input, newline='') as f:
+            score_portfolio(csv_chunks(f, args.chunk_rows), preprocessor, scorer, summary)
+    elapsed = time.perf_counter() - start
+    result = summary.summary()
+    size = len(json.dumps(result, separators=(',', ':')))
+
+    overall = result['overall']
+    print("\n" + "="*70)
+    print(f"PORTFOLIO SUMMARY ({result['rows']:,} applications, {summary.chunks} chunks)")
+    print("="*70)
+    print(f"  Approved:            {overall['approved']:,} ({overall['approval_rate']:.1%})")
+    print(f"  Mean probability:    {overall['mean_probability']:.4f}")
+    print(f"  Expected approvals:  {overall['expected_approvals']:,.1f} "
+          f"± {overall['expected_approvals_std']:,.1f}")
+    for name, groups in result['groups'].items():
+        print(f"\n  {name}")
+        for group in groups:
+            if group['count']:
+                print(f"    {group['value']:18s} {group['count']:>9,}  "
+                      f"approved {group['approval_rate']:>6.1%}  "
+                      f"mean p {group['mean_probability']:.3f}  "
+                      f"expected {group['expected_approvals']:>11,.1f}")
+            else:
+                print(f"    {group['value']:18s} {0:>9,}")
+    print(f"\n  Scored in {elapsed:.2f} s ({result['rows'] / elapsed:,.0f} rows/s, "
+          f"{args.backend} backend); summary is {size:,} bytes")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✓ Summary saved to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
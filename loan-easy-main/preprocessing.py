@@ -0,0 +1,200 @@
+"""
+Shared feature preprocessing for training and serving
+One fitted LoanPreprocessor turns a single record or a columnar batch
+(dict of lists / DataFrame) into the model matrix in a single vectorized call.
+It is saved next to the model so serving encodes exactly like training.
+"""
+import numpy as np
+
+# Synthetic-dataset schema (the deployed model)
+NUMERIC_COLS = ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount',
+                'Loan_Amount_Term', 'Credit_History']
+CATEGORICAL_COLS = ['Gender', 'Married', 'Dependents', 'Education',
+                    'Self_Employed', 'Property_Area']
+DEFAULTS = {'CoapplicantIncome': 0.0}
+
+# HTML form field -> model feature name
+FORM_FIELDS = {
+    'applicant_income': 'ApplicantIncome',
+    'coapplicant_income': 'CoapplicantIncome',
+    'loan_amount': 'LoanAmount',
+    'loan_term': 'Loan_Amount_Term',
+    'credit_history': 'Credit_History',
+    'gender': 'Gender',
+    'married': 'Married',
+    'dependents': 'Dependents',
+    'education': 'Education',
+    'self_employed': 'Self_Employed',
+    'property_area': 'Property_Area',
+}
+
+
+def _total_income(columns):
+    return columns['ApplicantIncome'] + columns['CoapplicantIncome']
+
+
+def _loan_to_income(columns):
+    # Loan amount is in $1000s, incomes are monthly
+    annual_income = (columns['ApplicantIncome'] + columns['CoapplicantIncome']) * 12
+    return np.divide(columns['LoanAmount'] * 1000, annual_income,
+                     out=np.zeros_like(annual_income), where=annual_income > 0)
+
+
+# Optional derived features: name -> (required inputs, function)
+DERIVED_FEATURES = {
+    'Total_Income': (('ApplicantIncome', 'CoapplicantIncome'), _total_income),
+    'Loan_to_Income': (('ApplicantIncome', 'CoapplicantIncome', 'LoanAmount'), _loan_to_income),
+}
+
+
+def record_from_form(form):
+    """Map HTML form fields (e.g. request.form) to a feature-name record"""
+    return {feature: form[field] for field, feature in FORM_FIELDS.items() if field in form}
+
+
+class LoanPreprocessor:
+    """Fitted encoder from raw application fields to the model matrix"""
+
+    def __init__(self, numeric_cols=None, categorical_cols=None, derived=(),
+                 feature_order=None, defaults=None):
+        self.numeric_cols = list(NUMERIC_COLS if numeric_cols is None else numeric_cols)
+        self.categorical_cols = list(CATEGORICAL_COLS if categorical_cols is None else categorical_cols)
+        self.derived = list(derived)
+        self.defaults = dict(DEFAULTS if defaults is None else defaults)
+        self.feature_order = list(feature_order) if feature_order is not None else None
+        self.classes_ = {}
+
+        for name in self.derived:
+            if name not in DERIVED_FEATURES:
+                raise ValueError(f"Unknown derived feature: {name}")
+
+    @property
+    def feature_names(self):
+        """Column order of the matrix produced by transform()"""
+        if self.feature_order is not None:
+            return list(self.feature_order)
+        return self.numeric_cols + self.categorical_cols + self.derived
+
+    @property
+    def input_fields(self):
+        """Raw fields a record must (or may, if defaulted) provide"""
+        return self.numeric_cols + self.categorical_cols
+
+    def fit(self, data):
+        """Learn the category vocabularies (sorted, like LabelEncoder)"""
+        for col in self.categorical_cols:
+            values = self._categorical_column(data[col])
+            self.classes_[col] = np.unique(values)
+        return self
+
+    @classmethod
+    def from_label_encoders(cls, label_encoders, feature_names, **kwargs):
+        """Build a preprocessor from legacy LabelEncoder artifacts"""
+        categorical_cols = [name for name in feature_names if name in label_encoders]
+        numeric_cols = [name for name in feature_names
+                        if name not in label_encoders and name not in DERIVED_FEATURES]
+        derived = [name for name in feature_names if name in DERIVED_FEATURES]
+        kwargs.setdefault('defaults', DEFAULTS if set(DEFAULTS) <= set(numeric_cols) else {})
+        preprocessor = cls(numeric_cols, categorical_cols, derived=derived,
+                           feature_order=feature_names, **kwargs)
+        for col in categorical_cols:
+            preprocessor.classes_[col] = preprocessor._categorical_column(
+                label_encoders[col].classes_)
+        return preprocessor
+
+    def to_label_encoders(self):
+        """Equivalent LabelEncoder objects, for consumers of the legacy artifact"""
+        from sklearn.preprocessing import LabelEncoder
+        encoders = {}
+        for col in self.categorical_cols:
+            le = LabelEncoder()
+            le.classes_ = self.classes_[col]
+            encoders[col] = le
+        return encoders
+
+    def _categorical_column(self, values):
+        return np.char.strip(np.asarray(values).astype(str).ravel())
+
+    def _column(self, data, col, n_rows):
+        if col in data:
+            return data[col]
+        if col in self.defaults:
+            return [self.defaults[col]] * n_rows
+        raise KeyError(col)
+
+    def encode_categorical(self, col, values):
+        """Map category values to their integer codes, rejecting unknowns"""
+        classes = self.classes_[col]
+        values = self._categorical_column(values)
+        codes = np.searchsorted(classes, values)
+        codes_clipped = np.minimum(codes, len(classes) - 1)
+        unknown = classes[codes_clipped] != values
+        if unknown.any():
+            # tolist() gives plain str, so the message reads 'Mars', not np.str_('Mars')
+            bad = sorted(set(values[unknown].tolist()))
+            raise ValueError(f"Unknown value(s) for '{col}': {bad}. "
+                             f"Expected one of {classes.tolist()}")
+        return codes
+
+    def records_to_columns(self, records):
+        """Pivot a list of records into the columnar form transform() consumes"""
+        columns = {}
+        for col in self.input_fields:
+            if col in self.defaults:
+                columns[col] = [record.get(col, self.defaults[col]) for record in records]
+            else:
+                columns[col] = [record[col] for record in records]
+        return columns
+
+    def encode_columns(self, data):
+        """Encoded numeric, categorical and derived columns (dict of arrays)"""
+        if isinstance(data, (list, tuple)):
+            data = self.records_to_columns(data)
+        elif isinstance(data, dict) and data and not any(
+                isinstance(v, (list, tuple, np.ndarray)) for v in data.values()):
+            data = {key: [value] for key, value in data.items()}
+
+        first = next(iter(data[c] for c in self.input_fields if c in data), [])
+        n_rows = len(first)
+
+        columns = {}
+        for col in self.numeric_cols:
+            columns[col] = np.asarray(self._column(data, col, n_rows), dtype=np.float64)
+        for col in self.categorical_cols:
+            columns[col] = self.encode_categorical(col, self._column(data, col, n_rows))
+        for name in self.derived:
+            _, func = DERIVED_FEATURES[name]
+            columns[name] = func(columns)
+        return columns
+
+    def assemble(self, columns):
+        """Stack encoded columns into the model matrix in `feature_names` order"""
+        names = self.feature_names
+        n_rows = len(columns[names[0]]) if names else 0
+        matrix = np.empty((n_rows, len(names)), dtype=np.float64)
+        for j, name in enumerate(names):
+            matrix[:, j] = columns[name]
+        return matrix
+
+    def transform(self, data):
+        """
+        Encode one record (dict of scalars) or a batch (list of records,
+        dict of lists or DataFrame)
+
+        Returns a float64 matrix with columns in `feature_names` order.
+        """
+        return self.assemble(self.encode_columns(data))
+
+    def fit_transform(self, data):
+        return self.fit(data).transform(data)
+
+    def schema(self):
+        """JSON-friendly description of the expected input"""
+        return {
+            'numeric': self.numeric_cols,
+            'categorical': {col: [str(c) for c in self.classes_[col]]
+                            for col in self.categorical_cols},
+            'derived': self.derived,
+            'defaults': self.defaults,
+            'features': self.feature_names,
+        }
@@ -0,0 +1,227 @@
+"""
+Segment report: approval rates for every segment breakdown in one streamed pass
+The analysis scripts used one groupby(...).apply(lambda ...) per breakdown,
+calling the lambda once per group over a fully loaded CSV. SegmentReport reads
+the CSV in chunks of rows and updates the counts of all configured segments
+(credit history, income bands, education, ...) from each chunk with
+pd.factorize and np.bincount, so no Python runs per row or per group, the
+file is read once, and memory depends on the chunk size, not the file size.
+
+A segment groups either by the values of one column (like groupby) or by
+bands of a numeric value (like pd.cut(right=True)): value v is in band i when
+edges[i] < v <= edges[i + 1], and values outside every band are left out, as
+pd.cut leaves them NaN. approval_rates() returns the same Series the
+groupby lambdas printed.
+
+Usage:
+    python segment_report.py --input synthetic_loan_data.csv
+    python segment_report.py --input real_data/loan_approval_dataset.csv --dataset real
+    python segment_report.py --input big.csv --chunk-rows 500000 --output segments.json
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 100000
+
+# Segments: name -> (columns, band edges, band labels). Without edges the
+# segment groups by its one column; with edges it bands the sum of its
+# columns (e.g. applicant + coapplicant income).
+LOAN_SEGMENTS = {
+    'Credit_History': (('Credit_History',), None, None),
+    'Income_Category': (('ApplicantIncome', 'CoapplicantIncome'), (0, 3000, 5000, 8000, 15000),
+                        ['Low (<3K)', 'Medium (3-5K)', 'High (5-8K)', 'Very High (>8K)']),
+    'Education': (('Education',), None, None),
+    'Married': (('Married',), None, None),
+}
+REAL_SEGMENTS = {
+    'cibil_category': (('cibil_score',), (0, 550, 650, 750, 900),
+                       ['Poor (<550)', 'Fair (550-650)', 'Good (650-750)', 'Excellent (>750)']),
+    'income_category': (('income_annum',), (0, 2000000, 5000000, 10000000, 100000000),
+                        ['Low (<2M)', 'Medium (2-5M)', 'High (5-10M)', 'Very High (>10M)']),
+    'loan_category': (('loan_amount',), (0, 5000000, 10000000, 20000000, 100000000),
+                      ['Small (<5M)', 'Medium (5-10M)', 'Large (10-20M)', 'Very Large (>20M)']),
+}
+# Dataset presets: name -> (segments, target column, approved target value)
+DATASETS = {
+    'loan': (LOAN_SEGMENTS, 'Loan_Status', 'Y'),
+    'real': (REAL_SEGMENTS, 'loan_status', 'Approved'),
+}
+
+
+def _python(value):
+    """Plain Python scalar for numpy values (JSON keys and output)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SegmentReport:
+    """Streaming approval counts for several segment breakdowns"""
+
+    def __init__(self, segments, target, positive):
+        self.segments = dict(segments)
+        self.target = target
+        self.positive = positive
+        self.rows = 0
+        self.chunks = 0
+        self.target_counts = {}
+        # Categorical segments: {value: [count, approved]}; banded: (bands, 2) array
+        self._stats = {}
+        for name, (columns, edges, labels) in self.segments.items():
+            if edges is None:
+                if len(columns) != 1:
+                    raise ValueError(f"Segment '{name}' groups by one column, got {list(columns)}")
+                self._stats[name] = {}
+            else:
+                if len(labels) != len(edges) - 1:
+                    raise ValueError(f"Segment '{name}' needs {len(edges) - 1} labels, got {len(labels)}")
+                self._stats[name] = np.zeros((len(labels), 2), dtype=np.int64)
+
+    @property
+    def columns(self):
+        """Input columns the report reads"""
+        needed = [self.target]
+        for columns, _, _ in self.segments.values():
+            needed += [column for column in columns if column not in needed]
+        return needed
+
+    @staticmethod
+    def _count(codes, n_groups, positive):
+        """(rows, approved) per code; code -1 (missing) is left out"""
+        valid = codes >= 0
+        return (np.bincount(codes[valid], minlength=n_groups),
+                np.bincount(codes[valid & positive], minlength=n_groups))
+
+    def update(self, chunk):
+        """Add one DataFrame chunk"""
+        codes, uniques = pd.factorize(chunk[self.target])
+        # One comparison per distinct target value, then a lookup per row
+        # (index -1, a missing target, reads the trailing False)
+        is_positive = np.array([str(value).strip() == self.positive for value in uniques] + [False])
+        positive = is_positive[codes]
+        counts, _ = self._count(codes, len(uniques), positive)
+        for value, count in zip(uniques, counts):
+            value = _python(value)
+            self.target_counts[value] = self.target_counts.get(value, 0) + int(count)
+
+        for name, (columns, edges, labels) in self.segments.items():
+            stats = self._stats[name]
+            if edges is None:
+                codes, uniques = pd.factorize(chunk[columns[0]])
+                counts, approved = self._count(codes, len(uniques), positive)
+                for value, count, hits in zip(uniques, counts, approved):
+                    entry = stats.setdefault(_python(value), [0, 0])
+                    entry[0] += int(count)
+                    entry[1] += int(hits)
+            else:
+                value = chunk[columns[0]].to_numpy(dtype=np.float64)
+                for column in columns[1:]:
+                    value = value + chunk[column].to_numpy(dtype=np.float64)
+                band = np.searchsorted(np.asarray(edges, dtype=np.float64), value, side='left') - 1
+                # Below the first edge, above the last, or NaN
+                band[band >= len(labels)] = -1
+                counts, approved = self._count(band, len(labels), positive)
+                stats[:, 0] += counts
+                stats[:, 1] += approved
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def table(self, name):
+        """[(value, rows, approved)] in groupby order: sorted values, or the bands in order"""
+        _, edges, labels = self.segments[name]
+        stats = self._stats[name]
+        if edges is None:
+            return [(value, *stats[value]) for value in sorted(stats)]
+        return [(label, int(count), int(approved)) for label, (count, approved) in zip(labels, stats)]
+
+    def approval_rates(self, name):
+        """
+        Approval rate (%) per group with rows: the Series of
+        df.groupby(name)[target].apply(lambda x: (x == positive).sum() / len(x) * 100)
+        """
+        _, edges, labels = self.segments[name]
+        rows = [(value, approved / count * 100) for value, count, approved in self.table(name) if count]
+        values = [value for value, _ in rows]
+        if edges is None:
+            index = pd.Index(values, name=name)
+        else:
+            index = pd.CategoricalIndex(values, categories=labels, ordered=True, name=name)
+        return pd.Series([rate for _, rate in rows], index=index, name=self.target, dtype=np.float64)
+
+    def summary(self):
+        """JSON-ready counts and rates of every segment"""
+        approved = sum(count for value, count in self.target_counts.items()
+                       if str(value).strip() == self.positive)
+        return {
+            'rows': self.rows,
+            'approved': approved,
+            'approval_rate': round(approved / self.rows, 4) if self.rows else None,
+            'segments': {
+                name: [{'value': value, 'count': count, 'approved': hits,
+                        'approval_rate': round(hits / count, 4) if count else None}
+                       for value, count, hits in self.table(name)]
+                for name in self.segments
+            },
+        }
+
+
+def csv_chunks(path, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """DataFrame chunks of a CSV with stripped column names, reading only `columns`"""
+    usecols = None if columns is None else (lambda name: name.strip() in columns)
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_rows):
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def segment_report(chunks, segments, target, positive):
+    """SegmentReport over every chunk"""
+    report = SegmentReport(segments, target, positive)
+    for chunk in chunks:
+        report.update(chunk)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Approval rates per segment in one streamed pass')
+    parser.add_argument('--input', default='synthetic_loan_data.csv')
+    parser.add_argument('--dataset', default='loan', choices=sorted(DATASETS),
+                        help='Segment preset: loan (Loan_Status Y/N) or real (loan_status Approved/Rejected)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--output', help='Also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    segments, target, positive = DATASETS[args.dataset]
+    report = SegmentReport(segments, target, positive)
+    start = time.perf_counter()
+    try:
+        for chunk in csv_chunks(args.input, report.columns, args.chunk_rows):
+            report.update(chunk)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    result = report.summary()
+
+    print("\n" + "="*70)
+    print(f"SEGMENT REPORT ({result['rows']:,} rows, {report.chunks} chunks)")
+    print("="*70)
+    if result['rows']:
+        print(f"  Approval rate: {result['approval_rate']:.1%}")
+    for name in segments:
+        print(f"\n  {name}")
+        for value, rate in report.approval_rates(name).items():
+            print(f"    {str(value):20s} {rate:.1f}% approval rate")
+    print(f"\n  Read in {elapsed:.2f} s ({result['rows'] / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✓ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
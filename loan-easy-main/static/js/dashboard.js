@@ -0,0 +1,27 @@
+// Create floating icons
+const icons = ['fa-dollar-sign', 'fa-coins', 'fa-money-bill-wave', 'fa-building-columns', 'fa-landmark', 'fa-credit-card', 'fa-piggy-bank', 'fa-chart-line', 'fa-hand-holding-dollar', 'fa-wallet'];
+const floatingContainer = document.getElementById('floatingIcons');
+
+function createFloatingIcon() {
+    const icon = document.createElement('i');
+    icon.className = `fas ${icons[Math.floor(Math.random() * icons.length)]} floating-icon`;
+    icon.style.left = Math.random() * 100 + '%';
+    icon.style.fontSize = (Math.random() * 2 + 1.5) + 'rem';
+    icon.style.animationDuration = (Math.random() * 10 + 15) + 's';
+    icon.style.animationDelay = Math.random() * 5 + 's';
+    floatingContainer.appendChild(icon);
+
+    // Remove after animation completes
+    setTimeout(() => {
+        icon.remove();
+    }, (parseFloat(icon.style.animationDuration) + parseFloat(icon.style.animationDelay)) * 1000);
+}
+
+// Create initial batch of icons
+for (let i = 0; i < 20; i++) {
+    createFloatingIcon();
+}
+
+// Continuously create new icons
+setInterval(createFloatingIcon, 2000);
+
@@ -0,0 +1,409 @@
+// Initialize Background Animation
+function initBackgroundAnimation() {
+    const bgContainer = document.getElementById('bgAnimation');
+
+    // Create gradient columns - Equalizer style
+    for (let i = 0; i < 25; i++) {
+        const column = document.createElement('div');
+        column.className = 'gradient-column';
+        column.style.left = (i * 4) + '%';
+
+        // Random animation speeds for variety
+        const speed = Math.random();
+        if (speed < 0.3) {
+            column.classList.add('fast');
+        } else if (speed > 0.7) {
+            column.classList.add('slow');
+        }
+
+        // Random animation delay
+        column.style.animationDelay = (Math.random() * 2) + 's';
+
+        // Random width variance
+        column.style.width = (6 + Math.random() * 6) + 'px';
+
+        // Random opacity
+        column.style.opacity = (0.3 + Math.random() * 0.5);
+
+        bgContainer.appendChild(column);
+    }
+
+    // Create floating orbs
+    for (let i = 0; i < 4; i++) {
+        const orb = document.createElement('div');
+        orb.className = 'glow-orb';
+        orb.style.width = (100 + Math.random() * 200) + 'px';
+        orb.style.height = orb.style.width;
+        orb.style.left = (Math.random() * 100) + '%';
+        orb.style.top = (Math.random() * 100) + '%';
+        orb.style.animationDuration = (6 + Math.random() * 6) + 's';
+        orb.style.animationDelay = (Math.random() * 3) + 's';
+        bgContainer.appendChild(orb);
+    }
+
+    // Create animated particles
+    for (let i = 0; i < 50; i++) {
+        const particle = document.createElement('div');
+        particle.className = 'particle';
+        const startX = Math.random() * 100;
+        const startY = Math.random() * 100;
+        const duration = 8 + Math.random() * 12;
+        const distance = 100 + Math.random() * 300;
+        const angle = Math.random() * Math.PI * 2;
+        const tx = Math.cos(angle) * distance;
+        const ty = Math.sin(angle) * distance;
+
+        particle.style.left = startX + '%';
+        particle.style.top = startY + '%';
+        particle.style.setProperty('--tx', tx + 'px');
+        particle.style.setProperty('--ty', ty + 'px');
+        particle.style.animationDuration = duration + 's';
+        particle.style.animationDelay = Math.random() * duration + 's';
+        bgContainer.appendChild(particle);
+    }
+
+    // Create aurora effects
+    for (let i = 0; i < 3; i++) {
+        const aurora = document.createElement('div');
+        aurora.className = 'aurora';
+        aurora.style.top = (20 + i * 30) + '%';
+        aurora.style.animationDuration = (6 + i * 2) + 's';
+        aurora.style.animationDelay = (i * 1) + 's';
+        bgContainer.appendChild(aurora);
+    }
+
+    // Money and Loan Items
+    const moneyItems = ['💰', '💵', '💳', '📈', '📊', '🏦', '💎', '✨', '⚡', '🎯'];
+    const animationClasses = ['moneyFloat', 'loanDocFloat', 'spinPercent', 'arrowBounce', 'coinFlip', 'risingMoney', 'pulse-money', 'glow-money', 'rotating-graph'];
+
+    for (let i = 0; i < 30; i++) {
+        const item = document.createElement('div');
+        item.className = 'money-item';
+        item.textContent = moneyItems[Math.floor(Math.random() * moneyItems.length)];
+
+        // Random positioning
+        item.style.left = Math.random() * 100 + '%';
+        item.style.top = Math.random() * 100 + '%';
+
+        // Random animation speed
+        const speedClass = Math.random() > 0.5 ? 'fast' : 'slow';
+        item.classList.add(speedClass);
+
+        // Add glow effect randomly
+        if (Math.random() > 0.6) {
+            item.classList.add('glow-money');
+        }
+
+        // Random animation duration
+        const duration = 8 + Math.random() * 12;
+        item.style.animationDuration = duration + 's';
+
+        // Random animation delay
+        item.style.animationDelay = Math.random() * duration + 's';
+
+        bgContainer.appendChild(item);
+    }
+
+    // Add special animated loan documents
+    const loanDocs = ['📄', '📋', '🖊️', '%', '↗️', '↘️'];
+    for (let i = 0; i < 8; i++) {
+        const doc = document.createElement('div');
+        doc.className = 'money-item loan-doc';
+        doc.textContent = loanDocs[Math.floor(Math.random() * loanDocs.length)];
+        doc.style.left = Math.random() * 100 + '%';
+        doc.style.top = Math.random() * 100 + '%';
+        doc.style.fontSize = (24 + Math.random() * 24) + 'px';
+        doc.style.animationDuration = (8 + Math.random() * 6) + 's';
+        doc.style.animationDelay = Math.random() * 5 + 's';
+        bgContainer.appendChild(doc);
+    }
+
+    // Add animated dollar signs
+    for (let i = 0; i < 12; i++) {
+        const dollar = document.createElement('div');
+        dollar.className = 'money-item';
+        dollar.textContent = '$';
+        dollar.style.left = Math.random() * 100 + '%';
+        dollar.style.top = Math.random() * 100 + '%';
+        dollar.style.fontSize = (20 + Math.random() * 40) + 'px';
+        dollar.style.fontWeight = 'bold';
+        dollar.style.color = '#00ff88';
+        dollar.style.animationDuration = (10 + Math.random() * 10) + 's';
+        dollar.style.animationDelay = Math.random() * 8 + 's';
+        dollar.style.animation = 'risingMoney ' + (10 + Math.random() * 10) + 's ease-in infinite';
+        dollar.style.animationDelay = Math.random() * 8 + 's';
+        bgContainer.appendChild(dollar);
+    }
+
+    // Add spinning percentages
+    for (let i = 0; i < 8; i++) {
+        const percent = document.createElement('div');
+        percent.className = 'money-item';
+        percent.textContent = Math.floor(Math.random() * 100) + '%';
+        percent.style.left = Math.random() * 100 + '%';
+        percent.style.top = Math.random() * 100 + '%';
+        percent.style.fontSize = (18 + Math.random() * 28) + 'px';
+        percent.style.fontWeight = 'bold';
+        percent.style.color = '#00ffaa';
+        percent.style.animation = 'spinPercent ' + (6 + Math.random() * 8) + 's linear infinite';
+        percent.style.animationDelay = Math.random() * 5 + 's';
+        bgContainer.appendChild(percent);
+    }
+
+    // Add arrows
+    const arrows = ['↗️', '↘️', '↙️', '↖️', '⬆️', '⬇️'];
+    for (let i = 0; i < 10; i++) {
+        const arrow = document.createElement('div');
+        arrow.className = 'money-item';
+        arrow.textContent = arrows[Math.floor(Math.random() * arrows.length)];
+        arrow.style.left = Math.random() * 100 + '%';
+        arrow.style.top = Math.random() * 100 + '%';
+        arrow.style.fontSize = (24 + Math.random() * 28) + 'px';
+        arrow.style.animation = 'arrowBounce ' + (2 + Math.random() * 3) + 's ease-in-out infinite';
+        arrow.style.animationDelay = Math.random() * 3 + 's';
+        bgContainer.appendChild(arrow);
+    }
+}
+
+// Initialize Charts
+function initCharts() {
+    // Income Distribution Chart
+    const incomeCtx = document.getElementById('incomeChart').getContext('2d');
+    new Chart(incomeCtx, {
+        type: 'bar',
+        data: {
+            labels: ['0-25K', '25-50K', '50-100K', '100K+'],
+            datasets: [{
+                label: 'Applicants',
+                data: [320, 850, 1200, 477],
+                backgroundColor: [
+                    'rgba(0, 255, 136, 0.3)',
+                    'rgba(0, 255, 170, 0.4)',
+                    'rgba(0, 255, 136, 0.5)',
+                    'rgba(0, 255, 100, 0.6)'
+                ],
+                borderColor: '#00ff88',
+                borderWidth: 1,
+                borderRadius: 8,
+                hoverBackgroundColor: 'rgba(0, 255, 136, 0.8)'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: { color: 'rgba(0, 255, 136, 0.05)' },
+                    ticks: { color: '#b0b9d4', font: { size: 11 } }
+                },
+                x: {
+                    grid: { display: false },
+                    ticks: { color: '#b0b9d4', font: { size: 11 } }
+                }
+            }
+        }
+    });
+
+    // Approval Rate Chart
+    const approvalCtx = document.getElementById('approvalChart').getContext('2d');
+    new Chart(approvalCtx, {
+        type: 'line',
+        data: {
+            labels: ['300-400', '400-500', '500-600', '600-700', '700-800', '800+'],
+            datasets: [{
+                label: 'Approval %',
+                data: [12, 28, 45, 68, 82, 94],
+                borderColor: '#00ff88',
+                backgroundColor: 'rgba(0, 255, 136, 0.1)',
+                borderWidth: 3,
+                fill: true,
+                tension: 0.4,
+                pointBackgroundColor: '#00ff88',
+                pointBorderColor: '#0f1535',
+                pointBorderWidth: 2,
+                pointRadius: 5,
+                pointHoverRadius: 7,
+                hoverBorderColor: '#00ffaa'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    max: 100,
+                    grid: { color: 'rgba(0, 255, 136, 0.05)' },
+                    ticks: { color: '#b0b9d4', font: { size: 11 } }
+                },
+                x: {
+                    grid: { display: false },
+                    ticks: { color: '#b0b9d4', font: { size: 11 } }
+                }
+            }
+        }
+    });
+}
+
+// Real model, scored in the browser for live previews; /predict decides
+const modelReady = LoanModel.load('/models/default/bundle.json');
+let previewModel = null;
+let previewPending = false;
+modelReady.then(model => { previewModel = model; schedulePreview(); })
+    .catch(err => console.warn('Live preview unavailable:', err.message));
+
+function readForm() {
+    return {
+        income: parseFloat(document.getElementById('income').value),
+        loanAmount: parseFloat(document.getElementById('loanAmount').value),
+        employment: document.getElementById('employment').value,
+        creditScore: parseFloat(document.getElementById('creditScore').value)
+    };
+}
+
+function formComplete(fields) {
+    return fields.income > 0 && fields.loanAmount > 0 && fields.creditScore > 0;
+}
+
+function renderResult(result, detail, animate) {
+    const resultCard = document.getElementById('resultCard');
+    const approved = result.prediction === 'Approved';
+    resultCard.style.display = 'flex';
+    resultCard.innerHTML = `
+        <div class="result-icon" id="resultIcon">${approved ? '✅' : '⏳'}</div>
+        <div class="result-status" id="resultStatus">${approved ? 'APPROVED' : 'UNDER REVIEW'}</div>
+        <div class="result-score" id="resultScore">${result.confidence}% Confidence</div>
+        <div class="confidence-bar">
+            <div class="confidence-fill" id="confidenceFill" style="--confidence: ${result.confidence}%"></div>
+        </div>
+        <div class="result-detail" id="resultDetail"></div>
+    `;
+    resultCard.querySelector('.result-detail').textContent = detail;
+    resultCard.classList.add('show');
+    if (!animate) return;
+
+    resultCard.style.animation = 'flipIn 0.8s ease-out';
+
+    // Add pulsing effect to icon
+    setTimeout(() => {
+        const icon = resultCard.querySelector('.result-icon');
+        if (icon) icon.style.animation = 'pulse 2s ease-in-out infinite';
+    }, 100);
+
+    // Animate confidence bar
+    const fill = resultCard.querySelector('.confidence-fill');
+    if (fill) {
+        fill.style.animation = `growBar 1.5s ease-out forwards`;
+    }
+}
+
+function renderError(message) {
+    const resultCard = document.getElementById('resultCard');
+    resultCard.style.display = 'flex';
+    resultCard.innerHTML = `
+        <div class="result-icon">⚠️</div>
+        <div class="result-status">PREDICTION FAILED</div>
+        <div class="result-detail"></div>
+    `;
+    resultCard.querySelector('.result-detail').textContent = message;
+}
+
+// Score at most once per frame however fast the user types
+function schedulePreview() {
+    if (previewPending) return;
+    previewPending = true;
+    requestAnimationFrame(() => {
+        previewPending = false;
+        const fields = readForm();
+        if (!previewModel || !formComplete(fields)) return;
+        try {
+            const result = previewModel.predict(LoanModel.dashboardRecord(fields));
+            renderResult(result, 'Live preview from the model in your browser. Submit for the final decision.', false);
+        } catch (err) {
+            console.warn('Preview failed:', err.message);
+        }
+    });
+}
+
+document.getElementById('loanForm').addEventListener('input', schedulePreview);
+
+// Handle Form Submission
+document.getElementById('loanForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    // Show loading state with animation
+    const resultCard = document.getElementById('resultCard');
+    const btnText = document.getElementById('btnText');
+    const originalBtnText = btnText.textContent;
+    btnText.textContent = '⚙️ Analyzing...';
+    btnText.parentElement.disabled = true;
+
+    // Add loading animation to result card
+    resultCard.style.display = 'flex';
+    resultCard.innerHTML = '<div class="loading" style="width: 40px; height: 40px;"></div>';
+
+    try {
+        // The server model makes the decision; the bundle supplies the
+        // fields this form does not ask for
+        const model = await modelReady;
+        const response = await fetch('/predict', {
+            method: 'POST',
+            body: model.formBody(LoanModel.dashboardRecord(readForm()))
+        });
+        const result = await response.json();
+        if (!response.ok || result.status !== 'success') {
+            throw new Error(result.error || `Request failed (${response.status})`);
+        }
+        renderResult(result, `Approval probability ${(result.probability * 100).toFixed(1)}%, from credit history, income, loan amount and employment.`, true);
+    } catch (err) {
+        renderError(err.message);
+    }
+
+    // Reset button
+    btnText.textContent = originalBtnText;
+    btnText.parentElement.disabled = false;
+});
+
+// Add hover ripple effect to buttons
+document.querySelectorAll('.submit-btn').forEach(btn => {
+    btn.addEventListener('mouseenter', function() {
+        const ripple = document.createElement('span');
+        ripple.style.position = 'absolute';
+        ripple.style.width = '10px';
+        ripple.style.height = '10px';
+        ripple.style.backgroundColor = 'rgba(255, 255, 255, 0.5)';
+        ripple.style.borderRadius = '50%';
+        ripple.style.pointerEvents = 'none';
+        this.appendChild(ripple);
+        setTimeout(() => ripple.remove(), 600);
+    });
+});
+
+// Initialize on page load
+window.addEventListener('load', function() {
+    initBackgroundAnimation();
+    initCharts();
+
+    // Animate result card on initial load
+    setTimeout(() => {
+        document.getElementById('resultCard').style.display = 'flex';
+    }, 500);
+
+    // Splash hide logic
+    const splash = document.getElementById('splash');
+    if (splash) {
+        const hide = () => { splash.classList.add('hide'); setTimeout(() => splash.remove(), 900); };
+        setTimeout(hide, 1200);
+        splash.addEventListener('click', hide, { once: true });
+        window.addEventListener('keydown', hide, { once: true });
+        window.addEventListener('touchstart', hide, { once: true });
+    }
+});
+
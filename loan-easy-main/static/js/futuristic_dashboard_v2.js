@@ -0,0 +1,407 @@
+let currentPage = 0;
+let touchStartX = 0;
+let touchEndX = 0;
+
+// Initialize Background
+function initBackground() {
+    const bg = document.getElementById('bgAnimation');
+
+    // Add columns
+    for (let i = 0; i < 25; i++) {
+        const column = document.createElement('div');
+        column.className = 'gradient-column';
+        column.style.left = (i * 4) + '%';
+        column.style.height = '100%';
+        const duration = 3 + Math.random() * 4;
+        column.style.animationDuration = duration + 's';
+        column.style.animationDelay = Math.random() * 2 + 's';
+        column.style.width = (6 + Math.random() * 6) + 'px';
+        column.style.opacity = (0.3 + Math.random() * 0.5);
+        bg.appendChild(column);
+    }
+
+    // Add money icon
+    const moneyIcon = document.createElement('div');
+    moneyIcon.className = 'bg-money-icon';
+    moneyIcon.textContent = '💰';
+    bg.appendChild(moneyIcon);
+
+    // Add globe
+    const globe = document.createElement('div');
+    globe.className = 'bg-globe';
+    globe.textContent = '🌍';
+    bg.appendChild(globe);
+
+    // Add particles
+    for (let i = 0; i < 30; i++) {
+        const particle = document.createElement('div');
+        particle.className = 'particle';
+        const angle = Math.random() * Math.PI * 2;
+        const distance = 200 + Math.random() * 400;
+        particle.style.left = Math.random() * 100 + '%';
+        particle.style.top = Math.random() * 100 + '%';
+        particle.style.setProperty('--tx', Math.cos(angle) * distance + 'px');
+        particle.style.setProperty('--ty', Math.sin(angle) * distance + 'px');
+        particle.style.animationDuration = (8 + Math.random() * 12) + 's';
+        particle.style.animationDelay = Math.random() * 5 + 's';
+        bg.appendChild(particle);
+    }
+
+    // Add upward floating arrows for visual motion
+    const arrowChars = ['⬆️','▲','⇧'];
+    for (let i = 0; i < 22; i++) {
+        const arrow = document.createElement('div');
+        arrow.className = 'arrow-up';
+        arrow.textContent = arrowChars[Math.floor(Math.random() * arrowChars.length)];
+        arrow.style.left = Math.random() * 100 + '%';
+        arrow.style.top = (60 + Math.random() * 30) + '%';
+        arrow.style.fontSize = (14 + Math.random() * 18) + 'px';
+        const dur = 3 + Math.random() * 6;
+        arrow.style.animationDuration = dur + 's';
+        arrow.style.animationDelay = Math.random() * 4 + 's';
+        bg.appendChild(arrow);
+    }
+
+    // Center image placeholder - set to provided second image path if available
+    const centerImage = document.getElementById('centerImage');
+    // Replace the image at /static/img/bank_circuit.png with your copy of the second image
+    centerImage.style.backgroundImage = "url('/static/img/bank_circuit.png')";
+
+    // Add a group of coins/mini-orbits around central globe for depth
+    for (let i = 0; i < 12; i++) {
+        const coin = document.createElement('div');
+        coin.className = 'money-item coin-flip';
+        coin.textContent = '💵';
+        coin.style.left = 50 + Math.cos(i / 12 * Math.PI * 2) * (60 + Math.random() * 40) + '%';
+        coin.style.top = 50 + Math.sin(i / 12 * Math.PI * 2) * (40 + Math.random() * 30) + '%';
+        coin.style.fontSize = (16 + Math.random() * 18) + 'px';
+        coin.style.opacity = 0.12;
+        coin.style.animationDuration = (4 + Math.random() * 6) + 's';
+        bg.appendChild(coin);
+    }
+}
+
+// Navigation
+function goToPage(index) {
+    const pages = document.querySelectorAll('.page');
+    const indicators = document.querySelectorAll('.indicator-dot');
+    const tabs = document.querySelectorAll('.tab-btn');
+
+    pages.forEach((page, i) => {
+        page.classList.remove('prev', 'next');
+        if (i < index) page.classList.add('prev');
+        if (i > index) page.classList.add('next');
+    });
+
+    indicators.forEach((dot, i) => {
+        dot.classList.toggle('active', i === index);
+    });
+
+    tabs.forEach((tab, i) => {
+        tab.classList.toggle('active', i === index);
+    });
+
+    currentPage = index;
+}
+
+// Touch swipe
+document.addEventListener('touchstart', e => touchStartX = e.changedTouches[0].screenX);
+document.addEventListener('touchend', e => {
+    touchEndX = e.changedTouches[0].screenX;
+    const diff = touchStartX - touchEndX;
+    if (Math.abs(diff) > 50) {
+        if (diff > 0 && currentPage < 2) goToPage(currentPage + 1);
+        if (diff < 0 && currentPage > 0) goToPage(currentPage - 1);
+    }
+});
+
+// Forms and Predictions
+// Real model, scored in the browser for live previews; /predict decides
+const modelReady = LoanModel.load('/models/default/bundle.json');
+let previewModel = null;
+let previewPending = false;
+modelReady.then(model => { previewModel = model; schedulePreview(); })
+    .catch(err => console.warn('Live preview unavailable:', err.message));
+
+function readForm() {
+    return {
+        income: parseFloat(document.getElementById('income').value),
+        loanAmount: parseFloat(document.getElementById('loanAmount').value),
+        employment: document.getElementById('employment').value,
+        creditScore: parseFloat(document.getElementById('creditScore').value)
+    };
+}
+
+function showResult(result, detail) {
+    const approved = result.prediction === 'Approved';
+    document.getElementById('resultIcon').textContent = approved ? '✅' : '⏳';
+    document.getElementById('resultStatus').textContent = approved ? 'APPROVED' : 'UNDER REVIEW';
+    document.getElementById('resultScore').textContent = result.confidence + '% Confidence';
+    document.getElementById('confidenceFill').style.setProperty('--confidence', result.confidence + '%');
+    document.getElementById('resultDetail').textContent = detail;
+}
+
+// Score at most once per frame however fast the user types
+function schedulePreview() {
+    if (previewPending) return;
+    previewPending = true;
+    requestAnimationFrame(() => {
+        previewPending = false;
+        const fields = readForm();
+        if (!previewModel || !(fields.income > 0 && fields.loanAmount > 0 && fields.creditScore > 0)) return;
+        try {
+            showResult(previewModel.predict(LoanModel.dashboardRecord(fields)),
+                       'Live preview from the model in your browser. Submit for the final decision.');
+        } catch (err) {
+            console.warn('Preview failed:', err.message);
+        }
+    });
+}
+
+document.getElementById('loanForm').addEventListener('input', schedulePreview);
+
+document.getElementById('loanForm').addEventListener('submit', async e => {
+    e.preventDefault();
+
+    try {
+        // The server model makes the decision; the bundle supplies the
+        // fields this form does not ask for
+        const model = await modelReady;
+        const response = await fetch('/predict', {
+            method: 'POST',
+            body: model.formBody(LoanModel.dashboardRecord(readForm()))
+        });
+        const result = await response.json();
+        if (!response.ok || result.status !== 'success') {
+            throw new Error(result.error || `Request failed (${response.status})`);
+        }
+        showResult(result, `Approval probability ${(result.probability * 100).toFixed(1)}%, from credit history, income, loan amount and employment.`);
+    } catch (err) {
+        document.getElementById('resultIcon').textContent = '⚠️';
+        document.getElementById('resultStatus').textContent = 'PREDICTION FAILED';
+        document.getElementById('resultScore').textContent = '';
+        document.getElementById('confidenceFill').style.setProperty('--confidence', '0%');
+        document.getElementById('resultDetail').textContent = err.message;
+    }
+
+    goToPage(2);
+});
+
+// Charts
+function initCharts() {
+    const incomeCtx = document.getElementById('incomeChart').getContext('2d');
+    new Chart(incomeCtx, {
+        type: 'bar',
+        data: {
+            labels: ['0-25K', '25-50K', '50-100K', '100K+'],
+            datasets: [{
+                label: 'Applicants',
+                data: [320, 850, 1200, 477],
+                backgroundColor: 'rgba(0, 255, 136, 0.5)',
+                borderColor: '#00ff88',
+                borderWidth: 2,
+                borderRadius: 8
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: { legend: { display: false } },
+            scales: {
+                y: { grid: { color: 'rgba(0, 255, 136, 0.05)' }, ticks: { color: '#b0b9d4' } },
+                x: { grid: { display: false }, ticks: { color: '#b0b9d4' } }
+            }
+        }
+    });
+
+    const scoreCtx = document.getElementById('scoreChart').getContext('2d');
+    new Chart(scoreCtx, {
+        type: 'line',
+        data: {
+            labels: ['300-400', '400-500', '500-600', '600-700', '700-800', '800+'],
+            datasets: [{
+                label: 'Approval %',
+                data: [12, 28, 45, 68, 82, 94],
+                borderColor: '#00ff88',
+                backgroundColor: 'rgba(0, 255, 136, 0.1)',
+                borderWidth: 3,
+                fill: true,
+                tension: 0.4,
+                pointBackgroundColor: '#00ff88'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: { legend: { display: false } },
+            scales: {
+                y: { grid: { color: 'rgba(0, 255, 136, 0.05)' }, ticks: { color: '#b0b9d4' } },
+                x: { grid: { display: false }, ticks: { color: '#b0b9d4' } }
+            }
+        }
+    });
+}
+
+// Globe interaction + modal
+(function setupGlobeInteraction(){
+    const globe = document.getElementById('centralGlobe');
+    const globeInner = document.getElementById('globeInner');
+    const modalOverlay = document.getElementById('globeModal');
+    const modalClose = document.getElementById('modalClose');
+    const modalCloseBtn = document.getElementById('modalCloseBtn');
+
+    let isDragging = false;
+    let startX = 0, startY = 0;
+    let rotX = 0, rotY = 0;
+
+    function openModal(){
+        modalOverlay.classList.add('show');
+        modalOverlay.setAttribute('aria-hidden', 'false');
+        document.body.style.overflow = 'hidden';
+    }
+    function closeModal(){
+        modalOverlay.classList.remove('show');
+        modalOverlay.setAttribute('aria-hidden', 'true');
+        document.body.style.overflow = '';
+    }
+
+    // Mouse / touch drag handlers
+    globe.addEventListener('mousedown', (e) => { isDragging = true; globe.classList.add('dragging'); startX = e.clientX; startY = e.clientY; });
+    window.addEventListener('mousemove', (e) => {
+        if (!isDragging) return;
+        const dx = e.clientX - startX;
+        const dy = e.clientY - startY;
+        rotY += dx * 0.12;
+        rotX -= dy * 0.08;
+        globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`;
+        startX = e.clientX; startY = e.clientY;
+    });
+    window.addEventListener('mouseup', () => { isDragging = false; globe.classList.remove('dragging'); });
+
+    // Touch
+    globe.addEventListener('touchstart', (e) => { isDragging = true; globe.classList.add('dragging'); startX = e.touches[0].clientX; startY = e.touches[0].clientY; });
+    window.addEventListener('touchmove', (e) => {
+        if (!isDragging) return;
+        const dx = e.touches[0].clientX - startX;
+        const dy = e.touches[0].clientY - startY;
+        rotY += dx * 0.12;
+        rotX -= dy * 0.08;
+        globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`;
+        startX = e.touches[0].clientX; startY = e.touches[0].clientY;
+    });
+    window.addEventListener('touchend', () => { isDragging = false; globe.classList.remove('dragging'); });
+
+    // Keyboard accessibility
+    globe.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); openModal(); }
+        // arrow keys rotate globe
+        if (e.key === 'ArrowLeft') { rotY -= 10; globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`; }
+        if (e.key === 'ArrowRight') { rotY += 10; globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`; }
+        if (e.key === 'ArrowUp') { rotX -= 8; globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`; }
+        if (e.key === 'ArrowDown') { rotX += 8; globe.style.transform = `translate(-50%, -50%) rotateX(${rotX}deg) rotateY(${rotY}deg)`; }
+    });
+
+    // Click to open modal if not dragging
+    globe.addEventListener('click', (e) => {
+        if (!isDragging) openModal();
+    });
+
+    modalClose.addEventListener('click', closeModal);
+    modalCloseBtn.addEventListener('click', closeModal);
+    modalOverlay.addEventListener('click', e => { if (e.target === modalOverlay) closeModal(); });
+    window.addEventListener('keydown', e => { if (e.key === 'Escape') closeModal(); });
+
+})();
+
+// Matrix Rain Initialization
+function initMatrixRain() {
+    const matrix = document.getElementById('matrixRain');
+    if (!matrix) return;
+    matrix.innerHTML = '';
+    const chars = '01ABCDEF$%#@&*+-:<>=';
+    const columnWidth = 14; // approx px per char
+    const cols = Math.ceil(window.innerWidth / columnWidth);
+
+    for (let i = 0; i < cols; i++) {
+        const col = document.createElement('div');
+        col.className = 'matrix-col';
+        col.style.left = (i * (100 / cols)) + '%';
+        const len = 6 + Math.floor(Math.random() * 24);
+        let str = '';
+        for (let j = 0; j < len; j++) str += chars.charAt(Math.floor(Math.random() * chars.length));
+        col.textContent = str;
+        const dur = 3 + Math.random() * 6;
+        col.style.animation = `matrixFall ${dur}s linear ${Math.random() * 2}s infinite`;
+        col.style.fontSize = (12 + Math.random() * 20) + 'px';
+        col.style.opacity = (0.02 + Math.random() * 0.24).toFixed(2);
+        matrix.appendChild(col);
+    }
+
+    // Periodically refresh characters for dynamic feel
+    if (window._matrixRefreshInterval) clearInterval(window._matrixRefreshInterval);
+    window._matrixRefreshInterval = setInterval(() => {
+        const cols = matrix.querySelectorAll('.matrix-col');
+        cols.forEach(col => {
+            let newLen = 6 + Math.floor(Math.random() * 24);
+            let newStr = '';
+            for (let j = 0; j < newLen; j++) newStr += chars.charAt(Math.floor(Math.random() * chars.length));
+            col.textContent = newStr;
+            col.style.opacity = (0.02 + Math.random() * 0.24).toFixed(2);
+        });
+    }, 2800 + Math.random() * 2000);
+}
+
+// Debounced resize for matrix
+let _matrixResizeTimer = null;
+window.addEventListener('resize', () => {
+    clearTimeout(_matrixResizeTimer);
+    _matrixResizeTimer = setTimeout(() => initMatrixRain(), 300);
+});
+
+// Parallax / subtle mouse movement for layers
+function setupParallax() {
+    const layers = [
+        { el: document.getElementById('rotatingGradient'), depth: 0.03 },
+        { el: document.getElementById('scanlines'), depth: 0.02 },
+        { el: document.getElementById('matrixRain'), depth: 0.015 },
+        { el: document.getElementById('bgAnimation'), depth: 0.06 },
+        { el: document.getElementById('centerImage'), depth: 0.045 },
+        { el: document.getElementById('centralGlobe'), depth: 0.12 }
+    ].filter(l => l.el);
+
+    let mouseX = 0, mouseY = 0, tx = 0, ty = 0;
+    window.addEventListener('mousemove', e => {
+        mouseX = (e.clientX / window.innerWidth - 0.5) * 2; // normalized -1..1
+        mouseY = (e.clientY / window.innerHeight - 0.5) * 2;
+    });
+
+    function animateParallax() {
+        tx += (mouseX - tx) * 0.08;
+        ty += (mouseY - ty) * 0.08;
+        layers.forEach(layer => {
+            layer.el.style.transform = `translate(${ -tx * layer.depth * 100 }px, ${ -ty * layer.depth * 60 }px)`;
+        });
+        requestAnimationFrame(animateParallax);
+    }
+    requestAnimationFrame(animateParallax);
+}
+
+// Init
+window.addEventListener('load', () => {
+    initBackground();
+    initMatrixRain();
+    setupParallax();
+    setTimeout(initCharts, 500);
+
+    // Splash hide logic
+    const splash = document.getElementById('splash');
+    if (splash) {
+        // hide after 1.2s or on click/any key
+        const hide = () => { splash.classList.add('hide'); setTimeout(() => splash.remove(), 900); };
+        setTimeout(hide, 1200);
+        splash.addEventListener('click', hide, { once: true });
+        window.addEventListener('keydown', hide, { once: true });
+        window.addEventListener('touchstart', hide, { once: true });
+    }
+});
+
@@ -0,0 +1,11 @@
+// Splash hide logic for index
+window.addEventListener('load', () => {
+    const splash = document.getElementById('splash');
+    if (!splash) return;
+    const hide = () => { splash.classList.add('hide'); setTimeout(() => splash.remove(), 900); };
+    setTimeout(hide, 1200);
+    splash.addEventListener('click', hide, { once: true });
+    window.addEventListener('keydown', hide, { once: true });
+    window.addEventListener('touchstart', hide, { once: true });
+});
+
@@ -0,0 +1,188 @@
+// Create floating icons
+const icons = ['fa-dollar-sign', 'fa-coins', 'fa-money-bill-wave', 'fa-building-columns', 'fa-landmark', 'fa-credit-card', 'fa-piggy-bank', 'fa-chart-line', 'fa-hand-holding-dollar', 'fa-wallet'];
+const floatingContainer = document.getElementById('floatingIcons');
+
+function createFloatingIcon() {
+    const icon = document.createElement('i');
+    icon.className = `fas ${icons[Math.floor(Math.random() * icons.length)]} floating-icon`;
+    icon.style.left = Math.random() * 100 + '%';
+    icon.style.fontSize = (Math.random() * 2 + 1.5) + 'rem';
+    icon.style.animationDuration = (Math.random() * 10 + 15) + 's';
+    icon.style.animationDelay = Math.random() * 5 + 's';
+    floatingContainer.appendChild(icon);
+
+    // Remove after animation completes
+    setTimeout(() => {
+        icon.remove();
+    }, (parseFloat(icon.style.animationDuration) + parseFloat(icon.style.animationDelay)) * 1000);
+}
+
+// Create initial batch of icons
+for (let i = 0; i < 20; i++) {
+    createFloatingIcon();
+}
+
+// Continuously create new icons
+setInterval(createFloatingIcon, 2000);
+
+// Live preview over a streaming channel: only the fields that changed are
+// sent and the server pushes the new score. Without a channel (disabled, or
+// the worker is at its cap) the form just waits for submit.
+const LIVE_DEBOUNCE_MS = 50;
+const live = { source: null, session: null, seq: 0, sent: {}, version: 0, timer: null };
+
+function changedFields() {
+    const changed = {};
+    for (const [field, value] of new FormData(document.getElementById('loanForm'))) {
+        if (value !== '' && live.sent[field] !== value) changed[field] = value;
+    }
+    return changed;
+}
+
+function showLiveMessage(message) {
+    const preview = document.getElementById('livePreview');
+    preview.textContent = message;
+    preview.style.display = message ? 'block' : 'none';
+}
+
+function showLiveScore(data) {
+    // Scores arrive in version order; never replace a newer one
+    if (data.version < live.version) return;
+    live.version = data.version;
+    const preview = document.getElementById('livePreview');
+    const prediction = document.createElement('strong');
+    prediction.textContent = data.prediction;
+    preview.replaceChildren('Live estimate: ', prediction,
+                            ` · ${data.confidence.toFixed(1)}% confidence`);
+    preview.style.display = 'block';
+}
+
+function closeLive() {
+    if (live.source) live.source.close();
+    live.source = null;
+    live.session = null;
+    showLiveMessage('');
+}
+
+async function sendLiveChanges() {
+    live.timer = null;
+    const changed = changedFields();
+    if (!live.session || !Object.keys(changed).length) return;
+    Object.assign(live.sent, changed);
+    try {
+        const response = await fetch(`/live/${live.session}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ seq: live.seq++, fields: changed })
+        });
+        if (response.status === 404) {
+            // Session expired or is held by another worker
+            closeLive();
+        } else if (response.status === 400) {
+            for (const field of Object.keys(changed)) delete live.sent[field];
+            showLiveMessage((await response.json()).error);
+        }
+    } catch (error) {
+        for (const field of Object.keys(changed)) delete live.sent[field];
+    }
+}
+
+function scheduleLiveUpdate() {
+    if (live.session && live.timer === null) {
+        live.timer = setTimeout(sendLiveChanges, LIVE_DEBOUNCE_MS);
+    }
+}
+
+function openLive() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/live/stream');
+    live.source = source;
+    source.addEventListener('session', e => {
+        // A new session (also after a reconnect) starts from an empty row
+        live.session = JSON.parse(e.data).session;
+        live.sent = {};
+        live.version = 0;
+        sendLiveChanges();
+    });
+    source.addEventListener('score', e => showLiveScore(JSON.parse(e.data)));
+    source.addEventListener('incomplete', () => showLiveMessage(''));
+    // All channels were taken between the request and the stream start
+    source.addEventListener('unavailable', closeLive);
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) closeLive();
+        else live.session = null;
+    };
+}
+
+document.getElementById('loanForm').addEventListener('input', scheduleLiveUpdate);
+document.getElementById('loanForm').addEventListener('change', scheduleLiveUpdate);
+openLive();
+
+// Form submission
+document.getElementById('loanForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const submitBtn = document.getElementById('submitBtn');
+    const loading = document.getElementById('loading');
+    const result = document.getElementById('result');
+
+    // Hide previous results
+    result.style.display = 'none';
+    loading.style.display = 'block';
+    submitBtn.disabled = true;
+
+    // Get form data
+    const formData = new FormData(e.target);
+
+    try {
+        // Send prediction request
+        const response = await fetch('/predict', {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        // Hide loading
+        loading.style.display = 'none';
+        submitBtn.disabled = false;
+
+        if (data.status === 'success') {
+            // Show result
+            const resultDiv = document.getElementById('result');
+            const resultTitle = document.getElementById('resultTitle');
+            const resultMessage = document.getElementById('resultMessage');
+            const confidenceFill = document.getElementById('confidenceFill');
+            const confidenceText = document.getElementById('confidenceText');
+
+            if (data.prediction === 'Approved') {
+                resultDiv.className = 'result-container result-approved';
+                resultTitle.innerHTML = '<i class="fas fa-check-circle"></i> Congratulations!';
+                resultMessage.textContent = `Your loan application is likely to be APPROVED! Our AI model predicts a positive outcome for your application.`;
+            } else {
+                resultDiv.className = 'result-container result-rejected';
+                resultTitle.innerHTML = '<i class="fas fa-times-circle"></i> Application Review Needed';
+                resultMessage.textContent = `Based on the information provided, your loan application may require additional review. Consider improving your credit score or adjusting the loan amount.`;
+            }
+
+            // Animate confidence bar
+            setTimeout(() => {
+                confidenceFill.style.width = data.confidence + '%';
+                confidenceText.textContent = data.confidence.toFixed(1) + '% Confidence';
+            }, 100);
+
+            resultDiv.style.display = 'block';
+
+            // Scroll to result
+            resultDiv.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+        } else {
+            alert('Error: ' + data.error);
+        }
+
+    } catch (error) {
+        loading.style.display = 'none';
+        submitBtn.disabled = false;
+        alert('Error connecting to server: ' + error.message);
+    }
+});
+
@@ -0,0 +1,144 @@
+// In-browser scoring of the model bundle exported by browser_model.py
+// Mirrors sklearn exactly: inputs are rounded to float32 and compared with
+// `x <= threshold`, and tree outputs are summed in order from the init score.
+// Previews only; /predict remains the authoritative decision.
+(function (root) {
+    'use strict';
+
+    const BUNDLE_VERSION = 1;
+
+    // Dashboards ask for a credit score rather than the dataset's
+    // "meets credit guidelines" flag
+    const CREDIT_HISTORY_MIN_SCORE = 650;
+
+    const DERIVED = {
+        Total_Income: r => r.ApplicantIncome + r.CoapplicantIncome,
+        // Loan amount is in $1000s, incomes are monthly
+        Loan_to_Income: r => {
+            const annual = (r.ApplicantIncome + r.CoapplicantIncome) * 12;
+            return annual > 0 ? r.LoanAmount * 1000 / annual : 0;
+        }
+    };
+
+    function decode(base64, Type) {
+        const binary = atob(base64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+        return new Type(bytes.buffer);
+    }
+
+    class LoanModel {
+        constructor(bundle) {
+            if (bundle.version !== BUNDLE_VERSION) {
+                throw new Error(`Unsupported model bundle version: ${bundle.version}`);
+            }
+            this.version = bundle.model_version;
+            this.features = bundle.features;
+            this.numeric = bundle.numeric;
+            this.derived = bundle.derived;
+            this.defaults = bundle.defaults;
+            this.formFields = bundle.form_fields;
+            this.outputSpace = bundle.output_space;
+            this.init = bundle.init;
+            this.logitScale = bundle.logit_scale;
+            this.vocabularies = {};
+            for (const [col, values] of Object.entries(bundle.categorical)) {
+                this.vocabularies[col] = new Map(values.map((value, code) => [value, code]));
+            }
+            const trees = bundle.trees;
+            this.roots = decode(trees.roots, Int32Array);
+            this.feature = decode(trees.feature, Int16Array);
+            this.threshold = decode(trees.threshold, Float64Array);
+            this.left = decode(trees.left, Int32Array);
+            this.right = decode(trees.right, Int32Array);
+        }
+
+        static async load(url) {
+            const response = await fetch(url);
+            if (!response.ok) throw new Error(`Could not load model bundle (${response.status})`);
+            return new LoanModel(await response.json());
+        }
+
+        // Complete record: the given fields plus the bundle defaults
+        complete(record) {
+            return Object.assign({}, this.defaults, record);
+        }
+
+        // Feature row for a record keyed by feature name, as float32
+        encode(record) {
+            const r = this.complete(record);
+            const columns = {};
+            for (const col of this.numeric) {
+                const value = Number(r[col]);
+                if (r[col] === undefined || r[col] === '' || Number.isNaN(value)) {
+                    throw new Error(`Missing field: ${col}`);
+                }
+                columns[col] = value;
+            }
+            for (const [col, vocabulary] of Object.entries(this.vocabularies)) {
+                const code = vocabulary.get(String(r[col]).trim());
+                if (code === undefined) {
+                    throw new Error(`Unknown value for '${col}': ${r[col]}`);
+                }
+                columns[col] = code;
+            }
+            for (const name of this.derived) columns[name] = DERIVED[name](columns);
+            return Float32Array.from(this.features, name => columns[name]);
+        }
+
+        rawScore(x) {
+            const { roots, feature, threshold, left, right } = this;
+            let score = this.init;
+            for (let t = 0; t < roots.length; t++) {
+                let node = roots[t];
+                while (left[node] !== -1) {
+                    node = x[feature[node]] <= threshold[node] ? left[node] : right[node];
+                }
+                score += threshold[node];
+            }
+            return score;
+        }
+
+        // Approval (class 1) probability
+        predictProba(record) {
+            const raw = this.rawScore(this.encode(record));
+            if (this.outputSpace === 'log_odds') return 1 / (1 + Math.exp(-this.logitScale * raw));
+            return raw;
+        }
+
+        // Same fields as the /predict response
+        predict(record) {
+            const probability = this.predictProba(record);
+            const approved = probability > 0.5;
+            return {
+                prediction: approved ? 'Approved' : 'Not Approved',
+                confidence: Math.round((approved ? probability : 1 - probability) * 10000) / 100,
+                probability: Math.round(probability * 10000) / 10000
+            };
+        }
+
+        // Form body for POST /predict with every field the model needs
+        formBody(record) {
+            const r = this.complete(record);
+            const body = new URLSearchParams();
+            for (const [feature, field] of Object.entries(this.formFields)) {
+                if (r[feature] !== undefined) body.append(field, r[feature]);
+            }
+            return body;
+        }
+
+        // Record from the futuristic dashboards' fields (annual income in $,
+        // loan amount in $, credit score, employment status)
+        static dashboardRecord(fields) {
+            return {
+                ApplicantIncome: fields.income / 12,
+                LoanAmount: fields.loanAmount / 1000,
+                Credit_History: fields.creditScore >= CREDIT_HISTORY_MIN_SCORE ? 1 : 0,
+                Self_Employed: fields.employment === 'self-employed' ? 'Yes' : 'No'
+            };
+        }
+    }
+
+    root.LoanModel = LoanModel;
+    if (typeof module !== 'undefined' && module.exports) module.exports = LoanModel;
+})(typeof window !== 'undefined' ? window : globalThis);
@@ -4,15 +4,21 @@ Train and evaluate loan approval prediction models
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+import argparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from model_benchmark import (
+    measure_fit, benchmark_model, select_best_model, format_benchmark,
+    write_benchmark_info, save_benchmarks_json, add_budget_arguments, budgets_from_args
+)
+from preprocessing import LoanPreprocessor, NUMERIC_COLS, CATEGORICAL_COLS
+from kernel_svm import make_approx_svm, compare_svm_variants, print_svm_comparison
+
 def load_and_preprocess_data(filepath='loan_data.csv'):
     """Load and preprocess the loan data"""
     df = pd.read_csv(filepath)
@@ -24,21 +30,15 @@ def load_and_preprocess_data(filepath='loan_data.csv'):
     # Handle missing values (if any)
     df = df.dropna()
     
-    # Encode categorical variables
-    label_encoders = {}
-    categorical_cols = ['Gender', 'Married', 'Dependents', 'Education', 
-                       'Self_Employed', 'Property_Area']
-    
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        label_encoders[col] = le
+    # Encode categorical variables with the shared preprocessor
+    preprocessor = LoanPreprocessor(NUMERIC_COLS, CATEGORICAL_COLS).fit(df)
     
-    # Save label encoders
-    joblib.dump(label_encoders, 'label_encoders.pkl')
+    # Save preprocessor and label encoders
+    joblib.dump(preprocessor, 'preprocessor.pkl')
+    joblib.dump(preprocessor.to_label_encoders(), 'label_encoders.pkl')
     
     # Prepare features and target
-    X = df.drop('Loan_Status', axis=1)
+    X = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.feature_names, index=df.index)
     y = df['Loan_Status'].map({'Y': 1, 'N': 0})
     
     return X, y, df
@@ -49,7 +49,7 @@ def train_models(X_train, X_test, y_train, y_test):
     models = {
         'Decision Tree': DecisionTreeClassifier(random_state=42, max_depth=5),
         'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
-        'SVM': SVC(kernel='rbf', random_state=42, probability=True)
+        'SVM': make_approx_svm(random_state=42)
     }
     
     results = {}
@@ -59,8 +59,8 @@ def train_models(X_train, X_test, y_train, y_test):
         print(f"Training {name}...")
         print('='*50)
         
-        # Train the model
-        model.fit(X_train, y_train)
+        # Train the model (timed, with peak memory tracking)
+        fit_time, peak_fit_bytes = measure_fit(model, X_train, y_train)
         
         # Predictions
         y_pred = model.predict(X_test)
@@ -71,8 +71,14 @@ def train_models(X_train, X_test, y_train, y_test):
         # Cross-validation score
         cv_scores = cross_val_score(model, X_train, y_train, cv=5)
         
+        # Serving cost: latency, artifact size
+        benchmark = benchmark_model(model, X_test)
+        benchmark['fit_time_s'] = fit_time
+        benchmark['peak_fit_bytes'] = peak_fit_bytes
+        
         print(f"\nAccuracy: {accuracy:.4f}")
         print(f"Cross-Validation Score: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        print(f"Serving cost: {format_benchmark(benchmark)}")
         print(f"\nClassification Report:")
         print(classification_report(y_test, y_pred, target_names=['Not Approved', 'Approved']))
         
@@ -84,7 +90,8 @@ def train_models(X_train, X_test, y_train, y_test):
             'accuracy': accuracy,
             'cv_score': cv_scores.mean(),
             'predictions': y_pred,
-            'confusion_matrix': cm
+            'confusion_matrix': cm,
+            'benchmark': benchmark
         }
     
     return results
@@ -132,9 +139,10 @@ def plot_results(results, y_test):
     print("\n✓ Model comparison plot saved as 'model_comparison.png'")
     plt.close()
 
-def save_best_model(results):
-    """Save the best performing model"""
-    best_model_name = max(results, key=lambda x: results[x]['accuracy'])
+def save_best_model(results, budgets=None):
+    """Save the best performing model (within the serving budgets)"""
+    budgets = budgets or {}
+    best_model_name = select_best_model(results, **budgets)
     best_model = results[best_model_name]['model']
     
     joblib.dump(best_model, 'loan_model.pkl')
@@ -143,6 +151,9 @@ def save_best_model(results):
         f.write(f"Best Model: {best_model_name}\n")
         f.write(f"Accuracy: {results[best_model_name]['accuracy']:.4f}\n")
         f.write(f"CV Score: {results[best_model_name]['cv_score']:.4f}\n")
+        write_benchmark_info(f, results, best_model_name)
+    
+    save_benchmarks_json(results, best_model_name, 'model_benchmarks.json', budgets)
     
     print(f"\n✓ Best model ({best_model_name}) saved as 'loan_model.pkl'")
     print(f"✓ Accuracy: {results[best_model_name]['accuracy']:.4f}")
@@ -154,6 +165,14 @@ if __name__ == "__main__":
     print("LOAN APPROVAL PREDICTION MODEL TRAINING")
     print("="*60)
     
+    parser = argparse.ArgumentParser(description='Train loan approval models')
+    add_budget_arguments(parser)
+    parser.add_argument('--compare-exact-svm', action='store_true',
+                        help='Report accuracy/time of the approximate SVM against exact SVC')
+    parser.add_argument('--max-exact-svm-rows', type=int, default=None,
+                        help='Skip the exact SVC above this many training rows')
+    args = parser.parse_args()
+    
     # Load and preprocess data
     X, y, df = load_and_preprocess_data()
     
@@ -168,11 +187,20 @@ if __name__ == "__main__":
     # Train models
     results = train_models(X_train, X_test, y_train, y_test)
     
+    # Exact vs approximate SVM trade-off
+    if args.compare_exact_svm:
+        print("\n" + "="*60)
+        print("SVM: EXACT RBF SVC vs NYSTROEM + LINEAR SVM")
+        print("="*60)
+        print_svm_comparison(compare_svm_variants(
+            X_train, X_test, y_train, y_test, max_exact_rows=args.max_exact_svm_rows
+        ))
+    
     # Plot results
     plot_results(results, y_test)
     
     # Save best model
-    best_model_name = save_best_model(results)
+    best_model_name = save_best_model(results, budgets_from_args(args))
     
     print("\n" + "="*60)
     print("TRAINING COMPLETED SUCCESSFULLY!")
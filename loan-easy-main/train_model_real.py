@@ -4,15 +4,27 @@ Train loan approval model on REAL dataset
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+import argparse
+import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from model_benchmark import (
+    measure_fit, benchmark_model, select_best_model, format_benchmark,
+    write_benchmark_info, save_benchmarks_json, add_budget_arguments, budgets_from_args
+)
+from preprocessing import LoanPreprocessor
+from drift import build_profile, save_profile
+from model_registry import DRIFT_PROFILE_FILE, BROWSER_BUNDLE_FILE
+from audit_log import file_digest
+from browser_model import export_bundle, save_bundle
+from kernel_svm import make_approx_svm, compare_svm_variants, print_svm_comparison
+from segment_report import REAL_SEGMENTS, segment_report
+
 def load_and_preprocess_real_data(filepath='real_data/loan_approval_dataset.csv'):
     """Load and preprocess the real loan dataset"""
     df = pd.read_csv(filepath)
@@ -42,22 +54,21 @@ def load_and_preprocess_real_data(filepath='real_data/loan_approval_dataset.csv'
         df = df.drop('loan_id', axis=1)
         print("\n✓ Dropped 'loan_id' column")
     
-    # Encode categorical variables
+    # Encode categorical variables with the shared preprocessor
     print("\nEncoding categorical variables...")
-    label_encoders = {}
     categorical_cols = ['education', 'self_employed']
+    feature_names = [col for col in df.columns if col != 'loan_status']
+    numeric_cols = [col for col in feature_names if col not in categorical_cols]
+    preprocessor = LoanPreprocessor(numeric_cols, categorical_cols, defaults={},
+                                    feature_order=feature_names)
+    preprocessor.fit(df)
     
     for col in categorical_cols:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        label_encoders[col] = le
-        print(f"  ✓ Encoded '{col}': {dict(zip(le.classes_, le.transform(le.classes_)))}")
-    
-    # Save label encoders
-    joblib.dump(label_encoders, 'label_encoders_real.pkl')
+        classes = preprocessor.classes_[col]
+        print(f"  ✓ Encoded '{col}': {dict(zip(classes, range(len(classes))))}")
     
-    # Prepare features and target
-    X = df.drop('loan_status', axis=1)
+    # Prepare features and target (original column order)
+    X = pd.DataFrame(preprocessor.transform(df), columns=feature_names, index=df.index)
     # Strip spaces from loan_status values
     df['loan_status'] = df['loan_status'].str.strip()
     y = df['loan_status'].map({'Approved': 1, 'Rejected': 0})
@@ -71,7 +82,7 @@ def load_and_preprocess_real_data(filepath='real_data/loan_approval_dataset.csv'
     print("="*70)
     print(X.describe())
     
-    return X, y, df, label_encoders
+    return X, y, df, preprocessor
 
 def analyze_feature_correlations(df):
     """Analyze feature correlations with target"""
@@ -79,35 +90,17 @@ def analyze_feature_correlations(df):
     print("FEATURE ANALYSIS")
     print("="*70)
     
-    # CIBIL Score impact
+    # One pass computes every breakdown (CIBIL, income and loan-size bands)
+    report = segment_report([df], REAL_SEGMENTS, 'loan_status', 'Approved')
+    
     print("\nCIBIL Score vs Approval:")
-    df['cibil_category'] = pd.cut(df['cibil_score'], 
-                                   bins=[0, 550, 650, 750, 900],
-                                   labels=['Poor (<550)', 'Fair (550-650)', 'Good (650-750)', 'Excellent (>750)'])
-    cibil_impact = df.groupby('cibil_category')['loan_status'].apply(
-        lambda x: (x=='Approved').sum()/len(x)*100
-    )
-    print(cibil_impact)
+    print(report.approval_rates('cibil_category'))
     
-    # Income impact
     print("\nIncome Level vs Approval:")
-    df['income_category'] = pd.cut(df['income_annum'], 
-                                   bins=[0, 2000000, 5000000, 10000000, 100000000],
-                                   labels=['Low (<2M)', 'Medium (2-5M)', 'High (5-10M)', 'Very High (>10M)'])
-    income_impact = df.groupby('income_category')['loan_status'].apply(
-        lambda x: (x=='Approved').sum()/len(x)*100
-    )
-    print(income_impact)
+    print(report.approval_rates('income_category'))
     
-    # Loan amount impact
     print("\nLoan Amount vs Approval:")
-    df['loan_category'] = pd.cut(df['loan_amount'], 
-                                 bins=[0, 5000000, 10000000, 20000000, 100000000],
-                                 labels=['Small (<5M)', 'Medium (5-10M)', 'Large (10-20M)', 'Very Large (>20M)'])
-    loan_impact = df.groupby('loan_category')['loan_status'].apply(
-        lambda x: (x=='Approved').sum()/len(x)*100
-    )
-    print(loan_impact)
+    print(report.approval_rates('loan_category'))
 
 def train_models(X_train, X_test, y_train, y_test):
     """Train multiple classification models"""
@@ -116,7 +109,7 @@ def train_models(X_train, X_test, y_train, y_test):
         'Decision Tree': DecisionTreeClassifier(random_state=42, max_depth=10),
         'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42, max_depth=15),
         'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42, max_depth=5),
-        'SVM': SVC(kernel='rbf', random_state=42, probability=True)
+        'SVM': make_approx_svm(random_state=42)
     }
     
     results = {}
@@ -126,8 +119,8 @@ def train_models(X_train, X_test, y_train, y_test):
         print(f"Training {name}...")
         print('='*70)
         
-        # Train the model
-        model.fit(X_train, y_train)
+        # Train the model (timed, with peak memory tracking)
+        fit_time, peak_fit_bytes = measure_fit(model, X_train, y_train)
         
         # Predictions
         y_pred = model.predict(X_test)
@@ -138,8 +131,14 @@ def train_models(X_train, X_test, y_train, y_test):
         # Cross-validation score
         cv_scores = cross_val_score(model, X_train, y_train, cv=5)
         
+        # Serving cost: latency, artifact size
+        benchmark = benchmark_model(model, X_test)
+        benchmark['fit_time_s'] = fit_time
+        benchmark['peak_fit_bytes'] = peak_fit_bytes
+        
         print(f"\nAccuracy: {accuracy:.4f}")
         print(f"Cross-Validation Score: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        print(f"Serving cost: {format_benchmark(benchmark)}")
         print(f"\nClassification Report:")
         print(classification_report(y_test, y_pred, target_names=['Rejected', 'Approved']))
         
@@ -151,12 +150,13 @@ def train_models(X_train, X_test, y_train, y_test):
             'accuracy': accuracy,
             'cv_score': cv_scores.mean(),
             'predictions': y_pred,
-            'confusion_matrix': cm
+            'confusion_matrix': cm,
+            'benchmark': benchmark
         }
     
     return results
 
-def plot_results(results, y_test, X):
+def plot_results(results, y_test, X, best_model_name=None):
     """Plot model comparison and feature importance"""
     
     # Model Comparison
@@ -196,7 +196,8 @@ def plot_results(results, y_test, X):
             ax.set_yticklabels(['Rejected', 'Approved'])
     
     # Feature importance for best model
-    best_model_name = max(results, key=lambda x: results[x]['accuracy'])
+    if best_model_name is None:
+        best_model_name = max(results, key=lambda x: results[x]['accuracy'])
     best_model = results[best_model_name]['model']
     
     ax_feat = axes[1, 2]
@@ -223,25 +224,33 @@ def plot_results(results, y_test, X):
     print("\n✓ Model comparison plot saved as 'real_model_comparison.png'")
     plt.close()
 
-def save_best_model(results, X):
-    """Save the best performing model"""
-    best_model_name = max(results, key=lambda x: results[x]['accuracy'])
+def save_best_model(results, best_model_name, X, preprocessor, output_dir='Models/real', budgets=None):
+    """Save the chosen model and its schema; budgets are recorded with the benchmarks"""
+    budgets = budgets or {}
     best_model = results[best_model_name]['model']
     
-    joblib.dump(best_model, 'loan_model_real.pkl')
+    # One directory per model: the app serves it at /models/<name>/predict
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(best_model, os.path.join(output_dir, 'model.pkl'))
     
-    # Save feature names
-    joblib.dump(X.columns.tolist(), 'feature_names_real.pkl')
+    # Save the fitted preprocessor (the serving schema), encoders and feature names
+    joblib.dump(preprocessor, os.path.join(output_dir, 'preprocessor.pkl'))
+    joblib.dump(preprocessor.to_label_encoders(), os.path.join(output_dir, 'label_encoders.pkl'))
+    joblib.dump(X.columns.tolist(), os.path.join(output_dir, 'feature_names.pkl'))
     
-    with open('model_info_real.txt', 'w') as f:
+    with open(os.path.join(output_dir, 'model_info.txt'), 'w') as f:
         f.write(f"Best Model: {best_model_name}\n")
         f.write(f"Accuracy: {results[best_model_name]['accuracy']:.4f}\n")
         f.write(f"CV Score: {results[best_model_name]['cv_score']:.4f}\n")
         f.write(f"\nFeatures used:\n")
         for feat in X.columns:
             f.write(f"  - {feat}\n")
+        write_benchmark_info(f, results, best_model_name)
     
-    print(f"\n✓ Best model ({best_model_name}) saved as 'loan_model_real.pkl'")
+    save_benchmarks_json(results, best_model_name,
+                         os.path.join(output_dir, 'model_benchmarks.json'), budgets)
+    
+    print(f"\n✓ Best model ({best_model_name}) saved to '{output_dir}/'")
     print(f"✓ Accuracy: {results[best_model_name]['accuracy']:.4f}")
     print(f"✓ CV Score: {results[best_model_name]['cv_score']:.4f}")
     
@@ -267,8 +276,22 @@ if __name__ == "__main__":
     print("LOAN APPROVAL MODEL TRAINING - REAL DATASET")
     print("="*70)
     
+    parser = argparse.ArgumentParser(description='Train loan approval models on the real dataset')
+    add_budget_arguments(parser)
+    parser.add_argument('--compare-exact-svm', action='store_true',
+                        help='Report accuracy/time of the approximate SVM against exact SVC')
+    parser.add_argument('--max-exact-svm-rows', type=int, default=None,
+                        help='Skip the exact SVC above this many training rows')
+    parser.add_argument('--model-name', default='real',
+                        help='Served as /models/<name>/predict (default: real)')
+    parser.add_argument('--output-dir', default='Models',
+                        help='Artifacts go to <output-dir>/<model-name>/')
+    args = parser.parse_args()
+    model_dir = os.path.join(args.output_dir, args.model_name)
+    budgets = budgets_from_args(args)
+    
     # Load and preprocess data
-    X, y, df, label_encoders = load_and_preprocess_real_data()
+    X, y, df, preprocessor = load_and_preprocess_real_data()
     
     # Analyze features
     analyze_feature_correlations(df)
@@ -287,18 +310,43 @@ if __name__ == "__main__":
     # Train models
     results = train_models(X_train, X_test, y_train, y_test)
     
+    # Exact vs approximate SVM trade-off
+    if args.compare_exact_svm:
+        print("\n" + "="*70)
+        print("SVM: EXACT RBF SVC vs NYSTROEM + LINEAR SVM")
+        print("="*70)
+        print_svm_comparison(compare_svm_variants(
+            X_train, X_test, y_train, y_test, max_exact_rows=args.max_exact_svm_rows
+        ))
+    
+    # Pick the best model within the serving budgets
+    best_model_name = select_best_model(results, **budgets)
+    
     # Plot results
-    plot_results(results, y_test, X)
+    plot_results(results, y_test, X, best_model_name)
     
     # Save best model
-    best_model_name = save_best_model(results, X)
+    save_best_model(results, best_model_name, X, preprocessor, model_dir, budgets)
+    
+    # Training-set reference for the serving-time drift monitor
+    profile = build_profile(results[best_model_name]['model'], X_train,
+                            model_version=file_digest(os.path.join(model_dir, 'model.pkl')))
+    save_profile(profile, os.path.join(model_dir, DRIFT_PROFILE_FILE))
+    print(f"✓ Drift reference profile saved to '{model_dir}/{DRIFT_PROFILE_FILE}'")
+    
+    # Trees and vocabularies for in-browser previews (tree models only)
+    try:
+        bundle = export_bundle(results[best_model_name]['model'], preprocessor, X_train,
+                               file_digest(os.path.join(model_dir, 'model.pkl')))
+        save_bundle(bundle, os.path.join(model_dir, BROWSER_BUNDLE_FILE))
+        print(f"✓ Browser model bundle saved to '{model_dir}/{BROWSER_BUNDLE_FILE}'")
+    except (TypeError, ValueError) as e:
+        print(f"⚠️  No browser model bundle: {e}")
     
     print("\n" + "="*70)
     print("TRAINING COMPLETED SUCCESSFULLY!")
     print("="*70)
     print(f"\n✅ Best Model: {best_model_name}")
     print(f"✅ Trained on {len(X)} real loan applications")
-    print(f"✅ Model saved as: loan_model_real.pkl")
-    print(f"✅ Encoders saved as: label_encoders_real.pkl")
-    print(f"✅ Feature names saved as: feature_names_real.pkl")
-    print(f"\nNext step: Update app.py to use the new model!")
+    print(f"✅ Model, preprocessor and feature names saved to: {model_dir}/")
+    print(f"\nServed by app.py at /models/{args.model_name}/predict")
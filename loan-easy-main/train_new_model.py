@@ -11,11 +11,27 @@ Requirements:
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
 import os
+import argparse
+
+from preprocessing import LoanPreprocessor, NUMERIC_COLS, CATEGORICAL_COLS
+
+from model_benchmark import (
+    measure_fit, benchmark_model, select_best_model, format_benchmark,
+    write_benchmark_info, save_benchmarks_json, add_budget_arguments, budgets_from_args
+)
+from drift import build_profile, save_profile
+from audit_log import file_digest
+from browser_model import export_bundle, save_bundle, LEGACY_BUNDLE_FILE
+from cascade import (
+    build_surrogate, evaluate_cascade, format_cascade, save_surrogate, add_cascade_arguments
+)
+from compaction import (
+    compact_model, evaluate_compaction, format_compaction, export_compact, add_compaction_arguments
+)
 
 def load_and_preprocess_data(filepath='synthetic_loan_data.csv'):
     """Load and preprocess the synthetic loan dataset"""
@@ -45,41 +61,31 @@ def load_and_preprocess_data(filepath='synthetic_loan_data.csv'):
     approval_rate = (df['Loan_Status']=='Y').sum()/len(df)*100
     print(f"Approval Rate: {approval_rate:.1f}%")
     
-    # Encode categorical variables
+    # Encode categorical variables with the shared preprocessor
     print("\nEncoding categorical variables...")
-    label_encoders = {}
+    preprocessor = LoanPreprocessor(NUMERIC_COLS, CATEGORICAL_COLS)
+    preprocessor.fit(df)
     
-    categorical_cols = ['Gender', 'Married', 'Dependents', 'Education', 
-                       'Self_Employed', 'Property_Area']
+    for col in preprocessor.categorical_cols:
+        classes = preprocessor.classes_[col]
+        print(f"  ✓ Encoded '{col}': {dict(zip(classes, range(len(classes))))}")
     
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        label_encoders[col] = le
-        print(f"  ✓ Encoded '{col}': {dict(zip(le.classes_, le.transform(le.classes_)))}")
+    # Feature names
+    feature_names = preprocessor.feature_names
     
     # Prepare features and target
-    X = df.drop('Loan_Status', axis=1)
+    X = pd.DataFrame(preprocessor.transform(df), columns=feature_names)
     y = df['Loan_Status'].map({'Y': 1, 'N': 0})
     
     print(f"\n✓ Feature Matrix X: {X.shape}")
     print(f"✓ Target Vector y: {y.shape}")
-    
-    # Feature names
-    feature_names = X.columns.tolist()
     print(f"\nFeatures: {feature_names}")
     
-    return X, y, label_encoders, feature_names
+    return X, y, preprocessor, feature_names
 
-def train_models(X_train, X_test, y_train, y_test, feature_names):
-    """Train classification models"""
-    
-    print("\n" + "="*70)
-    print("TRAINING MODELS")
-    print("="*70)
-    
-    # Define models with reproducible random_state
-    models = {
+def candidate_models(n_jobs=None):
+    """Candidate classifiers with reproducible random_state (n_jobs: forest fit threads)"""
+    return {
         'GradientBoosting': GradientBoostingClassifier(
             n_estimators=100,
             learning_rate=0.1,
@@ -89,9 +95,19 @@ def train_models(X_train, X_test, y_train, y_test, feature_names):
         'RandomForest': RandomForestClassifier(
             n_estimators=100,
             max_depth=15,
-            random_state=42
+            random_state=42,
+            n_jobs=n_jobs
         )
     }
+
+def train_models(X_train, X_test, y_train, y_test, feature_names):
+    """Train classification models"""
+    
+    print("\n" + "="*70)
+    print("TRAINING MODELS")
+    print("="*70)
+    
+    models = candidate_models()
     
     results = {}
     
@@ -100,8 +116,8 @@ def train_models(X_train, X_test, y_train, y_test, feature_names):
         print(f"Training {name}...")
         print('='*70)
         
-        # Train the model
-        model.fit(X_train, y_train)
+        # Train the model (timed, with peak memory tracking)
+        fit_time, peak_fit_bytes = measure_fit(model, X_train, y_train)
         
         # Predictions
         y_pred = model.predict(X_test)
@@ -112,8 +128,14 @@ def train_models(X_train, X_test, y_train, y_test, feature_names):
         # Cross-validation score (5-fold)
         cv_scores = cross_val_score(model, X_train, y_train, cv=5)
         
+        # Serving cost: latency, artifact size
+        benchmark = benchmark_model(model, X_test)
+        benchmark['fit_time_s'] = fit_time
+        benchmark['peak_fit_bytes'] = peak_fit_bytes
+        
         print(f"\n✓ Accuracy: {accuracy:.4f}")
         print(f"✓ Cross-Validation Score: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        print(f"✓ Serving cost: {format_benchmark(benchmark)}")
         
         print(f"\nClassification Report:")
         print(classification_report(y_test, y_pred, target_names=['Rejected', 'Approved']))
@@ -137,13 +159,15 @@ def train_models(X_train, X_test, y_train, y_test, feature_names):
             'cv_score': cv_scores.mean(),
             'cv_std': cv_scores.std(),
             'predictions': y_pred,
-            'confusion_matrix': cm
+            'confusion_matrix': cm,
+            'benchmark': benchmark
         }
     
     return results
 
-def save_best_model(results, label_encoders, feature_names, output_dir='Models'):
-    """Save the best performing model and associated files"""
+def save_best_model(results, preprocessor, feature_names, output_dir='Models', budgets=None):
+    """Save the best performing model (within the serving budgets) and associated files"""
+    budgets = budgets or {}
     
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
@@ -151,7 +175,7 @@ def save_best_model(results, label_encoders, feature_names, output_dir='Models')
         print(f"\n✓ Created directory: {output_dir}")
     
     # Find best model
-    best_model_name = max(results, key=lambda x: results[x]['accuracy'])
+    best_model_name = select_best_model(results, **budgets)
     best_model = results[best_model_name]['model']
     best_accuracy = results[best_model_name]['accuracy']
     best_cv_score = results[best_model_name]['cv_score']
@@ -161,9 +185,14 @@ def save_best_model(results, label_encoders, feature_names, output_dir='Models')
     joblib.dump(best_model, model_path)
     print(f"\n✓ Best model ({best_model_name}) saved to: {model_path}")
     
-    # Save label encoders
+    # Save the fitted preprocessor (used by serving)
+    preprocessor_path = os.path.join(output_dir, 'preprocessor_real.pkl')
+    joblib.dump(preprocessor, preprocessor_path)
+    print(f"✓ Preprocessor saved to: {preprocessor_path}")
+    
+    # Save label encoders (legacy artifact)
     encoders_path = os.path.join(output_dir, 'label_encoders_real.pkl')
-    joblib.dump(label_encoders, encoders_path)
+    joblib.dump(preprocessor.to_label_encoders(), encoders_path)
     print(f"✓ Label encoders saved to: {encoders_path}")
     
     # Save feature names
@@ -188,9 +217,16 @@ def save_best_model(results, label_encoders, feature_names, output_dir='Models')
             indices = np.argsort(importances)[::-1]
             for idx in indices:
                 f.write(f"  {feature_names[idx]}: {importances[idx]:.4f}\n")
+        
+        write_benchmark_info(f, results, best_model_name)
     
     print(f"✓ Model info saved to: {info_path}")
     
+    # Save machine-readable benchmark figures
+    bench_path = os.path.join(output_dir, 'model_benchmarks_real.json')
+    save_benchmarks_json(results, best_model_name, bench_path, budgets)
+    print(f"✓ Candidate benchmarks saved to: {bench_path}")
+    
     # Display summary
     print("\n" + "="*70)
     print("MODEL TRAINING COMPLETE")
@@ -208,9 +244,19 @@ if __name__ == "__main__":
     print("Python 3.11 | scikit-learn 1.3.2")
     print("="*70)
     
+    parser = argparse.ArgumentParser(description='Train the loan approval model')
+    add_budget_arguments(parser)
+    parser.add_argument('--compact', action='store_true',
+                        help='Also export a compacted copy of the best model to Models/compact/')
+    add_compaction_arguments(parser)
+    parser.add_argument('--cascade', action='store_true',
+                        help='Also distill a cascade surrogate to Models/cascade_real.pkl')
+    add_cascade_arguments(parser)
+    args = parser.parse_args()
+    
     try:
         # Load and preprocess data
-        X, y, label_encoders, feature_names = load_and_preprocess_data()
+        X, y, preprocessor, feature_names = load_and_preprocess_data()
         
         # Split data (80% train, 20% test)
         X_train, X_test, y_train, y_test = train_test_split(
@@ -227,7 +273,55 @@ if __name__ == "__main__":
         results = train_models(X_train, X_test, y_train, y_test, feature_names)
         
         # Save best model
-        best_model_name = save_best_model(results, label_encoders, feature_names)
+        best_model_name = save_best_model(results, preprocessor, feature_names,
+                                          budgets=budgets_from_args(args))
+        
+        # Training-set reference for the serving-time drift monitor
+        profile = build_profile(results[best_model_name]['model'], X_train,
+                                model_version=file_digest(os.path.join('Models', 'loan_model_real.pkl')))
+        profile_path = save_profile(profile, os.path.join('Models', 'drift_profile_real.json'))
+        print(f"✓ Drift reference profile saved to: {profile_path}")
+        
+        # Trees and vocabularies for the dashboards' in-browser previews
+        try:
+            bundle = export_bundle(results[best_model_name]['model'], preprocessor, X_train,
+                                   file_digest(os.path.join('Models', 'loan_model_real.pkl')))
+            bundle_path = save_bundle(bundle, os.path.join('Models', LEGACY_BUNDLE_FILE))
+            print(f"✓ Browser model bundle saved to: {bundle_path}")
+        except (TypeError, ValueError) as e:
+            print(f"⚠️  No browser model bundle: {e}")
+        
+        # Optional post-training compaction, checked against the test split
+        if args.compact:
+            best_model = results[best_model_name]['model']
+            print("\n" + "="*70)
+            print("MODEL COMPACTION")
+            print("="*70)
+            compact = compact_model(best_model, args.leaf_tolerance, args.tree_tolerance)
+            report = evaluate_compaction(best_model, compact, X_test, y_test)
+            print(format_compaction(report))
+            try:
+                path = export_compact(compact, report, os.path.join('Models', 'compact'),
+                                      preprocessor, args.max_accuracy_loss)
+                print(f"\n✓ Compact model saved to '{path}/'")
+            except ValueError as e:
+                print(f"\n⚠️  {e}")
+        
+        # Optional cascade surrogate: distilled on the training split, margin
+        # calibrated on one half of the test split and evaluated on the other
+        if args.cascade:
+            best_model = results[best_model_name]['model']
+            print("\n" + "="*70)
+            print("CASCADE SURROGATE")
+            print("="*70)
+            X_calibrate, X_eval = train_test_split(X_test, test_size=0.5, random_state=0)
+            surrogate = build_surrogate(
+                best_model, X_train, X_calibrate, args.cascade_depth, args.cascade_agreement,
+                model_version=file_digest(os.path.join('Models', 'loan_model_real.pkl'))
+            )
+            print(format_cascade(surrogate, evaluate_cascade(best_model, surrogate, X_eval)))
+            path = save_surrogate(surrogate, os.path.join('Models', 'cascade_real.pkl'))
+            print(f"\n✓ Cascade surrogate saved to '{path}' (serve with CASCADE=1)")
         
         print("\n✅ SUCCESS! Model is ready for deployment.")
         print("\nNext steps:")
@@ -0,0 +1,81 @@
+"""
+Helpers for walking fitted sklearn tree models
+Shared by the explanation, counterfactual and inference modules.
+"""
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier, ExtraTreesClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+
+def ensemble_trees(model):
+    """
+    Return (trees, scale, output_space) for a supported tree model
+
+    The model output is init + scale * sum(tree values) in `output_space`:
+    log-odds for binary gradient boosting, class-1 probability otherwise.
+    """
+    if isinstance(model, GradientBoostingClassifier):
+        if model.n_classes_ != 2:
+            raise ValueError("Only binary gradient boosting is supported")
+        return list(model.estimators_[:, 0]), model.learning_rate, 'log_odds'
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return list(model.estimators_), 1.0 / len(model.estimators_), 'probability'
+    if isinstance(model, DecisionTreeClassifier):
+        return [model], 1.0, 'probability'
+    raise TypeError(f"Expected a tree model, got {type(model).__name__}")
+
+
+def node_values(tree, output_space):
+    """Per-node output value of a fitted sklearn tree"""
+    value = tree.tree_.value
+    if output_space == 'log_odds':
+        return value[:, 0, 0].astype(np.float64)
+    # Classification trees store class counts (or fractions); use P(class 1)
+    totals = value[:, 0, :].sum(axis=1)
+    return value[:, 0, 1] / np.where(totals > 0, totals, 1)
+
+
+def subtree_means(tree, values):
+    """
+    Per-node mean of the leaf values below it, weighted by training samples
+
+    Leaves keep their value. Gradient boosting stores the mean residual at
+    internal nodes but a Newton step at leaves, so the stored internal values
+    are not on the leaves' scale; these are.
+    """
+    t = tree.tree_
+    weights = t.weighted_n_node_samples
+    means = np.array(values, dtype=np.float64)
+    # Children are always numbered after their parent
+    for node in range(t.node_count - 1, -1, -1):
+        left, right = t.children_left[node], t.children_right[node]
+        if left != -1:
+            total = weights[left] + weights[right]
+            means[node] = (weights[left] * means[left] + weights[right] * means[right]) / total
+    return means
+
+
+def init_log_odds(model, X):
+    """Raw score a gradient boosting model starts from, per row of X"""
+    init = model.init_
+    if isinstance(init, str) and init == 'zero':
+        return np.zeros(X.shape[0])
+    p = init.predict_proba(X)[:, 1]
+    eps = np.finfo(np.float32).eps
+    p = np.clip(p, eps, 1 - eps)
+    if getattr(model, 'loss', None) == 'exponential':
+        # The exponential loss minimiser is half the log odds
+        return 0.5 * np.log(p / (1 - p))
+    return np.log(p / (1 - p))
+
+
+def split_thresholds(model, n_features):
+    """Sorted unique split thresholds per feature index across the ensemble"""
+    trees, _, _ = ensemble_trees(model)
+    collected = [[] for _ in range(n_features)]
+    for tree in trees:
+        t = tree.tree_
+        internal = t.children_left != -1
+        for feature, threshold in zip(t.feature[internal], t.threshold[internal]):
+            collected[feature].append(threshold)
+    return [np.unique(np.asarray(values, dtype=np.float64)) for values in collected]
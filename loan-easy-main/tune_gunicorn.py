@@ -0,0 +1,228 @@
+"""
+Gunicorn worker/thread autotuning from measured throughput
+Starts wsgi:app under each gunicorn configuration of a grid (worker class x
+workers x threads) on this machine, drives it with the same closed-loop
+workload (a mix of /predict and dashboard pages), and measures throughput,
+tail latency, error rate and peak RSS of the master plus its workers. The
+recommendation is the fastest configuration that fits the memory cap and the
+core count without exceeding the error or p99 limits; it is written as a
+gunicorn config file, which gunicorn reads from ./gunicorn.conf.py by default.
+
+Measure on hardware like the deployment's: the load generator shares this
+machine's cores with the server.
+
+Usage:
+    python tune_gunicorn.py                                        # default grid, this machine
+    python tune_gunicorn.py --workers 1,2,4 --threads 1,4,8 --memory-cap-mb 512 --cores 1
+    python tune_gunicorn.py --max-p99-ms 250 --output gunicorn.conf.py
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+from loadtest import (
+    DATA_FILE, REPORT_DIR, HttpTarget, git_commit, load_payloads, parse_mix, run_load,
+    start_gunicorn, stop_process,
+)
+from model_benchmark import PeakRSSSampler, process_tree_rss
+
+DEFAULT_MIX = 'predict:8,dashboard:1,futuristic:1,checker:1'
+WORKER_CLASSES = ('sync', 'gthread')
+DEFAULT_WORKERS = (1, 2, 4)
+DEFAULT_THREADS = (1, 2, 4, 8)
+CONFIG_FILE = 'gunicorn.conf.py'
+# Configurations within this fraction of the best throughput count as tied;
+# the tie goes to the lowest p99, then the smallest memory
+THROUGHPUT_TIE = 0.05
+
+
+def config_grid(worker_classes, workers, threads):
+    """(worker_class, workers, threads) to measure; sync workers are single-threaded"""
+    grid = []
+    for worker_class in worker_classes:
+        for n_workers in workers:
+            # gunicorn turns sync workers with threads > 1 into gthread workers
+            for n_threads in (threads if worker_class != 'sync' else (1,)):
+                grid.append((worker_class, n_workers, n_threads))
+    return grid
+
+
+def measure_config(worker_class, workers, threads, mix, payloads, concurrency, duration,
+                   warmup, seed=42):
+    """Load-test one configuration; returns the loadtest summary plus RSS"""
+    process, url = start_gunicorn(workers, threads, worker_class)
+    try:
+        idle_rss = process_tree_rss(process.pid)
+        with PeakRSSSampler(interval=0.05, rss=lambda: process_tree_rss(process.pid)) as sampler:
+            result = run_load(HttpTarget(url), mix, payloads, 'concurrency', concurrency,
+                              duration, warmup, seed)
+    finally:
+        stop_process(process)
+    result['idle_rss_bytes'] = idle_rss
+    result['peak_rss_bytes'] = sampler.peak
+    return result
+
+
+def recommend(measurements, cores, memory_cap_bytes=None, max_p99_ms=None, max_error_rate=0.01):
+    """
+    Best eligible measurement, or None
+
+    Eligible: peak RSS under the cap, error rate and p99 within their limits,
+    and at most 2 * cores + 1 workers (gunicorn's guideline; more workers
+    than that only contend for the cores of a CPU-bound model).
+    """
+    eligible = []
+    for entry in measurements:
+        result = entry['result']
+        p99 = result['latency'].get('p99_ms')
+        if entry['workers'] > 2 * cores + 1:
+            continue
+        if memory_cap_bytes is not None and result['peak_rss_bytes'] > memory_cap_bytes:
+            continue
+        if result['error_rate'] > max_error_rate or p99 is None:
+            continue
+        if max_p99_ms is not None and p99 > max_p99_ms:
+            continue
+        eligible.append(entry)
+    if not eligible:
+        return None
+    best = max(entry['result']['ok_throughput_rps'] for entry in eligible)
+    tied = [entry for entry in eligible
+            if entry['result']['ok_throughput_rps'] >= best * (1 - THROUGHPUT_TIE)]
+    return min(tied, key=lambda entry: (entry['result']['latency']['p99_ms'],
+                                        entry['result']['peak_rss_bytes']))
+
+
+def per_worker_rss(measurements):
+    """Extra idle RSS per added worker, from the runs of the smallest and largest worker count"""
+    by_workers = {}
+    for entry in measurements:
+        by_workers.setdefault(entry['workers'], []).append(entry['result']['idle_rss_bytes'])
+    if len(by_workers) < 2:
+        return None
+    low, high = min(by_workers), max(by_workers)
+    return (min(by_workers[high]) - min(by_workers[low])) / (high - low)
+
+
+def write_config(entry, path, cores, memory_cap_bytes, commit):
+    """gunicorn config file (Python) for the recommended configuration"""
+    result = entry['result']
+    cap = f"{memory_cap_bytes / 2**20:.0f} MiB cap" if memory_cap_bytes else 'no memory cap'
+    lines = [
+        f"# Generated by tune_gunicorn.py on "
+        f"{datetime.now(timezone.utc).isoformat(timespec='seconds')} ({commit or 'local'})",
+        f"# For {cores} cores, {cap}. Measured: {result['ok_throughput_rps']:.1f} req/s, "
+        f"p99 {result['latency']['p99_ms']:.1f} ms, peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB",
+        f"worker_class = {entry['worker_class']!r}",
+        f"workers = {entry['workers']}",
+        f"threads = {entry['threads']}",
+    ]
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def print_measurement(entry):
+    result = entry['result']
+    latency = result['latency']
+    print(f"  {entry['worker_class']:8s} workers {entry['workers']:>2}  threads {entry['threads']:>2}  "
+          f"{result['ok_throughput_rps']:>8.1f} req/s  "
+          f"p50 {latency.get('p50_ms', float('nan')):>7.1f}  p99 {latency.get('p99_ms', float('nan')):>8.1f} ms  "
+          f"errors {result['error_rate'] * 100:>5.2f}%  "
+          f"RSS idle {result['idle_rss_bytes'] / 2**20:>6.0f} / peak {result['peak_rss_bytes'] / 2**20:>6.0f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pick gunicorn workers/threads from measured throughput')
+    parser.add_argument('--worker-classes', default=','.join(WORKER_CLASSES))
+    parser.add_argument('--workers', default=','.join(map(str, DEFAULT_WORKERS)))
+    parser.add_argument('--threads', default=','.join(map(str, DEFAULT_THREADS)),
+                        help='Threads per worker (threaded worker classes only)')
+    parser.add_argument('--cores', type=int, default=os.cpu_count(),
+                        help='Cores available to the deployment')
+    parser.add_argument('--memory-cap-mb', type=float, default=None,
+                        help='Memory available to gunicorn (master + workers)')
+    parser.add_argument('--max-p99-ms', type=float, default=None)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per configuration')
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Endpoint weights, e.g. 'predict:8,dashboard:1'")
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--payloads', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=CONFIG_FILE, help='gunicorn config file to write')
+    parser.add_argument('--report', help='Measurements as JSON (default benchmarks/gunicorn_tuning_<commit>.json)')
+    args = parser.parse_args(argv)
+
+    grid = config_grid([c for c in args.worker_classes.split(',') if c],
+                       [int(w) for w in args.workers.split(',')],
+                       [int(t) for t in args.threads.split(',')])
+    mix = parse_mix(args.mix)
+    payloads = load_payloads(args.data, args.payloads, args.seed)
+    memory_cap = args.memory_cap_mb * 2**20 if args.memory_cap_mb else None
+
+    print("\n" + "="*70)
+    print(f"GUNICORN TUNING ({len(grid)} configurations, {args.concurrency} clients, "
+          f"{args.duration:.0f} s each, mix {args.mix})")
+    print("="*70)
+    measurements = []
+    for worker_class, workers, threads in grid:
+        try:
+            result = measure_config(worker_class, workers, threads, mix, payloads,
+                                    args.concurrency, args.duration, args.warmup, args.seed)
+        except RuntimeError as e:
+            print(f"  ❌ {worker_class} workers {workers} threads {threads}: {e}")
+            continue
+        entry = {'worker_class': worker_class, 'workers': workers, 'threads': threads,
+                 'result': result}
+        measurements.append(entry)
+        print_measurement(entry)
+
+    best = recommend(measurements, args.cores, memory_cap, args.max_p99_ms, args.max_error_rate)
+    extra = per_worker_rss(measurements)
+    commit = git_commit()
+
+    report = {
+        'tool': 'tune_gunicorn',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count()},
+        'config': {'cores': args.cores, 'memory_cap_mb': args.memory_cap_mb,
+                   'max_p99_ms': args.max_p99_ms, 'max_error_rate': args.max_error_rate,
+                   'concurrency': args.concurrency, 'duration_s': args.duration,
+                   'mix': dict(mix)},
+        'per_worker_rss_bytes': extra,
+        'measurements': measurements,
+        'recommended': ({key: best[key] for key in ('worker_class', 'workers', 'threads')}
+                        if best else None),
+    }
+    report_path = args.report
+    if report_path is None:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        report_path = os.path.join(REPORT_DIR, f"gunicorn_tuning_{commit or 'local'}.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*70)
+    print("RECOMMENDATION")
+    print("="*70)
+    if extra is not None:
+        print(f"  Each extra worker adds ~{extra / 2**20:.0f} MiB RSS")
+    if best is None:
+        print("  ❌ No configuration fits the memory cap and latency/error limits")
+        print(f"\n✓ Measurements saved to {report_path}")
+        return 1
+    print_measurement(best)
+    path = write_config(best, args.output, args.cores, memory_cap, commit)
+    print(f"\n✓ Config written to {path} (gunicorn wsgi:app reads ./gunicorn.conf.py)")
+    print(f"✓ Measurements saved to {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
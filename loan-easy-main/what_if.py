@@ -0,0 +1,111 @@
+"""
+What-if grids for affordability curves
+Sweeps one or two features of a base applicant, builds the whole grid as a
+single matrix and scores it with one predict_proba call.
+"""
+import numpy as np
+
+MAX_AXIS_POINTS = 200
+MAX_GRID_POINTS = 10000
+
+
+def sweep_values(spec):
+    """Expand a sweep spec: {"values": [...]} or {"start", "stop", "num"}"""
+    if 'values' in spec:
+        values = list(spec['values'])
+    else:
+        num = int(spec.get('num', 50))
+        values = np.linspace(float(spec['start']), float(spec['stop']), num).tolist()
+    if not values:
+        raise ValueError(f"Sweep over '{spec.get('feature')}' has no values")
+    if len(values) > MAX_AXIS_POINTS:
+        raise ValueError(f"Sweep over '{spec.get('feature')}' has {len(values)} values "
+                         f"(max {MAX_AXIS_POINTS})")
+    return values
+
+
+def build_grid(preprocessor, base_record, sweeps):
+    """
+    Model matrix for every combination of the swept values
+
+    Returns (matrix, axes) where axes is a list of (feature, values) and the
+    matrix rows enumerate the grid in C order (last axis fastest).
+    """
+    axes = []
+    for spec in sweeps:
+        feature = spec['feature']
+        if feature not in preprocessor.input_fields:
+            raise ValueError(f"Cannot sweep unknown feature '{feature}'")
+        axes.append((feature, sweep_values(spec)))
+
+    shape = tuple(len(values) for _, values in axes)
+    n_points = int(np.prod(shape))
+    if n_points > MAX_GRID_POINTS:
+        raise ValueError(f"Grid has {n_points} points (max {MAX_GRID_POINTS})")
+
+    mesh = np.meshgrid(*[np.arange(n) for n in shape], indexing='ij')
+    index = [m.ravel() for m in mesh]
+
+    if preprocessor.derived:
+        # Derived features depend on the swept inputs: encode the raw grid
+        columns = {name: [value] * n_points for name, value in base_record.items()}
+        for (feature, values), idx in zip(axes, index):
+            columns[feature] = np.asarray(values, dtype=object)[idx].tolist()
+        return preprocessor.transform(columns), axes
+
+    # Encode the base once and overwrite only the swept columns
+    matrix = np.repeat(preprocessor.transform(base_record), n_points, axis=0)
+    feature_index = {name: j for j, name in enumerate(preprocessor.feature_names)}
+    for (feature, values), idx in zip(axes, index):
+        if feature in preprocessor.categorical_cols:
+            encoded = preprocessor.encode_categorical(feature, values)
+        else:
+            encoded = np.asarray(values, dtype=np.float64)
+        matrix[:, feature_index[feature]] = encoded[idx]
+    return matrix, axes
+
+
+def boundary_crossings(values, probabilities, threshold=0.5):
+    """Points along a 1-D sweep where the probability crosses the threshold"""
+    crossings = []
+    above = probabilities >= threshold
+    for i in np.flatnonzero(above[1:] != above[:-1]):
+        x0, x1 = values[i], values[i + 1]
+        p0, p1 = probabilities[i], probabilities[i + 1]
+        try:
+            # Linear interpolation between numeric grid points
+            x = float(x0) + (threshold - p0) * (float(x1) - float(x0)) / (p1 - p0)
+        except (TypeError, ValueError):
+            x = x1
+        crossings.append({
+            'at': x,
+            'direction': 'approve' if p1 >= threshold else 'reject',
+        })
+    return crossings
+
+
+def what_if(model, preprocessor, base_record, sweeps, threshold=0.5):
+    """Score the sweep grid in one model call and locate the approval boundary"""
+    if not 1 <= len(sweeps) <= 2:
+        raise ValueError("Sweep one or two features")
+
+    matrix, axes = build_grid(preprocessor, base_record, sweeps)
+    shape = tuple(len(values) for _, values in axes)
+    probabilities = model.predict_proba(matrix)[:, 1].reshape(shape)
+
+    result = {
+        'axes': [{'feature': feature, 'values': values} for feature, values in axes],
+        'threshold': threshold,
+        'probability': np.round(probabilities, 4).tolist(),
+        'points': int(probabilities.size),
+    }
+    if len(axes) == 1:
+        result['boundary'] = boundary_crossings(axes[0][1], probabilities, threshold)
+    else:
+        # For every value of the first feature, where the second one flips the decision
+        result['boundary'] = [
+            {axes[0][0]: value,
+             'crossings': boundary_crossings(axes[1][1], probabilities[i], threshold)}
+            for i, value in enumerate(axes[0][1])
+        ]
+    return result